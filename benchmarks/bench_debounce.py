@@ -0,0 +1,113 @@
+"""
+Benchmark: debounce cost during an event storm.
+
+Replays a synthetic OneDrive sync storm (100k events/min by default: every
+file gets a created event and a few modified events, with many files in
+flight at once) through:
+
+- the original debounce: a dict rebuilt with a comprehension on every event
+- ExpiringCache, as used by ExportWatchdogHandler.recently_handled
+
+A simulated clock is used, so the numbers are pure CPU cost per event.
+
+Usage:
+    python benchmarks/bench_debounce.py [--rate 100000] [--minutes 1]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import ExpiringCache  # noqa: E402
+
+DEBOUNCE_SECONDS = 5
+
+
+def build_events(rate: int, minutes: float, events_per_file: int) -> List[Tuple[float, Path]]:
+    """
+    Build a timestamped event stream.
+
+    Args:
+        rate: Events per minute
+        minutes: Length of the storm
+        events_per_file: Events (created + modified) generated per file
+
+    Returns:
+        List of (timestamp, path), sorted by timestamp
+    """
+    rng = random.Random(3)
+    total = int(rate * minutes)
+    interval = 60.0 / rate
+    events = []
+    for i in range(total):
+        # Each file's events arrive close together, interleaved with others
+        file_index = i // events_per_file
+        jitter = rng.random() * events_per_file * interval
+        events.append((i * interval + jitter, Path(f"/sync/Downloads/export_{file_index:07d}.xlsx")))
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def run_dict_rebuild(events: List[Tuple[float, Path]]) -> Tuple[float, int]:
+    """The original _handle debounce: check, then rebuild the whole dict."""
+    recently_handled: Dict[Path, float] = {}
+    accepted = 0
+    start = time.perf_counter()
+    for now, fp in events:
+        if fp in recently_handled and (now - recently_handled[fp]) < DEBOUNCE_SECONDS:
+            continue
+        recently_handled = {
+            p: t for p, t in recently_handled.items()
+            if (now - t) < DEBOUNCE_SECONDS
+        }
+        recently_handled[fp] = now
+        accepted += 1
+    return time.perf_counter() - start, accepted
+
+
+def run_expiring_cache(events: List[Tuple[float, Path]]) -> Tuple[float, int]:
+    """ExpiringCache with lazy expiry, as used by ExportWatchdogHandler."""
+    clock_now = [0.0]
+    cache = ExpiringCache(DEBOUNCE_SECONDS, max_size=50000, clock=lambda: clock_now[0])
+    accepted = 0
+    start = time.perf_counter()
+    for now, fp in events:
+        clock_now[0] = now
+        if fp in cache:
+            continue
+        cache.add(fp)
+        accepted += 1
+    return time.perf_counter() - start, accepted
+
+
+def main() -> None:
+    """Run the benchmark and print per-event costs."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rate', type=int, default=100000, help="events per minute")
+    parser.add_argument('--minutes', type=float, default=1.0)
+    parser.add_argument('--events-per-file', type=int, default=4)
+    parser.add_argument('--rebuild-sample', type=int, default=10000,
+                        help="events replayed through the (slow) dict rebuild")
+    args = parser.parse_args()
+
+    events = build_events(args.rate, args.minutes, args.events_per_file)
+    in_window = args.rate / 60 * DEBOUNCE_SECONDS / args.events_per_file
+    print(f"{len(events)} events, ~{in_window:.0f} files inside the {DEBOUNCE_SECONDS}s window")
+
+    sample = events[:args.rebuild_sample]
+    elapsed, accepted = run_dict_rebuild(sample)
+    print(f"dict rebuild:   {elapsed / len(sample) * 1e6:9.2f} us/event  "
+          f"({len(sample)} events sampled, {accepted} work items)")
+
+    elapsed, accepted = run_expiring_cache(events)
+    print(f"ExpiringCache:  {elapsed / len(events) * 1e6:9.2f} us/event  "
+          f"({len(events)} events, {accepted} work items)")
+
+
+if __name__ == '__main__':
+    main()
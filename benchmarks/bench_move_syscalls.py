@@ -0,0 +1,138 @@
+"""
+Benchmark: file system calls made per move.
+
+Counts the os-level calls (stat, mkdir, open, rename, ...) made by
+ExportWatchdogHandler._run_move for each kind of rule, by wrapping the os
+functions the service and pathlib go through. On a OneDrive-backed tree
+every one of these is a round trip through the sync client, so the count
+matters more than the CPU time.
+
+Moves run synchronously on the calling thread against temporary folders.
+Run it on two versions of the service to compare them.
+
+Usage:
+    python benchmarks/bench_move_syscalls.py [--moves 200] [--journal]
+"""
+
+import argparse
+import builtins
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import watchdog_service  # noqa: E402
+from watchdog_service import ExportWatchdogHandler, MoveJob, MoveJournal  # noqa: E402
+
+# os functions that turn into a file system call
+COUNTED = ('stat', 'lstat', 'mkdir', 'open', 'replace', 'rename', 'unlink', 'scandir', 'utime', 'chmod')
+
+# One sample filename per rule kind
+SAMPLES = {
+    'legacy (timestamped)': 'OTActivity_{i}.xlsx',
+    'legacy (overwrite)': 'vehicle-pursuit-reports ({i}).csv',
+    'year-based': '2025_{m:02d}_Monthly_CAD_{i}.xlsx',
+}
+
+
+@contextmanager
+def counting(counts: Counter) -> Iterator[None]:
+    """Count calls to the file system functions while the block runs."""
+    originals = {name: getattr(os, name) for name in COUNTED if hasattr(os, name)}
+    original_open = builtins.open
+
+    def wrap(name, fn):
+        def counted(*args, **kwargs):
+            counts[name] += 1
+            return fn(*args, **kwargs)
+        return counted
+
+    for name, fn in originals.items():
+        setattr(os, name, wrap(name, fn))
+    # The service calls the builtin open() for the lock probe and copies
+    watchdog_service.open = wrap('open', original_open)
+    try:
+        yield
+    finally:
+        for name, fn in originals.items():
+            setattr(os, name, fn)
+        del watchdog_service.open
+
+
+def run_kind(handler: ExportWatchdogHandler, pattern: str, moves: int) -> Dict:
+    """
+    Move files of one rule kind and count the calls made.
+
+    Args:
+        handler: Handler to move with
+        pattern: Filename pattern with {i} (and optionally {m}) placeholders
+        moves: Number of files to move
+
+    Returns:
+        Calls per move by function, plus timing
+    """
+    jobs: List[MoveJob] = []
+    for i in range(moves):
+        name = pattern.format(i=i, m=i % 12 + 1)
+        path = handler.down_local / name
+        path.write_bytes(b'x' * 1024)
+        match = handler.matcher.match(name)
+        if match is None:
+            raise SystemExit(f"sample '{name}' does not match any rule")
+        jobs.append(MoveJob(path, match))
+
+    counts: Counter = Counter()
+    start = time.perf_counter()
+    with counting(counts):
+        for job in jobs:
+            handler._run_move(job)
+    elapsed = time.perf_counter() - start
+
+    left = sum(1 for job in jobs if job.path.exists())
+    per_move = {name: counts[name] / moves for name in sorted(counts)}
+    return {
+        'per_move': per_move,
+        'total_per_move': sum(per_move.values()),
+        'us_per_move': elapsed / moves * 1e6,
+        'not_moved': left,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print calls per move."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--moves', type=int, default=200, help="moves per rule kind")
+    parser.add_argument('--journal', action='store_true', help="move with a journal")
+    args = parser.parse_args()
+
+    logger = logging.getLogger('bench_move_syscalls')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        journal = MoveJournal(home / 'state' / 'journal.db', logger) if args.journal else None
+        handler = ExportWatchdogHandler(home / 'exports', logger, home=home, journal=journal)
+        try:
+            print(f"{'rule kind':<22} {'calls/move':>10} {'us/move':>9}  breakdown")
+            for kind, pattern in SAMPLES.items():
+                result = run_kind(handler, pattern, args.moves)
+                breakdown = ', '.join(f"{name} {n:g}" for name, n in result['per_move'].items())
+                print(f"{kind:<22} {result['total_per_move']:>10.2f} {result['us_per_move']:>9.1f}  {breakdown}")
+                if result['not_moved']:
+                    print(f"  warning: {result['not_moved']} file(s) were not moved")
+        finally:
+            handler.shutdown()
+            if journal:
+                journal.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: polling backends on a large, mostly idle folder.
+
+Fills a temporary folder with --files files and watches it with:
+
+- watchdog's PollingObserver (re-snapshots the whole folder every interval)
+- IncrementalPollingObserver (skips the folder while its mtime is unchanged)
+
+For each, measures process CPU while idle and the delay between writing a
+new file and the handler receiving its created event.
+
+Usage:
+    python benchmarks/bench_polling.py [--files 5000] [--idle 20] [--interval 1]
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers.polling import PollingObserver
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import IncrementalPollingObserver  # noqa: E402
+
+
+class CreatedRecorder(FileSystemEventHandler):
+    """Records when each created event arrives."""
+
+    def __init__(self):
+        self.seen: Dict[str, float] = {}
+        self.event = threading.Event()
+
+    def on_created(self, event):
+        self.seen[event.src_path] = time.perf_counter()
+        self.event.set()
+
+
+def measure(observer, folder: Path, recorder: CreatedRecorder, idle: float, probes: int) -> Dict:
+    """
+    Run one observer: idle CPU first, then detection delay of new files.
+
+    Args:
+        observer: Observer to measure (scheduled but not started)
+        folder: Watched folder
+        recorder: Handler the observer delivers to
+        idle: Seconds to measure idle CPU over
+        probes: Number of new files to time
+
+    Returns:
+        Idle CPU percent and detection delays in milliseconds
+    """
+    observer.start()
+    time.sleep(1.0)  # let both settle after the initial snapshot
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    time.sleep(idle)
+    cpu_pct = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100
+
+    delays: List[float] = []
+    for i in range(probes):
+        path = folder / f"probe_{id(observer)}_{i}.xlsx"
+        recorder.event.clear()
+        written = time.perf_counter()
+        path.write_bytes(b'x')
+        while str(path) not in recorder.seen:
+            if not recorder.event.wait(30):
+                break
+            recorder.event.clear()
+        if str(path) in recorder.seen:
+            delays.append((recorder.seen[str(path)] - written) * 1000)
+        # Go idle again so the adaptive interval backs off between probes
+        time.sleep(idle / probes)
+
+    observer.stop()
+    observer.join()
+    return {
+        'idle_cpu_percent': cpu_pct,
+        'delay_ms_median': statistics.median(delays) if delays else None,
+        'delay_ms_max': max(delays) if delays else None,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--idle', type=float, default=20.0, help="seconds of idle time measured")
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help="PollingObserver interval and IncrementalPollingObserver max interval")
+    parser.add_argument('--probes', type=int, default=5)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('bench_polling')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        print(f"Creating {args.files} files in {folder} ...")
+        for i in range(args.files):
+            (folder / f"IMG_{i:06d}.jpg").write_bytes(b'x')
+
+        results = {}
+        candidates = {
+            'PollingObserver': lambda: PollingObserver(timeout=args.interval),
+            'IncrementalPollingObserver': lambda: IncrementalPollingObserver(
+                logger, min_interval=min(0.5, args.interval), max_interval=args.interval
+            ),
+        }
+        for name, make in candidates.items():
+            recorder = CreatedRecorder()
+            observer = make()
+            observer.schedule(recorder, str(folder), recursive=False)
+            results[name] = measure(observer, folder, recorder, args.idle, args.probes)
+            if isinstance(observer, IncrementalPollingObserver):
+                results[name]['stats'] = observer.stats
+
+    print(f"{'backend':<28} {'idle CPU %':>10} {'delay ms (median)':>18} {'delay ms (max)':>15}")
+    for name, r in results.items():
+        median = f"{r['delay_ms_median']:.0f}" if r['delay_ms_median'] is not None else 'missed'
+        worst = f"{r['delay_ms_max']:.0f}" if r['delay_ms_max'] is not None else 'missed'
+        print(f"{name:<28} {r['idle_cpu_percent']:>10.2f} {median:>18} {worst:>15}")
+        if 'stats' in r:
+            print(f"  {r['stats']}")
+
+
+if __name__ == '__main__':
+    main()
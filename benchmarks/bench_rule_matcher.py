@@ -0,0 +1,148 @@
+"""
+Microbenchmark: per-event filename classification cost vs. rule count.
+
+Compares the original linear scan over legacy_rules/new_rules (every key and
+keyword lowercased and substring-searched per event) with the precompiled
+RuleMatcher used by ExportWatchdogHandler.
+
+Usage:
+    python benchmarks/bench_rule_matcher.py [--events 20000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import RuleMatcher  # noqa: E402
+
+WORDS = ['CAD', 'RMS', 'Arrest', 'Summons', 'Overtime', 'Response', 'Monthly',
+         'Rolling13', 'Benchmark', 'Pursuit', 'Force', 'Activity', 'Ticket']
+
+
+def build_rules(count: int) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """
+    Build a synthetic rule set shaped like the real one.
+
+    Roughly half legacy rules (key is the keyword) and half year-based rules
+    with one to three keywords each, including prefix overlaps like the real
+    "ResponseTime" / "ResponseTime_CAD" pair.
+
+    Args:
+        count: Total number of rules
+
+    Returns:
+        (legacy_rules, new_rules)
+    """
+    rng = random.Random(42)
+    legacy: Dict[str, Dict] = {}
+    new: Dict[str, Dict] = {}
+    for i in range(count):
+        stem = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}{i:03d}"
+        if i % 2 == 0:
+            fmt = rng.choice(['xlsx', 'csv'])
+            legacy[f"{stem}_Export"] = {
+                'dest': Path('dest') / stem,
+                'format': fmt,
+                'extensions': ('.xlsx', '.xls') if fmt == 'xlsx' else ('.csv',),
+            }
+        else:
+            keywords = [stem]
+            if i % 3 == 0:
+                keywords.append(f"{stem}_CAD")
+            if i % 5 == 0:
+                keywords.append(stem.replace('_', ''))
+            new[stem] = {
+                'keywords': keywords,
+                'target_dir': stem,
+                'year_strategy': 'start',
+                'format': 'xlsx',
+                'extensions': ('.xlsx',),
+            }
+    return legacy, new
+
+
+def build_names(legacy: Dict[str, Dict], new: Dict[str, Dict], count: int) -> List[str]:
+    """
+    Build a stream of filenames: half matching some rule, half unrelated.
+
+    Args:
+        legacy: Legacy rules
+        new: Year-based rules
+        count: Number of filenames
+
+    Returns:
+        List of filenames
+    """
+    rng = random.Random(7)
+    keywords = [(k, c['format']) for k, c in legacy.items()]
+    keywords += [(kw, c['format']) for c in new.values() for kw in c['keywords']]
+    names = []
+    for i in range(count):
+        if i % 2 == 0:
+            keyword, fmt = rng.choice(keywords)
+            names.append(f"2025_{i % 12 + 1:02d}_{keyword}.{fmt}")
+        else:
+            names.append(f"IMG_{i:06d} (1).{rng.choice(['jpg', 'xlsx', 'pdf', 'crdownload'])}")
+    return names
+
+
+def linear_match(name: str, legacy: Dict[str, Dict], new: Dict[str, Dict]) -> Optional[str]:
+    """The pre-RuleMatcher classification loop from ExportWatchdogHandler._handle."""
+    name_lower = name.lower()
+    for key, cfg in legacy.items():
+        expected_format = cfg['format']
+        if expected_format == 'xlsx':
+            format_match = name_lower.endswith('.xlsx') or name_lower.endswith('.xls')
+        else:
+            format_match = name_lower.endswith(f".{expected_format}")
+        if key == 'e_ticket':
+            format_match = format_match or name_lower.endswith('.csv')
+        if key.lower() in name_lower and format_match:
+            return key
+    for key, cfg in new.items():
+        for keyword in cfg['keywords']:
+            if keyword.lower() in name_lower and name_lower.endswith(f".{cfg['format']}"):
+                return key
+    return None
+
+
+def time_per_event(fn, names: List[str]) -> float:
+    """Return mean microseconds per call of fn over names (best of 3)."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for name in names:
+            fn(name)
+        best = min(best, time.perf_counter() - start)
+    return best / len(names) * 1e6
+
+
+def main() -> None:
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--rules', type=int, nargs='+', default=[17, 50, 100, 250, 500, 1000])
+    args = parser.parse_args()
+
+    print(f"{'rules':>6} {'build ms':>9} {'linear us/event':>16} {'matcher us/event':>17} {'speedup':>8}")
+    for count in args.rules:
+        legacy, new = build_rules(count)
+        names = build_names(legacy, new, args.events)
+
+        start = time.perf_counter()
+        matcher = RuleMatcher(legacy, new)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        linear_us = time_per_event(lambda n: linear_match(n, legacy, new), names)
+        matcher_us = time_per_event(matcher.match, names)
+        print(f"{count:>6} {build_ms:>9.1f} {linear_us:>16.2f} {matcher_us:>17.2f} "
+              f"{linear_us / matcher_us:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
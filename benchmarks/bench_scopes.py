@@ -0,0 +1,161 @@
+"""
+Benchmark: recursive watching of a deep Downloads tree.
+
+Builds a local Downloads folder with --fanout subfolders per level, --depth
+levels deep, and a small Reports/<year> subtree where exports are saved.
+Then, for the whole tree watched recursively and for a scope limited to
+Reports, measures:
+
+- watches: folders the event backend has to watch (inotify watches, or
+  folders IncrementalPollingObserver stats on every poll) and the time to
+  set them up
+- poll: CPU time of one idle polling pass over those folders
+- per event: ExportWatchdogHandler._handle for a file event in a random
+  folder of the tree, with a name no rule matches (events from pruned
+  subtrees stop at the scope lookup)
+
+Usage:
+    python benchmarks/bench_scopes.py [--depth 4] [--fanout 6] [--events 100000]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import (  # noqa: E402
+    DEFAULT_RULES_FILE,
+    ExportWatchdogHandler,
+    IncrementalPollingObserver,
+    InotifyObserver,
+)
+
+SCOPES = {
+    'whole tree': {'downloads': {'recursive': True}},
+    'Reports only': {'downloads/Reports': {'recursive': True}},
+}
+
+
+def populate(root: Path, depth: int, fanout: int) -> List[str]:
+    """
+    Create the folder tree.
+
+    Args:
+        root: Downloads folder
+        depth: Levels of subfolders
+        fanout: Subfolders per folder
+
+    Returns:
+        Every folder of the tree, including root
+    """
+    folders = [str(root)]
+    level = [root]
+    for _ in range(depth):
+        below = []
+        for parent in level:
+            for i in range(fanout):
+                folder = parent / f"dir{i}"
+                folder.mkdir(parents=True)
+                below.append(folder)
+        folders.extend(str(f) for f in below)
+        level = below
+    for year in ('2024', '2025'):
+        (root / 'Reports' / year).mkdir(parents=True)
+        folders.append(str(root / 'Reports' / year))
+    folders.append(str(root / 'Reports'))
+    return folders
+
+
+def measure(handler: ExportWatchdogHandler, logger: logging.Logger, folders: List[str], events: int) -> Dict:
+    """
+    Set up watches with both backends and time the event path.
+
+    Args:
+        handler: Handler with the scopes under test
+        logger: Logger for the observers
+        folders: Every folder of the tree
+        events: Number of events to time
+
+    Returns:
+        Watch counts, setup and poll times, and cost per event
+    """
+    result: Dict = {}
+    root = handler.down_local
+    recursive = handler.watches_subfolders(root)
+
+    if InotifyObserver.is_available():
+        observer = InotifyObserver(logger)
+        start = time.perf_counter()
+        observer.schedule(handler, str(root), recursive=recursive)
+        result['inotify_setup_ms'] = (time.perf_counter() - start) * 1000
+        result['inotify_watches'] = observer.watch_count
+        observer.join()
+
+    poller = IncrementalPollingObserver(logger)
+    start = time.perf_counter()
+    poller.schedule(handler, str(root), recursive=recursive)
+    result['poll_setup_ms'] = (time.perf_counter() - start) * 1000
+    result['polled_folders'] = poller.watch_count
+    start = time.process_time()
+    for folder in list(poller._folders):
+        poller._poll(folder)
+    result['poll_cpu_ms'] = (time.process_time() - start) * 1000
+
+    rng = random.Random(1)
+    paths = [os.path.join(rng.choice(folders), f"IMG_{i:06d}.jpg") for i in range(events)]
+    start = time.perf_counter()
+    for path in paths:
+        handler._handle(path)
+    result['us_per_event'] = (time.perf_counter() - start) / events * 1e6
+    result['pruned'] = handler.pruned_events
+    return result
+
+
+def main() -> None:
+    """Run the benchmark and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--fanout', type=int, default=6)
+    parser.add_argument('--events', type=int, default=100000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('bench_scopes')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        folders = populate(home / 'Downloads', args.depth, args.fanout)
+        print(f"{len(folders)} folders, depth {args.depth}, fanout {args.fanout}")
+        rules = json.loads(DEFAULT_RULES_FILE.read_text(encoding='utf-8'))
+
+        results = {}
+        for name, scopes in SCOPES.items():
+            rules_file = home / f"rules_{len(results)}.json"
+            rules_file.write_text(json.dumps(dict(rules, scopes=scopes)), encoding='utf-8')
+            handler = ExportWatchdogHandler(home / 'exports', logger, home=home, rules_file=rules_file,
+                                            rules_poll_interval=None)
+            try:
+                results[name] = measure(handler, logger, folders, args.events)
+            finally:
+                handler.shutdown()
+
+    print(f"{'scope':<14} {'watches':>8} {'setup ms':>9} {'polled':>7} {'poll CPU ms':>12} "
+          f"{'us/event':>9} {'pruned':>8}")
+    for name, r in results.items():
+        watches = r.get('inotify_watches', '-')
+        setup = f"{r['inotify_setup_ms']:.1f}" if 'inotify_setup_ms' in r else '-'
+        print(f"{name:<14} {watches:>8} {setup:>9} {r['polled_folders']:>7} {r['poll_cpu_ms']:>12.1f} "
+              f"{r['us_per_event']:>9.2f} {r['pruned']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: startup scan of a large Downloads folder.
+
+Fills a temporary local Downloads folder with unrelated files plus a handful
+of matching exports, then compares:
+
+- the original startup scan (one glob per rule, per pattern, per folder)
+- ExportWatchdogHandler._process_existing_files (one os.scandir per folder)
+
+The glob variant only enumerates; the handler variant classifies, queues the
+matching files and waits for the move workers to finish.
+
+Usage:
+    python benchmarks/bench_startup_scan.py [--files 50000] [--matching 100]
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import ExportWatchdogHandler  # noqa: E402
+
+
+def populate(folder: Path, files: int, matching: int) -> None:
+    """
+    Create unrelated files and matching exports in a folder.
+
+    Args:
+        folder: Folder to fill
+        files: Total number of files
+        matching: How many of them match an export rule
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(files - matching):
+        (folder / f"IMG_{i:06d}.jpg").touch()
+    for i in range(matching):
+        if i % 2:
+            (folder / f"2025_{i % 12 + 1:02d}_Monthly_CAD_{i}.xlsx").write_bytes(b'x')
+        else:
+            (folder / f"vehicle-pursuit-reports-{i}.csv").write_bytes(b'a,b\n')
+
+
+def glob_scan(handler: ExportWatchdogHandler) -> int:
+    """
+    Replay the original per-rule, per-pattern glob scan without moving.
+
+    Args:
+        handler: Handler providing the rule dictionaries and folders
+
+    Returns:
+        Number of matches found
+    """
+    found = 0
+    for key, cfg in handler.legacy_rules.items():
+        patterns = [f"*{key}*.{cfg['format']}"]
+        if cfg['format'] == 'xlsx':
+            patterns.append(f"*{key}*.xls")
+        if key == 'e_ticket':
+            patterns.append(f"*{key}*.csv")
+        monitor_paths = handler.monitor_paths if not cfg.get('src') else [cfg['src']]
+        for monitor_path in monitor_paths:
+            for pattern in patterns:
+                for fp in monitor_path.glob(pattern):
+                    if fp.is_file():
+                        found += 1
+    for key, cfg in handler.new_rules.items():
+        for keyword in cfg['keywords']:
+            pattern = f"*{keyword}*.{cfg['format']}"
+            for monitor_path in handler.monitor_paths:
+                for fp in monitor_path.glob(pattern):
+                    if fp.is_file():
+                        found += 1
+    return found
+
+
+def main() -> None:
+    """Run the benchmark and print the timings."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=50000)
+    parser.add_argument('--matching', type=int, default=100)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('bench_startup_scan')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        exports = home / 'exports'
+
+        # Build a handler while the folders are still empty, so its own
+        # startup scan finds nothing and the glob baseline can reuse its rules.
+        baseline = ExportWatchdogHandler(exports, logger, home=home)
+        baseline.shutdown()
+
+        downloads = baseline.down_local
+        print(f"Creating {args.files} files ({args.matching} matching) in {downloads} ...")
+        populate(downloads, args.files, args.matching)
+
+        start = time.perf_counter()
+        found = glob_scan(baseline)
+        glob_s = time.perf_counter() - start
+        print(f"glob scan:    {glob_s:8.3f}s  ({found} matches, enumeration only)")
+
+        start = time.perf_counter()
+        handler = ExportWatchdogHandler(exports, logger, home=home)
+        scan_s = time.perf_counter() - start
+        # Let the queued files settle and move before stopping the workers
+        while handler.readiness.pending_count or handler.dispatcher.queue_depth:
+            time.sleep(0.01)
+        handler.shutdown()
+        total_s = time.perf_counter() - start
+        moved = sum(1 for p in exports.rglob('*') if p.is_file())
+        print(f"scandir scan: {scan_s:8.3f}s  (classify + queue)")
+        print(f"  with moves: {total_s:8.3f}s  ({moved} files filed)")
+
+
+if __name__ == '__main__':
+    main()
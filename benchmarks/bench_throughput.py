@@ -0,0 +1,385 @@
+"""
+Benchmark: end-to-end throughput and latency of the running service.
+
+Builds temporary monitored folders and a destination tree, points
+ExportWatchdogHandler and a real observer at them (Path.home() is never
+touched) and writes synthetic exports for every rule in legacy_rules and
+new_rules:
+
+- a steady stream at --rate files/second, with --burst-size files written at
+  once every --burst-every files
+- a mix of file sizes (--sizes)
+- locked files: the lock probe reports --locked of the files as locked for
+  --lock-seconds, as if they were open in Excel
+- duplicates: --duplicates of the files are downloaded again under the same name
+
+The run ends once every generated file has left the monitored folders and the
+readiness, retry and move queues are empty. It reports throughput, p50/p99
+end-to-end latency (last write until filed), CPU time and peak RSS, and saves
+the results as JSON so runs can be compared between versions (--compare).
+
+Usage:
+    python benchmarks/bench_throughput.py [--files 500] [--rate 50] [--output run.json]
+    python benchmarks/bench_throughput.py --compare old.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import (  # noqa: E402
+    ExportWatchdogHandler,
+    MetricsRegistry,
+    MoveJournal,
+    create_observer,
+)
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+class SampleRegistry(MetricsRegistry):
+    """MetricsRegistry that also keeps every raw histogram sample."""
+
+    def __init__(self):
+        super().__init__()
+        self.samples: Dict[str, List[float]] = {}
+        self._samples_lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        with self._samples_lock:
+            self.samples.setdefault(name, []).append(value)
+        super().observe(name, value, **labels)
+
+    def total(self, name: str, **labels: str) -> float:
+        """Sum a counter over every series whose labels include the given ones."""
+        wanted = set(labels.items())
+        with self._lock:
+            series = self._counters.get(name, {})
+            return sum(v for k, v in series.items() if wanted <= set(k))
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as 512, 64K or 4M into bytes."""
+    text = text.strip().upper()
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def rule_filenames(handler: ExportWatchdogHandler) -> List[Tuple[str, Path, Callable[[int], str]]]:
+    """
+    Build one filename generator per rule.
+
+    Args:
+        handler: Handler providing the rule dictionaries and folders
+
+    Returns:
+        List of (rule name, source folder, fn(index) -> filename)
+    """
+    generators = []
+    for key, cfg in handler.legacy_rules.items():
+        fmt = cfg['format']
+        if cfg.get('remove_trailing_numbers'):
+            # Browser-style re-downloads: "name (3).csv"
+            make = (lambda k, f: lambda i: f"{k} ({i}).{f}")(key, fmt)
+        else:
+            make = (lambda k, f: lambda i: f"{k}_{i:06d}.{f}")(key, fmt)
+        generators.append((key, cfg.get('src') or handler.down_local, make))
+    for key, cfg in handler.new_rules.items():
+        # The first keyword is the one the rule is named after; the generic
+        # Response_Time rule needs a name no CAD/RMS keyword also matches.
+        keyword = cfg['keywords'][0] if key != 'Response_Time_Generic' else 'Response_Time_Summary'
+        fmt = cfg['format']
+        if cfg['year_strategy'] == 'end_range':
+            make = (lambda w, f: lambda i: f"2024_{i % 12 + 1:02d}_to_2025_{i % 12 + 1:02d}_{w}_{i:06d}.{f}")(keyword, fmt)
+        else:
+            make = (lambda w, f: lambda i: f"2025_{i % 12 + 1:02d}_{w}_{i:06d}.{f}")(keyword, fmt)
+        generators.append((key, handler.down_local, make))
+    return generators
+
+
+def write_file(path: Path, size: int, chunk: bytes) -> None:
+    """Write size bytes to path in chunks, the way a download lands."""
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            n = min(remaining, len(chunk))
+            f.write(chunk[:n])
+            remaining -= n
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, where the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_revision() -> Optional[str]:
+    """Current commit of the repository, if git is available."""
+    try:
+        out = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+            capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """
+    Run one benchmark and return the results.
+
+    Args:
+        args: Parsed command-line arguments
+
+    Returns:
+        Results dictionary (also written as JSON)
+    """
+    logger = logging.getLogger('bench_throughput')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    rng = random.Random(args.seed)
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+    chunk = os.urandom(min(max(sizes), 1024 * 1024)) if max(sizes) > 0 else b''
+
+    with tempfile.TemporaryDirectory(prefix='bench_throughput_') as tmp, \
+            tempfile.TemporaryDirectory(prefix='bench_exports_', dir=args.exports) as exports_tmp:
+        home = Path(tmp)
+        exports = Path(exports_tmp)
+        metrics = SampleRegistry()
+        journal = MoveJournal(home / 'state' / 'journal.db', logger) if args.journal else None
+
+        handler = ExportWatchdogHandler(
+            exports, logger,
+            max_workers=args.workers,
+            home=home,
+            quiet_period=args.quiet_period,
+            verify=args.verify,
+            journal=journal,
+            metrics=metrics,
+        )
+
+        # Simulated Excel locks: the probe reports the file locked until its release time
+        locked_until: Dict[str, float] = {}
+        real_probe = handler.file_mover.is_file_locked
+
+        def probe(file_path: Path) -> bool:
+            release = locked_until.get(file_path.name)
+            if release is not None and time.monotonic() < release:
+                return True
+            return real_probe(file_path)
+
+        handler.file_mover.is_file_locked = probe
+
+        observer = create_observer(args.backend, logger)
+        for monitor_path in handler.monitor_paths:
+            observer.schedule(handler, str(monitor_path), recursive=False)
+        observer.start()
+
+        generators = rule_filenames(handler)
+        plan = []
+        for i in range(args.files):
+            rule, folder, make = generators[i % len(generators)]
+            plan.append((rule, folder / make(i), rng.choice(sizes)))
+        rng.shuffle(plan)
+        locked = set(rng.sample(range(args.files), int(args.files * args.locked)))
+        duplicated = set(rng.sample(range(args.files), int(args.files * args.duplicates)))
+
+        written: List[Path] = []
+        bytes_written = 0
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        next_at = start
+        for i, (rule, path, size) in enumerate(plan):
+            in_burst = args.burst_every and (i % args.burst_every) < args.burst_size
+            if not in_burst:
+                next_at += 1.0 / args.rate
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if i in locked:
+                locked_until[path.name] = time.monotonic() + args.lock_seconds
+            write_file(path, size, chunk)
+            written.append(path)
+            bytes_written += size
+            if i in duplicated:
+                # Same name downloaded again once the first copy has had time to land
+                timer = threading.Timer(
+                    args.quiet_period * 3, write_file, args=(path, size, chunk)
+                )
+                timer.daemon = True
+                timer.start()
+                bytes_written += size
+        generated_s = time.perf_counter() - start
+
+        # Drain: every file filed and every queue empty
+        deadline = time.perf_counter() + args.timeout
+        drained = False
+        while time.perf_counter() < deadline:
+            idle = (handler.dispatcher.queue_depth == 0
+                    and handler.retry_scheduler.pending_count == 0
+                    and handler.readiness.pending_count == 0)
+            if idle and not any(p.exists() for p in written):
+                # Give trailing duplicate timers a chance to fire
+                time.sleep(args.quiet_period * 4)
+                if not any(p.exists() for p in written) and handler.dispatcher.queue_depth == 0:
+                    drained = True
+                    break
+            time.sleep(0.05)
+        elapsed_s = time.perf_counter() - start
+        cpu_s = time.process_time() - cpu_start
+
+        observer.stop()
+        observer.join()
+        handler.shutdown()
+        if journal:
+            journal.close()
+
+        moved = metrics.total('watchdog_moves_total', outcome='moved')
+        e2e = metrics.samples.get('watchdog_write_to_filed_seconds', [])
+        detect_to_filed = metrics.samples.get('watchdog_total_seconds', [])
+        move = metrics.samples.get('watchdog_move_seconds', [])
+
+        def ms(v: Optional[float]) -> Optional[float]:
+            return None if v is None else round(v * 1000, 3)
+
+        return {
+            'benchmark': 'bench_throughput',
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': f"{type(observer).__module__}.{type(observer).__name__}",
+            'parameters': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+            'drained': drained,
+            'files_written': len(written),
+            'bytes_written': bytes_written,
+            'files_moved': int(moved),
+            'locked_attempts': int(metrics.total('watchdog_locked_total')),
+            'retries': int(metrics.total('watchdog_retries_total')),
+            'failures': int(metrics.total('watchdog_failures_total')),
+            'coalesced_events': handler.coalesced_events,
+            'generate_seconds': round(generated_s, 3),
+            'elapsed_seconds': round(elapsed_s, 3),
+            'throughput_files_per_s': round(moved / elapsed_s, 2) if elapsed_s else None,
+            'throughput_mb_per_s': round(bytes_written / elapsed_s / (1024 * 1024), 2) if elapsed_s else None,
+            'latency_ms': {
+                'e2e_p50': ms(percentile(e2e, 50)),
+                'e2e_p99': ms(percentile(e2e, 99)),
+                'e2e_max': ms(max(e2e) if e2e else None),
+                'detect_to_filed_p50': ms(percentile(detect_to_filed, 50)),
+                'detect_to_filed_p99': ms(percentile(detect_to_filed, 99)),
+                'move_p50': ms(percentile(move, 50)),
+                'move_p99': ms(percentile(move, 99)),
+            },
+            'cpu_seconds': round(cpu_s, 3),
+            'cpu_percent': round(cpu_s / elapsed_s * 100, 1) if elapsed_s else None,
+            'peak_rss_mb': round(peak_rss_mb(), 1) if resource else None,
+            'move_paths': {
+                path_type: {'files': t['count'], 'bytes': t['bytes'], 'seconds': round(t['seconds'], 4)}
+                for path_type, t in handler.file_mover.stats.items()
+            },
+        }
+
+
+def print_results(results: Dict) -> None:
+    """Print a short summary of one run."""
+    lat = results['latency_ms']
+    print(f"backend {results['backend']}, {results['files_written']} files "
+          f"({results['bytes_written'] / (1024 * 1024):.1f} MB), drained: {results['drained']}")
+    print(f"  moved {results['files_moved']} in {results['elapsed_seconds']:.2f}s  "
+          f"-> {results['throughput_files_per_s']} files/s, {results['throughput_mb_per_s']} MB/s")
+    print(f"  e2e latency p50 {lat['e2e_p50']} ms, p99 {lat['e2e_p99']} ms "
+          f"(detect->filed p50 {lat['detect_to_filed_p50']} ms, p99 {lat['detect_to_filed_p99']} ms)")
+    print(f"  locked attempts {results['locked_attempts']}, retries {results['retries']}, "
+          f"failures {results['failures']}, coalesced events {results['coalesced_events']}")
+    print(f"  CPU {results['cpu_seconds']:.2f}s ({results['cpu_percent']}%), "
+          f"peak RSS {results['peak_rss_mb']} MB")
+
+
+def compare(results: Dict, baseline: Dict) -> None:
+    """Print the change of the headline numbers against an earlier run."""
+    rows = [
+        ('throughput files/s', results['throughput_files_per_s'], baseline.get('throughput_files_per_s')),
+        ('e2e p50 ms', results['latency_ms']['e2e_p50'], baseline.get('latency_ms', {}).get('e2e_p50')),
+        ('e2e p99 ms', results['latency_ms']['e2e_p99'], baseline.get('latency_ms', {}).get('e2e_p99')),
+        ('cpu seconds', results['cpu_seconds'], baseline.get('cpu_seconds')),
+        ('peak RSS MB', results['peak_rss_mb'], baseline.get('peak_rss_mb')),
+    ]
+    print(f"compared with {baseline.get('git_revision')} ({baseline.get('timestamp')}):")
+    for label, new, old in rows:
+        if new is None or not old:
+            print(f"  {label:<20} {new!s:>10} (baseline {old})")
+            continue
+        print(f"  {label:<20} {new:>10} vs {old:>10}  ({(new - old) / old * 100:+.1f}%)")
+
+
+def main() -> None:
+    """Run the benchmark, print a summary and save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=50.0, help="files per second between bursts")
+    parser.add_argument('--burst-size', type=int, default=20)
+    parser.add_argument('--burst-every', type=int, default=100, help="files between bursts (0: none)")
+    parser.add_argument('--sizes', default='4K,64K,1M', help="comma-separated file sizes, picked at random")
+    parser.add_argument('--locked', type=float, default=0.02, help="fraction of files held locked")
+    parser.add_argument('--lock-seconds', type=float, default=3.0)
+    parser.add_argument('--duplicates', type=float, default=0.05, help="fraction of files downloaded twice")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--quiet-period', type=float, default=0.5)
+    parser.add_argument('--verify', choices=['none', 'size', 'checksum'], default='size')
+    parser.add_argument('--backend', choices=['auto', 'inotify', 'watchdog'], default='auto')
+    parser.add_argument('--exports', default=None,
+                        help="put the destination tree here (e.g. another volume) instead of the temp folder")
+    parser.add_argument('--journal', action='store_true', help="run with a move journal")
+    parser.add_argument('--timeout', type=float, default=300.0, help="seconds to wait for the queues to drain")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', type=Path, default=None, help="write the results JSON here")
+    parser.add_argument('--compare', type=Path, default=None, help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text(encoding='utf-8')))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+        print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
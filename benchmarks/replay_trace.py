@@ -0,0 +1,329 @@
+"""
+Replay a recorded event trace against a sandbox.
+
+Reads a trace written by the service with --record-events and feeds its
+events to an ExportWatchdogHandler whose monitored folders and exports tree
+live in a temporary folder (Path.home() is never touched). Before each event
+is dispatched, its effect is applied to the sandbox: files are created,
+grown to the recorded size (sparse), renamed or deleted, so readiness
+checks, locks and moves see what the real service saw. Deletions caused by
+the recorded service filing a file are not applied; the replayed handler
+files it instead.
+
+Events are replayed at their recorded pace scaled by --speed (1: real
+time, 10: ten times faster), or as fast as possible with --speed 0. The run
+reports the cost of each dispatch (filter, debounce and classification on
+the event thread), how many events were coalesced, filtered or pruned, the
+moves made and their latency, and saves the results as JSON so that
+classifier, debounce and mover changes can be compared on the same
+workload (--compare).
+
+Usage:
+    python benchmarks/replay_trace.py events.jsonl.gz [--speed 0] [--output run.json]
+    python benchmarks/replay_trace.py events.jsonl.gz --speed 1 --compare old.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import watchdog.events as watchdog_events
+from watchdog.events import (
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirModifiedEvent,
+    DirMovedEvent,
+    FileClosedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_throughput import SampleRegistry, git_revision, peak_rss_mb, percentile  # noqa: E402
+from watchdog_service import DEFAULT_RULES_FILE, ExportWatchdogHandler, TraceEvent, read_trace  # noqa: E402
+
+# (file event class, folder event class) per recorded event type
+EVENT_TYPES = {
+    'created': (FileCreatedEvent, DirCreatedEvent),
+    'modified': (FileModifiedEvent, DirModifiedEvent),
+    'moved': (FileMovedEvent, DirMovedEvent),
+    'deleted': (FileDeletedEvent, DirDeletedEvent),
+    'closed': (FileClosedEvent, None),
+}
+# Newer watchdog versions also report opens and read-only closes
+for kind, class_name in (('opened', 'FileOpenedEvent'), ('closed_no_write', 'FileClosedNoWriteEvent')):
+    if hasattr(watchdog_events, class_name):
+        EVENT_TYPES[kind] = (getattr(watchdog_events, class_name), None)
+
+
+class Sandbox:
+    """Maps trace paths onto the handler's monitored folders and applies event effects."""
+
+    def __init__(self, folders: Dict[str, Path]):
+        """
+        Initialize the Sandbox.
+
+        Args:
+            folders: Sandbox folder for each monitored folder name in the trace
+        """
+        self.folders = folders
+        self.errors = 0
+
+    def resolve(self, path: str) -> Optional[Path]:
+        """Sandbox path of a trace path, or None if it is outside the monitored folders."""
+        name, _, rest = path.partition('/')
+        folder = self.folders.get(name)
+        if folder is None:
+            return None
+        return folder / rest if rest else folder
+
+    @staticmethod
+    def _set_size(path: Path, size: Optional[int]) -> None:
+        """Create a file, or grow/shrink it to the recorded size without writing data."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'ab') as f:
+            if size is not None:
+                f.truncate(size)
+
+    def apply(self, event: TraceEvent, src: Path, dest: Optional[Path]) -> None:
+        """
+        Make the sandbox look as it did when the event was recorded.
+
+        Reads change nothing, files that were already gone when their event
+        was recorded are not brought back, and files the recorded service
+        moved away are left for the replayed handler to move.
+
+        Args:
+            event: Recorded event
+            src: Sandbox path of its path
+            dest: Sandbox path of its destination (moves only)
+        """
+        if event.kind in ('opened', 'closed_no_write') or event.own:
+            return
+        if not event.is_directory and event.kind != 'deleted' and event.size is None:
+            return
+        try:
+            if event.kind == 'moved' and dest is not None:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                if src.exists():
+                    os.replace(src, dest)
+                elif event.is_directory:
+                    dest.mkdir(parents=True, exist_ok=True)
+                if not event.is_directory:
+                    self._set_size(dest, event.size)
+            elif event.kind == 'deleted':
+                if event.is_directory:
+                    shutil.rmtree(src, ignore_errors=True)
+                elif src.exists():
+                    src.unlink()
+            elif event.is_directory:
+                src.mkdir(parents=True, exist_ok=True)
+            else:
+                self._set_size(src, event.size)
+        except OSError:
+            # The handler may be moving the same file right now, as it would have in production
+            self.errors += 1
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """
+    Replay the trace once and return the results.
+
+    Args:
+        args: Parsed command-line arguments
+
+    Returns:
+        Results dictionary (also written as JSON)
+    """
+    logger = logging.getLogger('replay_trace')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    events = [e for e in read_trace(args.trace) if args.profile is None or e.profile == args.profile]
+
+    with tempfile.TemporaryDirectory(prefix='replay_trace_') as tmp:
+        home = Path(tmp)
+        metrics = SampleRegistry()
+        handler = ExportWatchdogHandler(
+            home / 'exports', logger,
+            max_workers=args.workers,
+            home=home,
+            quiet_period=args.quiet_period,
+            verify=args.verify,
+            metrics=metrics,
+            rules_file=args.rules,
+            rules_poll_interval=None,
+        )
+        sandbox = Sandbox(handler.rule_folders)
+
+        dispatch_us: List[float] = []
+        skipped = 0
+        lag = 0.0
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        for event in events:
+            classes = EVENT_TYPES.get(event.kind)
+            src = sandbox.resolve(event.path)
+            dest = sandbox.resolve(event.dest) if event.dest else None
+            if classes is None or src is None or (event.kind == 'moved' and dest is None):
+                skipped += 1
+                continue
+            event_class = classes[1] if event.is_directory else classes[0]
+            if event_class is None:
+                skipped += 1
+                continue
+            if args.speed > 0:
+                delay = start + event.t / args.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    lag = max(lag, -delay)
+
+            sandbox.apply(event, src, dest)
+            fs_event = event_class(str(src), str(dest)) if event.kind == 'moved' else event_class(str(src))
+            began = time.perf_counter()
+            handler.dispatch(fs_event)
+            dispatch_us.append((time.perf_counter() - began) * 1e6)
+        replay_s = time.perf_counter() - start
+
+        # Drain: nothing waiting to settle, retry or move
+        deadline = time.perf_counter() + args.timeout
+        drained = False
+        while time.perf_counter() < deadline:
+            if (handler.dispatcher.queue_depth == 0 and handler.retry_scheduler.pending_count == 0
+                    and handler.readiness.pending_count == 0):
+                drained = True
+                break
+            time.sleep(0.05)
+        elapsed_s = time.perf_counter() - start
+        cpu_s = time.process_time() - cpu_start
+        handler.shutdown()
+
+        def ms(v: Optional[float]) -> Optional[float]:
+            return None if v is None else round(v * 1000, 3)
+
+        detect = metrics.samples.get('watchdog_detect_seconds', [])
+        total = metrics.samples.get('watchdog_total_seconds', [])
+        dispatched = len(dispatch_us)
+        return {
+            'benchmark': 'replay_trace',
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'trace': args.trace.name,
+            'parameters': {k: str(v) if isinstance(v, Path) else v
+                           for k, v in vars(args).items() if k not in ('output', 'compare')},
+            'drained': drained,
+            'events': len(events),
+            'events_dispatched': dispatched,
+            'events_skipped': skipped,
+            'sandbox_errors': sandbox.errors,
+            'trace_seconds': round(events[-1].t, 3) if events else 0.0,
+            'replay_seconds': round(replay_s, 3),
+            'elapsed_seconds': round(elapsed_s, 3),
+            'max_lag_ms': round(lag * 1000, 3),
+            'dispatch_us': {
+                'mean': round(statistics.fmean(dispatch_us), 2) if dispatch_us else None,
+                'p50': round(percentile(dispatch_us, 50), 2) if dispatch_us else None,
+                'p99': round(percentile(dispatch_us, 99), 2) if dispatch_us else None,
+                'max': round(max(dispatch_us), 2) if dispatch_us else None,
+            },
+            'dispatch_events_per_s': round(dispatched / (sum(dispatch_us) / 1e6), 1) if dispatch_us else None,
+            'coalesced_events': handler.coalesced_events,
+            'filtered_events': handler.filtered_events,
+            'pruned_events': handler.pruned_events,
+            'completed_downloads': handler.completed_downloads,
+            'files_moved': int(metrics.total('watchdog_moves_total', outcome='moved')),
+            'failures': int(metrics.total('watchdog_failures_total')),
+            'latency_ms': {
+                'detect_p50': ms(percentile(detect, 50)),
+                'detect_p99': ms(percentile(detect, 99)),
+                'detect_to_filed_p50': ms(percentile(total, 50)),
+                'detect_to_filed_p99': ms(percentile(total, 99)),
+            },
+            'cpu_seconds': round(cpu_s, 3),
+            'peak_rss_mb': round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None,
+        }
+
+
+def print_results(results: Dict) -> None:
+    """Print a short summary of one replay."""
+    d = results['dispatch_us']
+    lat = results['latency_ms']
+    print(f"{results['trace']}: {results['events_dispatched']} of {results['events']} events replayed "
+          f"in {results['replay_seconds']:.2f}s (recorded over {results['trace_seconds']:.2f}s), "
+          f"drained: {results['drained']}")
+    print(f"  dispatch mean {d['mean']} us, p50 {d['p50']} us, p99 {d['p99']} us "
+          f"-> {results['dispatch_events_per_s']} events/s; max lag {results['max_lag_ms']} ms")
+    print(f"  coalesced {results['coalesced_events']}, filtered {results['filtered_events']}, "
+          f"pruned {results['pruned_events']}, completed downloads {results['completed_downloads']}")
+    print(f"  moved {results['files_moved']} (failures {results['failures']}), "
+          f"detect->filed p50 {lat['detect_to_filed_p50']} ms, p99 {lat['detect_to_filed_p99']} ms")
+    print(f"  CPU {results['cpu_seconds']:.2f}s, peak RSS {results['peak_rss_mb']} MB, "
+          f"sandbox errors {results['sandbox_errors']}, skipped {results['events_skipped']}")
+
+
+def compare(results: Dict, baseline: Dict) -> None:
+    """Print the change of the headline numbers against an earlier replay."""
+    rows = [
+        ('dispatch p50 us', results['dispatch_us']['p50'], baseline.get('dispatch_us', {}).get('p50')),
+        ('dispatch p99 us', results['dispatch_us']['p99'], baseline.get('dispatch_us', {}).get('p99')),
+        ('dispatch events/s', results['dispatch_events_per_s'], baseline.get('dispatch_events_per_s')),
+        ('coalesced events', results['coalesced_events'], baseline.get('coalesced_events')),
+        ('files moved', results['files_moved'], baseline.get('files_moved')),
+        ('filed p99 ms', results['latency_ms']['detect_to_filed_p99'],
+         baseline.get('latency_ms', {}).get('detect_to_filed_p99')),
+        ('cpu seconds', results['cpu_seconds'], baseline.get('cpu_seconds')),
+    ]
+    if baseline.get('trace') != results['trace']:
+        print(f"warning: baseline replayed {baseline.get('trace')}, not {results['trace']}")
+    print(f"compared with {baseline.get('git_revision')} ({baseline.get('timestamp')}):")
+    for label, new, old in rows:
+        if new is None or not old:
+            print(f"  {label:<20} {new!s:>10} (baseline {old})")
+            continue
+        print(f"  {label:<20} {new:>10} vs {old:>10}  ({(new - old) / old * 100:+.1f}%)")
+
+
+def main() -> None:
+    """Replay the trace, print a summary and save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('trace', type=Path, help="trace written with --record-events")
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help="replay speed relative to the recording (0: as fast as possible)")
+    parser.add_argument('--profile', default=None, help="only replay events of this profile")
+    parser.add_argument('--rules', type=Path, default=DEFAULT_RULES_FILE, help="rule file to classify with")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--quiet-period', type=float, default=0.5)
+    parser.add_argument('--verify', choices=['none', 'size', 'checksum'], default='size')
+    parser.add_argument('--timeout', type=float, default=300.0, help="seconds to wait for the queues to drain")
+    parser.add_argument('--output', type=Path, default=None, help="write the results JSON here")
+    parser.add_argument('--compare', type=Path, default=None, help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text(encoding='utf-8')))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+        print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Export Catalog Lookups
+
+Answers "the latest Monthly_CAD for 2025" or "all Rolling13_RMS files" from
+the catalog the watchdog service keeps of the exports tree, instead of
+walking the OneDrive folders.
+
+Usage:
+    python export_catalog.py latest Monthly_CAD --year 2025
+    python export_catalog.py list --rule Rolling13_RMS [--json]
+    python export_catalog.py stats
+    python export_catalog.py build
+    python export_catalog.py archived --rule Monthly_CAD --month 2023-04
+    python export_catalog.py restore PATH [--to FILE]
+
+From Python:
+    from export_catalog import open_catalog
+    entry = open_catalog().latest('Monthly_CAD', year='2025')
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from watchdog_service import (
+    DEFAULT_ARCHIVE_INDEX,
+    DEFAULT_CATALOG_FILE,
+    DEFAULT_RULES_FILE,
+    ArchivedEntry,
+    CatalogEntry,
+    ExportArchiver,
+    ExportCatalog,
+    RuleSet,
+    default_exports_dir,
+)
+
+
+def _logger() -> logging.Logger:
+    """Console logger for the lookup tools."""
+    logger = logging.getLogger('ExportCatalog')
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+    return logger
+
+
+def open_catalog(db_path: Optional[Path] = None) -> ExportCatalog:
+    """
+    Open the service's export catalog for lookups.
+
+    Args:
+        db_path: Catalog database (defaults to state/export_catalog.db next
+            to watchdog_service.py)
+
+    Returns:
+        ExportCatalog
+    """
+    return ExportCatalog(db_path or DEFAULT_CATALOG_FILE, _logger())
+
+
+def open_archive(db_path: Optional[Path] = None) -> ExportArchiver:
+    """
+    Open the index of archived exports for lookups and restores.
+
+    Args:
+        db_path: Archive index (defaults to state/export_archive.db next to
+            watchdog_service.py)
+
+    Returns:
+        ExportArchiver (its archiving thread is not started)
+    """
+    return ExportArchiver(db_path or DEFAULT_ARCHIVE_INDEX, _logger())
+
+
+def rebuild(catalog: ExportCatalog, base_exports: Path, rules_file: Path) -> int:
+    """
+    Scan the exports tree into the catalog again.
+
+    Files filed outside the service are added and entries for removed files
+    are dropped.
+
+    Args:
+        catalog: Catalog to rebuild
+        base_exports: Root of the exports tree
+        rules_file: Rule file used to tell which rule filed each folder
+
+    Returns:
+        Number of files found
+    """
+    home = Path.home()
+    onedrive_base = home / "OneDrive - City of Hackensack"
+    folders = {
+        'desktop': onedrive_base / "Desktop",
+        'onedrive_downloads': onedrive_base / "Downloads",
+        'downloads': home / "Downloads",
+    }
+    rules = RuleSet.load(rules_file, base_exports, folders)
+    return catalog.build(base_exports, rules.catalog_dirs(base_exports))
+
+
+def format_entry(entry: CatalogEntry) -> str:
+    """Render a catalog entry as one line of text."""
+    modified = datetime.fromtimestamp(entry.mtime).strftime('%Y-%m-%d %H:%M')
+    return f"{modified}  {entry.size:>12,}  {entry.rule or '-':<24} {entry.year or '-':<5} {entry.path}"
+
+
+def format_archived(entry: ArchivedEntry) -> str:
+    """Render an archived file as one line of text."""
+    return f"{entry.month}  {entry.size:>12,}  {entry.rule or '-':<24} {entry.path}  [{entry.archive}]"
+
+
+def print_entries(entries: List[CatalogEntry], as_json: bool) -> None:
+    """Print entries as text lines or as a JSON array."""
+    if as_json:
+        print(json.dumps([entry._asdict() for entry in entries], indent=2))
+    else:
+        for entry in entries:
+            print(format_entry(entry))
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line options.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Look up filed exports in the watchdog's catalog")
+    parser.add_argument(
+        '--db', type=Path, default=None,
+        help="Catalog database (default: state/export_catalog.db next to watchdog_service.py)"
+    )
+    parser.add_argument(
+        '--archive-db', type=Path, default=None,
+        help="Archive index (default: state/export_archive.db next to watchdog_service.py)"
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    latest = commands.add_parser('latest', help="Most recent file of a rule")
+    latest.add_argument('rule', help="Rule name, e.g. Monthly_CAD")
+    latest.add_argument('--year', default=None, help="Only files filed under this year")
+    latest.add_argument('--under', type=Path, default=None, help="Only files below this folder")
+    latest.add_argument('--json', action='store_true', help="Print JSON")
+
+    listing = commands.add_parser('list', help="Files matching filters, newest first")
+    listing.add_argument('--rule', default=None, help="Rule name")
+    listing.add_argument('--year', default=None, help="Year subfolder")
+    listing.add_argument('--name', default=None, help="Filename pattern with * and ? wildcards")
+    listing.add_argument('--limit', type=int, default=None, help="Maximum number of files")
+    listing.add_argument('--under', type=Path, default=None, help="Only files below this folder")
+    listing.add_argument('--json', action='store_true', help="Print JSON")
+
+    commands.add_parser('stats', help="Files and bytes per rule and year")
+
+    build = commands.add_parser('build', help="Rebuild the catalog from the exports tree")
+    build.add_argument(
+        '--exports', type=Path, default=None,
+        help="Exports folder (default: 05_EXPORTS in the user's OneDrive)"
+    )
+    build.add_argument(
+        '--rules', type=Path, default=None,
+        help="JSON or TOML rule file (default: export_rules.json next to watchdog_service.py)"
+    )
+
+    archived = commands.add_parser('archived', help="Files moved into month archives")
+    archived.add_argument('--rule', default=None, help="Rule name")
+    archived.add_argument('--month', default=None, help="Month the file was last modified, YYYY-MM")
+
+    restore = commands.add_parser('restore', help="Extract one archived file")
+    restore.add_argument('path', type=Path, help="Path the file had before it was archived")
+    restore.add_argument('--to', type=Path, default=None, help="Write here instead of the original path")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Main entry point; returns the process exit code."""
+    args = parse_args()
+    if args.command in ('archived', 'restore'):
+        return archive_command(args)
+    catalog = open_catalog(args.db)
+    try:
+        if args.command == 'latest':
+            entry = catalog.latest(args.rule, year=args.year, under=args.under)
+            if entry is None:
+                print(f"No {args.rule} file in the catalog", file=sys.stderr)
+                return 1
+            print_entries([entry], args.json)
+        elif args.command == 'list':
+            print_entries(catalog.find(args.rule, args.year, args.name, args.limit, under=args.under), args.json)
+        elif args.command == 'stats':
+            for rule, year, files, size in catalog.summary():
+                print(f"{rule or '(unknown)':<28} {year or '-':<5} {files:>7} file(s) {size:>15,} bytes")
+        elif args.command == 'build':
+            rebuild(catalog, args.exports or default_exports_dir(), args.rules or DEFAULT_RULES_FILE)
+        return 0
+    finally:
+        catalog.close()
+
+
+def archive_command(args: argparse.Namespace) -> int:
+    """Run the archived/restore subcommands; returns the exit code."""
+    archiver = open_archive(args.archive_db)
+    try:
+        if args.command == 'archived':
+            for entry in archiver.find(args.rule, args.month):
+                print(format_archived(entry))
+        else:
+            try:
+                print(archiver.restore(args.path, args.to))
+            except KeyError:
+                print(f"{args.path} is not in the archive index", file=sys.stderr)
+                return 1
+        return 0
+    finally:
+        archiver.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Tests for ExportArchiver month archives and their index."""
+
+import logging
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import ExportArchiver  # noqa: E402
+
+logger = logging.getLogger('test_archiver')
+
+OLD = time.time() - 400 * 86400
+
+
+@pytest.fixture
+def archiver(tmp_path):
+    archiver = ExportArchiver(tmp_path / 'state' / 'archive.db', logger, compression='deflate',
+                              bytes_per_second=1e9, cpu_share=1.0)
+    yield archiver
+    archiver.close()
+
+
+def make_export(folder: Path, name: str, content: bytes) -> Path:
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_bytes(content)
+    os.utime(path, (OLD, OLD))
+    return path
+
+
+def archive_month(archiver: ExportArchiver, archive: Path, *paths: Path) -> int:
+    return archiver._archive_month(archive, '2025-01', 'report', [(p, os.stat(p)) for p in paths], None)
+
+
+def test_resumes_a_pass_interrupted_after_the_zip_was_written(tmp_path, archiver):
+    exports = tmp_path / 'exports' / 'Reports'
+    first = make_export(exports, 'a.csv', b'a,b\n1,2\n')
+    second = make_export(exports, 'b.csv', b'a,b\n3,4\n')
+    archive = tmp_path / 'exports' / '_Archive' / 'Reports' / '2025-01.zip'
+    archive.parent.mkdir(parents=True)
+    # The previous pass stored a.csv but stopped before indexing and removing it
+    with zipfile.ZipFile(archive, 'w') as zf:
+        archiver._write_member(zf, first, os.stat(first), first.name)
+
+    assert archive_month(archiver, archive, first, second) == 2
+
+    with zipfile.ZipFile(archive) as zf:
+        assert sorted(zf.namelist()) == ['a.csv', 'b.csv']
+    assert not first.exists() and not second.exists()
+    assert archiver.lookup(first).member == 'a.csv'
+    assert archiver.restore(first).read_bytes() == b'a,b\n1,2\n'
+
+
+def test_same_name_and_size_with_other_content_is_kept(tmp_path, archiver):
+    exports = tmp_path / 'exports' / 'Reports'
+    archive = tmp_path / 'exports' / '_Archive' / 'Reports' / '2025-01.zip'
+    older = make_export(exports, 'report.csv', b'a,b\n1,2\n')
+    assert archive_month(archiver, archive, older) == 1
+
+    newer = make_export(exports, 'report.csv', b'a,b\n5,6\n')
+    assert archive_month(archiver, archive, newer) == 1
+
+    with zipfile.ZipFile(archive) as zf:
+        assert sorted(zf.namelist()) == ['report.csv', 'report_1.csv']
+        assert zf.read('report.csv') == b'a,b\n1,2\n'
+    entry = archiver.lookup(newer)
+    assert entry.member == 'report_1.csv'
+    assert archiver.restore(newer, tmp_path / 'restored.csv').read_bytes() == b'a,b\n5,6\n'
+
+    # A third pass over the same content finds it instead of storing it again
+    again = make_export(exports, 'report.csv', b'a,b\n5,6\n')
+    assert archive_month(archiver, archive, again) == 1
+    with zipfile.ZipFile(archive) as zf:
+        assert len(zf.namelist()) == 2
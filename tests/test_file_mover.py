@@ -0,0 +1,105 @@
+"""Tests for FileMover cross-volume moves and their journal records."""
+
+import logging
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import FileMover, MoveJournal  # noqa: E402
+
+logger = logging.getLogger('test_file_mover')
+
+
+@pytest.fixture
+def cross_volume_mover(monkeypatch):
+    """FileMover that takes every destination for another volume."""
+    mover = FileMover()
+    monkeypatch.setattr(mover.directories, 'ensure', lambda path: path.mkdir(parents=True, exist_ok=True) or -1)
+    return mover
+
+
+@pytest.fixture
+def locked_unlink(monkeypatch):
+    """Make os.unlink fail for the paths added to the returned set."""
+    locked = set()
+    real_unlink = os.unlink
+
+    def unlink(path, *args, **kwargs):
+        if str(path) in locked:
+            raise PermissionError(13, "The process cannot access the file", str(path))
+        return real_unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, 'unlink', unlink)
+    return locked
+
+
+def test_copy_with_locked_source_is_not_handled(tmp_path, cross_volume_mover, locked_unlink):
+    source = tmp_path / 'downloads' / 'report.xlsx'
+    source.parent.mkdir()
+    source.write_bytes(b'x' * 1000)
+    destination = tmp_path / 'exports' / 'report.xlsx'
+    st = os.stat(source)
+    locked_unlink.add(str(source))
+
+    status = cross_volume_mover.move_file(source, destination, logger, src_stat=st)
+
+    assert status == FileMover.COPIED
+    assert status in FileMover.RETRYABLE
+    assert status not in MoveJournal.HANDLED
+    assert source.exists() and destination.read_bytes() == source.read_bytes()
+    assert cross_volume_mover.copied_to(source, st) == destination
+
+    # The retry only removes the source; it does not copy again
+    copies = []
+    cross_volume_mover._copy_across_devices = lambda *args: copies.append(args)
+    assert cross_volume_mover.finish_copy(source, destination, logger, src_stat=st) == FileMover.COPIED
+    locked_unlink.clear()
+    assert cross_volume_mover.finish_copy(source, destination, logger, src_stat=st) == FileMover.MOVED
+    assert not source.exists() and destination.exists()
+    assert copies == []
+    assert cross_volume_mover.copied_to(source, st) is None
+
+
+def test_finish_copy_rejects_a_changed_destination(tmp_path, cross_volume_mover, locked_unlink):
+    source = tmp_path / 'report.csv'
+    source.write_text('a,b\n1,2\n')
+    destination = tmp_path / 'exports' / 'report.csv'
+    st = os.stat(source)
+    locked_unlink.add(str(source))
+    assert cross_volume_mover.move_file(source, destination, logger, src_stat=st) == FileMover.COPIED
+
+    destination.write_text('a,b\n1,2\n3,4\n')
+    locked_unlink.clear()
+    assert cross_volume_mover.finish_copy(source, destination, logger, src_stat=st) is None
+    assert source.exists()
+
+
+def test_recover_keeps_a_locked_source_unhandled(tmp_path, locked_unlink):
+    source = tmp_path / 'downloads' / 'report.xlsx'
+    source.parent.mkdir()
+    source.write_bytes(b'y' * 500)
+    destination = tmp_path / 'exports' / 'report.xlsx'
+    destination.parent.mkdir()
+    shutil.copy2(source, destination)
+    st = os.stat(source)
+
+    journal = MoveJournal(tmp_path / 'journal.db', logger)
+    try:
+        journal.begin_move(source, st.st_size, st.st_mtime_ns, 'report', destination)
+        locked_unlink.add(str(source))
+        journal.recover()
+
+        assert not journal.is_handled(source, st.st_size, st.st_mtime_ns)
+        assert journal.copied_to(source, st.st_size, st.st_mtime_ns) == destination
+
+        locked_unlink.clear()
+        mover = FileMover()
+        assert mover.finish_copy(source, destination, logger, src_stat=st) == FileMover.MOVED
+        assert not source.exists()
+    finally:
+        journal.close()
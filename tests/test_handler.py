@@ -0,0 +1,33 @@
+"""Tests for ExportWatchdogHandler routing."""
+
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import ExportWatchdogHandler  # noqa: E402
+
+logger = logging.getLogger('test_handler')
+
+
+@pytest.fixture
+def handler(tmp_path):
+    handler = ExportWatchdogHandler(tmp_path / 'exports', logger, home=tmp_path, rules_poll_interval=None)
+    yield handler
+    handler.shutdown()
+
+
+@pytest.mark.parametrize('name, lane', [
+    ('Response_Time_2024_to_2025_RMS.xlsx', '_RMS/response_time'),
+    ('ResponseTime_RMS_2024_to_2025.xlsx', '_RMS/response_time'),
+    ('Response_Time_2024_to_2025_CAD.xlsx', '_CAD/response_time'),
+    ('Response_Time_2024_to_2025.xlsx', '_CAD/response_time'),
+])
+def test_detected_type_files_share_the_lane_of_their_folder(handler, name, lane):
+    path = handler.down_local / name
+    match = handler.matcher.match(name)
+    _, dest_dir = handler._lane_for(match, path)
+    assert dest_dir == handler.base_exports / lane
@@ -0,0 +1,85 @@
+"""Tests for the asynchronous log handler."""
+
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import AsyncLogHandler  # noqa: E402
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((threading.current_thread().name, record.getMessage()))
+
+
+def test_records_are_written_on_the_log_thread_and_flushed_on_stop():
+    target = ListHandler()
+    handler = AsyncLogHandler([target])
+    logger = logging.getLogger('test_logging')
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        handler.start()
+        for i in range(100):
+            logger.warning("record %s", i)
+        handler.stop()
+    finally:
+        logger.removeHandler(handler)
+
+    assert [message for _, message in target.records] == [f"record {i}" for i in range(100)]
+    assert {name for name, _ in target.records} == {"watchdog-log"}
+    handler.stop()  # stopping twice is harmless
+
+
+def test_stop_without_start_closes_the_handlers():
+    target = ListHandler()
+    AsyncLogHandler([target]).stop()
+
+
+def test_stop_with_a_full_queue_flushes_every_record():
+    release = threading.Event()
+
+    class SlowHandler(ListHandler):
+        def emit(self, record):
+            release.wait(5)
+            super().emit(record)
+
+    target = SlowHandler()
+    handler = AsyncLogHandler([target], max_queue=5)
+    logger = logging.getLogger('test_logging.full')
+    logger.propagate = False
+    logger.addHandler(handler)
+    errors = []
+
+    def stop():
+        try:
+            handler.stop()
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        handler.start()
+        logger.warning("first")
+        while not handler.queue.empty():  # the listener is now stuck writing "first"
+            time.sleep(0.01)
+        for i in range(5):
+            logger.warning("queued %s", i)
+        assert handler.queue.full()
+        stopper = threading.Thread(target=stop)
+        stopper.start()
+        time.sleep(0.1)
+        release.set()
+        stopper.join(5)
+    finally:
+        logger.removeHandler(handler)
+
+    assert errors == []
+    assert [message for _, message in target.records] == ["first"] + [f"queued {i}" for i in range(5)]
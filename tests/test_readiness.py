@@ -0,0 +1,56 @@
+"""Tests for ReadinessMonitor write-completion detection."""
+
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import ReadinessMonitor  # noqa: E402
+
+logger = logging.getLogger('test_readiness')
+
+
+def poll_until_ready(monitor: ReadinessMonitor, path: Path, timeout: float = 5.0) -> float:
+    """Drive _poll like the monitor thread does; returns seconds until the file was ready."""
+    monitor.track(path, None)
+    cand = monitor._candidates[path]
+    start = time.monotonic()
+    while True:
+        next_poll = monitor._poll(path, cand)
+        if next_poll is None:
+            assert cand.get('ready')
+            return time.monotonic() - start
+        assert time.monotonic() - start < timeout
+        time.sleep(max(0.0, next_poll - time.monotonic()))
+
+
+def test_old_mtime_is_not_trusted_before_a_full_quiet_period(tmp_path):
+    path = tmp_path / 'copied.xlsx'
+    path.write_bytes(b'x' * 100)
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    monitor = ReadinessMonitor(logger, lambda *args: None, quiet_period=0.5)
+
+    assert poll_until_ready(monitor, path) >= 0.5
+
+
+def test_a_file_that_keeps_growing_is_not_ready(tmp_path):
+    path = tmp_path / 'download.csv'
+    path.write_bytes(b'a,b\n')
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    monitor = ReadinessMonitor(logger, lambda *args: None, quiet_period=0.5)
+    monitor.track(path, None)
+    cand = monitor._candidates[path]
+
+    deadline = time.monotonic() + 1.0
+    while time.monotonic() < deadline:
+        with open(path, 'ab') as f:
+            f.write(b'1,2\n')
+        os.utime(path, (old, old))  # the writer keeps the source's mtime
+        assert monitor._poll(path, cand) is not None
+        assert not cand.get('ready')
+        time.sleep(0.1)
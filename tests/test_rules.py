@@ -0,0 +1,106 @@
+"""Tests for rule file validation and filename classification."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import RuleSet  # noqa: E402
+
+FOLDERS = {name: Path('/home/user') / name for name in RuleSet.FOLDERS}
+
+
+def load(legacy=None, year_based=None) -> RuleSet:
+    data = {'legacy': legacy or {}, 'year_based': year_based or {}}
+    return RuleSet.from_dict(data, Path('/exports'), FOLDERS)
+
+
+def test_extensions_default_from_format():
+    rules = load(
+        legacy={'Arrests': {'dest': 'arrests', 'format': 'xlsx'}},
+        year_based={'Monthly': {'keywords': ['Monthly'], 'target_dir': 'monthly',
+                                'year_strategy': 'start', 'format': 'xlsx'}},
+    )
+    assert rules.legacy_rules['Arrests']['extensions'] == ('.xlsx', '.xls')
+    assert rules.new_rules['Monthly']['extensions'] == ('.xlsx',)
+    assert rules.matcher.match('2025_Arrests.xls').key == 'Arrests'
+    assert rules.matcher.match('2025_Arrests.csv') is None
+
+
+def test_extensions_are_a_rule_setting_not_a_rule_name():
+    rules = load(legacy={
+        'e_ticket': {'dest': 'tickets', 'format': 'xlsx'},
+        'citations': {'dest': 'citations', 'format': 'xlsx', 'extensions': ['xlsx', 'CSV']},
+    })
+    assert rules.matcher.match('e_ticket_export.csv') is None
+    assert rules.matcher.match('citations_export.csv').key == 'citations'
+    assert rules.legacy_rules['citations']['extensions'] == ('.xlsx', '.csv')
+
+
+@pytest.mark.parametrize('extensions', [[], 'csv', ['csv'], ['.csv', 'xlsx']])
+def test_invalid_extensions_are_rejected(extensions):
+    with pytest.raises(ValueError, match="extensions"):
+        load(legacy={'Arrests': {'dest': 'arrests', 'format': 'xlsx', 'extensions': extensions}})
+
+
+def scoped(scopes) -> RuleSet:
+    data = {
+        'legacy': {'A': {'dest': 'a', 'format': 'csv'}, 'B': {'dest': 'b', 'format': 'csv'}},
+        'scopes': scopes,
+    }
+    return RuleSet.from_dict(data, Path('/exports'), FOLDERS)
+
+
+def folder(*parts: str) -> str:
+    return str(FOLDERS['downloads'].joinpath(*parts))
+
+
+def test_deepest_scope_wins():
+    scopes = scoped({
+        'downloads': {'recursive': True, 'rules': ['A']},
+        'downloads/Reports': {'rules': ['B']},
+        'downloads/Reports/2025': {'rules': ['A', 'B']},
+    }).scopes
+
+    assert scopes.lookup(folder()).allows('A') and not scopes.lookup(folder()).allows('B')
+    assert scopes.lookup(folder('Other', 'deep')).allows('A')
+    reports = scopes.lookup(folder('Reports'))
+    assert reports.allows('B') and not reports.allows('A')
+    assert not scopes.lookup(folder('Reports', '2024')).allows('A')  # inherits from Reports
+    for path in (folder('Reports', '2025'), folder('Reports', '2025', 'March')):
+        assert scopes.lookup(path).allows('A') and scopes.lookup(path).allows('B')
+
+
+def test_exclusion_beats_the_enclosing_scope():
+    scopes = scoped({
+        'downloads': {'recursive': True, 'ignore': ['node_*']},
+        'downloads/Private': {'exclude': True},
+        'downloads/Private/Exports': {'recursive': True},
+    }).scopes
+
+    assert scopes.lookup(folder('Private')) is None
+    assert scopes.lookup(folder('Private', 'Photos', '2025')) is None
+    assert not scopes.walks(folder('Private', 'Photos'))
+    # An excluded folder is still walked on the way to a scope below it
+    assert scopes.walks(folder('Private')) and scopes.descends(folder('Private'))
+    assert scopes.lookup(folder('Private', 'Exports', 'CAD')) is not None
+    assert scopes.lookup(folder('Work', 'node_modules')) is None
+    assert scopes.lookup(folder('Work', 'nodes')) is not None
+
+
+def test_sibling_prefixes_do_not_match():
+    scopes = scoped({
+        'downloads': {'rules': ['A']},
+        'downloads/a': {'recursive': True, 'rules': ['B']},
+    }).scopes
+
+    assert scopes.lookup(folder('a', 'b')).allows('B')
+    assert scopes.lookup(folder('ab')) is None  # downloads itself is not recursive
+    assert scopes.lookup(folder('ab', 'c')) is None
+    assert not scopes.walks(folder('ab'))
+    # A folder next to the monitored one is not inside it
+    outside = scopes.lookup(str(FOLDERS['downloads']) + 'X')
+    assert outside is not None and outside.allows('B')
+    assert not scopes.lookup(folder()).allows('B')
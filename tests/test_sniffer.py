@@ -0,0 +1,64 @@
+"""Tests for ContentSniffer column and date profiles."""
+
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import ContentSniffer  # noqa: E402
+
+MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+
+
+def write_workbook(path: Path, rows, shared_strings=None) -> Path:
+    """Write a minimal workbook; cells are ('s', index), ('str', text) or ('n', number)."""
+    xml_rows = []
+    for r, row in enumerate(rows, 1):
+        cells = []
+        for c, (kind, value) in enumerate(row):
+            ref = f"{chr(ord('A') + c)}{r}"
+            if kind == 'str':
+                cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{value}</t></is></c>')
+            elif kind == 's':
+                cells.append(f'<c r="{ref}" t="s"><v>{value}</v></c>')
+            else:
+                cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        xml_rows.append(f'<row r="{r}">{"".join(cells)}</row>')
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('[Content_Types].xml', '<Types/>')
+        zf.writestr('xl/workbook.xml',
+                    f'<workbook xmlns="{MAIN}"><sheets><sheet name="Sheet1"/></sheets></workbook>')
+        zf.writestr('xl/worksheets/sheet1.xml',
+                    f'<worksheet xmlns="{MAIN}"><sheetData>{"".join(xml_rows)}</sheetData></worksheet>')
+        if shared_strings is not None:
+            items = ''.join(f'<si><t>{s}</t></si>' for s in shared_strings)
+            zf.writestr('xl/sharedStrings.xml', f'<sst xmlns="{MAIN}">{items}</sst>')
+    return path
+
+
+def profile(path: Path):
+    return ContentSniffer().profile(path, os.stat(path))
+
+
+def test_shared_strings_are_resolved(tmp_path):
+    path = write_workbook(tmp_path / 'report.xlsx', [
+        [('s', 0), ('s', 1)],
+        [('str', 'Unit 4'), ('s', 2)],
+    ], shared_strings=['Unit', 'Incident Date', '03/05/2024'])
+    found = profile(path)
+    assert found.columns == ('unit', 'incident date')
+    assert found.year_range() == (2024, 2024)
+
+
+def test_shared_string_cells_without_a_table_are_empty(tmp_path):
+    path = write_workbook(tmp_path / 'report.xlsx', [
+        [('s', 0), ('str', 'Date')],
+        [('s', 1), ('n', 45500)],
+    ])
+    found = profile(path)
+    assert found.columns == ('', 'date')
+    assert found.rows == [['', 45500.0]]
+    assert found.year_range() == (2024, 2024)
+    assert found.year_range('missing column') == (2024, 2024)
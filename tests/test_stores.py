@@ -0,0 +1,141 @@
+"""Tests for the SQLite stores: move journal, duplicate index and export catalog."""
+
+import logging
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import DuplicateIndex, ExportCatalog, FileMover, MoveJournal  # noqa: E402
+
+logger = logging.getLogger('test_stores')
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = MoveJournal(tmp_path / 'journal.db', logger)
+    yield journal
+    journal.close()
+
+
+def test_journal_outcomes_survive_a_restart(tmp_path, journal):
+    source = tmp_path / 'a.xlsx'
+    journal.begin_move(source, 10, 1, 'rule', tmp_path / 'dest' / 'a.xlsx')
+    assert not journal.is_handled(source, 10, 1)
+    journal.record(source, 10, 1, 'rule', tmp_path / 'dest' / 'a.xlsx', FileMover.MOVED)
+    journal.record(tmp_path / 'b.xlsx', 10, 1, 'rule', None, FileMover.LOCKED)
+    journal.close()
+
+    reopened = MoveJournal(tmp_path / 'journal.db', logger)
+    try:
+        assert reopened.is_handled(source, 10, 1)
+        assert not reopened.is_handled(source, 11, 1)  # same name, new content
+        assert not reopened.is_handled(tmp_path / 'b.xlsx', 10, 1)
+    finally:
+        reopened.close()
+
+
+def test_journal_recover_rolls_back_an_unfinished_move(tmp_path, journal):
+    source = tmp_path / 'a.xlsx'
+    source.write_bytes(b'data')
+    st = os.stat(source)
+    destination = tmp_path / 'dest' / 'a.xlsx'
+    destination.parent.mkdir()
+    partial = destination.with_name(f".{destination.name}.123.partial")
+    partial.write_bytes(b'da')
+    journal.begin_move(source, st.st_size, st.st_mtime_ns, 'rule', destination)
+
+    journal.recover()
+
+    assert source.exists() and not partial.exists()
+    assert not journal.is_handled(source, st.st_size, st.st_mtime_ns)
+
+
+def test_duplicate_index_forgets_edited_copies(tmp_path):
+    index = DuplicateIndex(tmp_path / 'dupes.db', logger)
+    try:
+        filed = tmp_path / 'exports' / 'a.csv'
+        filed.parent.mkdir()
+        filed.write_text('a,b\n')
+        st = os.stat(filed)
+        index.add(filed, 'digest', st.st_size, st.st_mtime_ns)
+
+        assert index.find(filed.parent, 'digest') == filed
+        assert index.find(tmp_path, 'digest') is None  # scoped to the folder
+
+        filed.write_text('a,b\n1,2\n')
+        assert index.find(filed.parent, 'digest') is None
+        assert len(index) == 0
+    finally:
+        index.close()
+
+
+def test_catalog_build_classifies_and_keeps_recorded_entries(tmp_path):
+    exports = tmp_path / 'exports'
+    for relative in ('_CAD/monthly/2024/a.xlsx', '_CAD/monthly/2025/b.xlsx', '_Overtime/c.xlsx', 'misc/d.txt'):
+        (exports / relative).parent.mkdir(parents=True, exist_ok=True)
+        (exports / relative).write_bytes(b'x')
+    catalog = ExportCatalog(tmp_path / 'catalog.db', logger)
+    try:
+        catalog.record(exports / '_Overtime' / 'c.xlsx', 'OTActivity', None, 'OTActivity (1).xlsx', 1, 0.0)
+        found = catalog.build(exports, {'_CAD/monthly': ('Monthly_CAD', True), '_Overtime': ('OTActivity', False)})
+
+        assert found == 4
+        assert catalog.built(exports)
+        assert [Path(e.path).name for e in catalog.find(rule='Monthly_CAD', year='2025')] == ['b.xlsx']
+        assert catalog.find(rule='OTActivity')[0].original_name == 'OTActivity (1).xlsx'
+        assert catalog.find(name='d.*')[0].rule is None
+
+        (exports / '_CAD/monthly/2025/b.xlsx').unlink()
+        assert Path(catalog.latest('Monthly_CAD').path).name == 'a.xlsx'
+        assert catalog.find(name='b.xlsx') == []
+    finally:
+        catalog.close()
+
+
+def test_journal_recover_keeps_a_new_download_of_a_moved_name(tmp_path, journal):
+    source = tmp_path / 'OTActivity.xlsx'
+    source.write_bytes(b'old export')
+    st = os.stat(source)
+    destination = tmp_path / 'dest' / 'OTActivity.xlsx'
+    destination.parent.mkdir()
+    journal.begin_move(source, st.st_size, st.st_mtime_ns, 'OTActivity', destination)
+    os.replace(source, destination)
+    # The same name is downloaded again before the service restarts
+    source.write_bytes(b'newer export, different size')
+
+    journal.recover()
+
+    assert source.read_bytes() == b'newer export, different size'
+    assert journal.is_handled(source, st.st_size, st.st_mtime_ns)
+    new_st = os.stat(source)
+    assert not journal.is_handled(source, new_st.st_size, new_st.st_mtime_ns)
+
+
+def test_catalog_build_keeps_files_filed_while_it_runs(tmp_path, monkeypatch):
+    exports = tmp_path / 'exports'
+    folder = exports / '_Overtime'
+    folder.mkdir(parents=True)
+    (folder / 'old.xlsx').write_bytes(b'x')
+    catalog = ExportCatalog(tmp_path / 'catalog.db', logger)
+    list_folder = ExportCatalog._list_folder
+
+    def list_then_file(path):
+        listed = list_folder(path)
+        if path == folder:
+            # A live move lands in the folder right after the scan listed it
+            (folder / 'new.xlsx').write_bytes(b'y')
+            catalog.record(folder / 'new.xlsx', 'OTActivity', None, 'OTActivity.xlsx', 1, 0.0)
+        return listed
+
+    monkeypatch.setattr(catalog, '_list_folder', list_then_file)
+    try:
+        catalog.build(exports, {'_Overtime': ('OTActivity', False)}, workers=1)
+        entries = {Path(e.path).name: e for e in catalog.find(rule='OTActivity')}
+        assert set(entries) == {'old.xlsx', 'new.xlsx'}
+        assert entries['new.xlsx'].original_name == 'OTActivity.xlsx'
+    finally:
+        catalog.close()
@@ -0,0 +1,123 @@
+"""Tests for TokenBucket and MoveThrottle rate limits, driven by a fake clock."""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import MoveThrottle, TokenBucket  # noqa: E402
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def released_throttle(base: Path, clock: FakeClock, **limits) -> MoveThrottle:
+    """MoveThrottle that reports its waits without sleeping them off."""
+    throttle = MoveThrottle(base, clock=clock, **limits)
+    throttle.release()
+    return throttle
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_full_burst_is_available_at_once(clock):
+    bucket = TokenBucket(100, burst=300, clock=clock)
+
+    assert bucket.reserve(300) == 0.0
+    assert bucket.reserve(50) == pytest.approx(0.5)
+    assert bucket.waited == pytest.approx(0.5)
+
+
+def test_burst_defaults_to_one_seconds_worth(clock):
+    bucket = TokenBucket(100, clock=clock)
+
+    assert bucket.reserve(100) == 0.0
+    assert bucket.reserve(1) == pytest.approx(0.01)
+
+
+def test_refill_pays_off_debt_and_stops_at_the_burst(clock):
+    bucket = TokenBucket(100, clock=clock)
+    bucket.reserve(150)
+
+    clock.advance(0.25)
+    assert bucket.reserve(0) == pytest.approx(0.25)
+
+    # A long idle stretch refills no more than the burst
+    clock.advance(3600)
+    assert bucket.reserve(150) == pytest.approx(0.5)
+
+
+def test_request_larger_than_the_burst_still_goes_through(clock):
+    bucket = TokenBucket(10, clock=clock)
+    stop = threading.Event()
+    stop.set()
+
+    assert bucket.consume(40, stop) == pytest.approx(3.0)
+    clock.advance(3.0)
+    assert bucket.consume(10, stop) == pytest.approx(1.0)
+
+
+def test_batch_reserves_its_moves_up_front(tmp_path, clock):
+    throttle = released_throttle(tmp_path, clock, ops_per_second=1, batch=3)
+    destination = tmp_path / 'Reports' / 'report.csv'
+
+    waits = [throttle.acquire(destination, 0) for _ in range(6)]
+
+    # The first batch uses the burst; the second waits once, then follows back-to-back
+    assert waits == [0.0, 0.0, 0.0, pytest.approx(3.0), 0.0, 0.0]
+    assert throttle.throttled_moves == 1
+    assert throttle.waited == pytest.approx(3.0)
+
+    clock.advance(6.0)
+    assert throttle.acquire(destination, 0) == 0.0
+
+
+def test_byte_limit_throttles_by_size(tmp_path, clock):
+    throttle = released_throttle(tmp_path, clock, bytes_per_second=1000)
+    destination = tmp_path / 'Reports' / 'report.csv'
+
+    assert throttle.acquire(destination, 1000) == 0.0
+    assert throttle.acquire(destination, 500) == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert throttle.acquire(destination, 0) == 0.0
+
+
+def test_roots_are_throttled_separately(tmp_path, clock):
+    throttle = released_throttle(tmp_path, clock, root_ops_per_second=1)
+
+    assert throttle.acquire(tmp_path / '_CAD' / 'part.step', 0) == 0.0
+    assert throttle.acquire(tmp_path / '_CAD' / 'sub' / 'part2.step', 0) == pytest.approx(1.0)
+    # A busy root does not hold up another one
+    assert throttle.acquire(tmp_path / 'Reports' / 'report.csv', 0) == 0.0
+    assert throttle.throttled_moves == 1
+
+
+def test_root_of_uses_base_labels(tmp_path):
+    throttle = MoveThrottle(tmp_path / 'exports')
+    throttle.add_base(tmp_path / 'team', 'team')
+
+    assert throttle.root_of(tmp_path / 'exports' / '_CAD' / 'a' / 'part.step') == '_CAD'
+    assert throttle.root_of(tmp_path / 'exports' / 'loose.txt') == ''
+    assert throttle.root_of(tmp_path / 'team' / 'Reports' / 'report.csv') == 'team/Reports'
+    assert throttle.root_of(tmp_path / 'elsewhere' / 'file.txt') == str(tmp_path / 'elsewhere')
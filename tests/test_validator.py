@@ -0,0 +1,37 @@
+"""Tests for ExportValidator CSV checks."""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchdog_service import ExportValidator  # noqa: E402
+
+HEADER = 'id,date,officer,narrative\n'
+ROWS = ''.join(f'{i},2025-01-{i % 28 + 1:02d},Officer {i},"Short note {i}"\n' for i in range(3000))
+LONG_NOTE = '"' + ''.join(f'Line {i} of a long narrative, with commas\n' for i in range(3000)) + '"'
+
+
+def check(tmp_path: Path, text: str):
+    path = tmp_path / 'export.csv'
+    path.write_text(text, encoding='utf-8')
+    return ExportValidator(edge_bytes=16 * 1024).check(path, os.stat(path))
+
+
+def test_intact_csv_passes(tmp_path):
+    assert check(tmp_path, HEADER + ROWS) is None
+
+
+def test_truncated_last_row_is_flagged(tmp_path):
+    assert check(tmp_path, HEADER + ROWS + '3000,2025-01') == "last row has 2 of 4 fields (truncated?)"
+
+
+def test_last_quoted_field_longer_than_the_window_passes(tmp_path):
+    assert len(LONG_NOTE) > 16 * 1024
+    assert check(tmp_path, HEADER + ROWS + f'3000,2025-02-01,Officer 1,{LONG_NOTE}\n') is None
+
+
+def test_truncated_row_after_a_long_quoted_field_is_flagged(tmp_path):
+    text = HEADER + ROWS + f'3000,2025-02-01,Officer 1,{LONG_NOTE}\n3001,2025-02'
+    assert check(tmp_path, text) == "last row has 2 of 4 fields (truncated?)"
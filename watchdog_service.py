@@ -6,34 +6,226 @@ into structured directories with year-based subfolders for time-series exports.
 """
 
 import os
+import stat
+import sys
 import shutil
+import struct
+import hashlib
+import sqlite3
+import zipfile
+import zlib
+import select
+import ctypes
+import ctypes.util
+import threading
 import time
 import re
-from datetime import datetime
+import argparse
+import bisect
+import csv
+import fnmatch
+import gzip
+import heapq
+import itertools
+import json
+import mmap
+import queue
+import random
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from glob import escape as glob_escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-from logging.handlers import RotatingFileHandler
+from types import MappingProxyType
+from typing import (
+    Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Pattern, Set, Tuple
+)
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import logging
 
+from xml.etree import ElementTree
+
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileSystemMovedEvent
+from watchdog.events import (
+    FileClosedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    FileSystemEventHandler,
+    FileSystemMovedEvent,
+)
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: JSON rule files only
+    tomllib = None
+
+try:
+    import lzma
+except ImportError:  # Python built without liblzma: archives fall back to deflate
+    lzma = None
+
+# Routing rules shipped with the service
+DEFAULT_RULES_FILE = Path(__file__).resolve().with_name('export_rules.json')
+DEFAULT_CATALOG_FILE = Path(__file__).resolve().parent / 'state' / 'export_catalog.db'
+DEFAULT_ARCHIVE_INDEX = Path(__file__).resolve().parent / 'state' / 'export_archive.db'
+
+
+def default_exports_dir(home: Optional[Path] = None) -> Path:
+    """
+    Return the exports folder the service files into.
+
+    Args:
+        home: User home directory (defaults to Path.home())
+
+    Returns:
+        The 05_EXPORTS folder in the user's OneDrive
+    """
+    return (home or Path.home()) / "OneDrive - City of Hackensack" / "05_EXPORTS"
+
+
+class DirectoryCache:
+    """
+    Remembers destination directories known to exist, and their device.
+
+    Creating or checking a destination folder costs a mkdir and a stat or
+    two, which on a OneDrive-backed tree is a round trip through the sync
+    client. Folders are checked once and then trusted until a move into them
+    fails, at which point the entry is dropped and checked again next time.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        """
+        Initialize the DirectoryCache.
+
+        Args:
+            max_size: Maximum number of directories remembered (oldest dropped first)
+        """
+        self.max_size = max_size
+        self._dirs: 'OrderedDict[Path, int]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def ensure(self, path: Path) -> int:
+        """
+        Make sure a directory exists, creating it (and its parents) if needed.
+
+        Args:
+            path: Directory path
+
+        Returns:
+            st_dev of the directory, for same-volume checks
+
+        Raises:
+            OSError: If the directory cannot be created or checked
+        """
+        with self._lock:
+            dev = self._dirs.get(path)
+            if dev is not None:
+                self._dirs.move_to_end(path)
+                self.hits += 1
+                return dev
+            self.misses += 1
+
+        # Existing folder: one stat. Missing folder: create it, then stat.
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            st = None
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            path.mkdir(parents=True, exist_ok=True)
+            st = os.stat(path)
+
+        with self._lock:
+            self._dirs[path] = st.st_dev
+            if len(self._dirs) > self.max_size:
+                self._dirs.popitem(last=False)
+        return st.st_dev
+
+    def invalidate(self, path: Path) -> None:
+        """
+        Forget a directory and everything cached below it.
+
+        Args:
+            path: Directory that may no longer exist
+        """
+        with self._lock:
+            stale = [p for p in self._dirs if p == path or path in p.parents]
+            for p in stale:
+                del self._dirs[p]
+
+    def clear(self) -> None:
+        """Forget every directory."""
+        with self._lock:
+            self._dirs.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._dirs)
 
 
 class FileMover:
     """
-    Handles robust file moving with lock detection and retry logic.
+    Handles robust file moving with lock detection.
+
+    Each call makes a single attempt and reports what happened; retries are
+    scheduled by the caller (see RetryScheduler) so a locked file never ties
+    up a thread while it waits.
     """
 
-    def __init__(self, max_retries: int = 5, retry_delay: float = 2.0):
+    # Outcomes of move_file
+    MOVED = 'moved'
+    LOCKED = 'locked'    # Source is open elsewhere (e.g. Excel); try again later
+    BUSY = 'busy'        # OS error during the move; may succeed later
+    MISSING = 'missing'  # Source is gone (already moved or deleted)
+    FAILED = 'failed'    # Unexpected error; not worth retrying
+    SKIPPED = 'skipped'  # Nothing to do (e.g. the journal shows it was already filed)
+    DUPLICATE = 'duplicate'  # Same content already filed in the destination folder
+    QUARANTINED = 'quarantined'  # Failed validation; moved to the quarantine folder
+    COPIED = 'copied'    # Copied to another volume, but the source could not be removed yet
+
+    RETRYABLE = frozenset((LOCKED, BUSY, COPIED))
+    # The source has left the monitored folder
+    FILED = frozenset((MOVED, DUPLICATE, QUARANTINED))
+    FAILURES = frozenset((MISSING, FAILED))
+
+    def __init__(
+        self,
+        verify: str = 'size',
+        chunk_size: int = 8 * 1024 * 1024,
+        metrics: Optional['MetricsRegistry'] = None,
+        directories: Optional[DirectoryCache] = None,
+        throttle: Optional['MoveThrottle'] = None
+    ):
         """
         Initialize the FileMover.
 
         Args:
-            max_retries: Maximum number of retry attempts
-            retry_delay: Delay in seconds between retries
+            verify: Check applied to cross-volume copies before the source is
+                removed: "none", "size" or "checksum" (SHA-256 of both files)
+            chunk_size: Bytes per copy call for cross-volume copies
+            metrics: Registry receiving transfer timings and byte counts
+            directories: Cache of destination folders known to exist
+            throttle: Byte and operation rate limits applied before each move
         """
-        self.max_retries = max_retries
-        self.retry_delay = retry_delay
+        self.verify = verify
+        self.chunk_size = chunk_size
+        self.metrics = metrics
+        self.directories = directories or DirectoryCache()
+        self.throttle = throttle
+        # Totals per path type: "rename" (same volume) and "copy" (cross volume)
+        self.stats: Dict[str, Dict[str, float]] = {
+            'rename': {'count': 0, 'bytes': 0, 'seconds': 0.0},
+            'copy': {'count': 0, 'bytes': 0, 'seconds': 0.0},
+        }
+        self._stats_lock = threading.Lock()
+        # Verified cross-volume copies whose source is still to be removed,
+        # keyed by (source, size, mtime_ns)
+        self._copied: Dict[Tuple[str, int, int], Path] = {}
+        self._copied_lock = threading.Lock()
 
     def is_file_locked(self, file_path: Path) -> bool:
         """
@@ -43,16 +235,15 @@ class FileMover:
             file_path: Path to the file to check
 
         Returns:
-            True if file is locked, False otherwise
+            True if file is locked, False otherwise (including when it is gone)
         """
-        if not file_path.exists():
-            return False
-
         try:
             # Try to open the file in exclusive mode
             with open(file_path, 'r+b') as f:
                 pass
             return False
+        except FileNotFoundError:
+            return False
         except (IOError, OSError, PermissionError):
             return True
 
@@ -60,567 +251,6413 @@ class FileMover:
         self,
         source: Path,
         destination: Path,
-        logger: logging.Logger
-    ) -> bool:
+        logger: logging.Logger,
+        src_stat: Optional[os.stat_result] = None
+    ) -> str:
         """
-        Move a file with retry logic and lock detection.
+        Make one attempt to move a file, with lock detection.
+
+        A move within one volume is a single atomic os.replace. A move to
+        another volume (e.g. local Downloads to a OneDrive tree on a different
+        drive) is copied to a temporary name next to the destination, verified,
+        renamed into place and only then removed from the source.
 
         Args:
             source: Source file path
             destination: Destination file path
             logger: Logger instance for logging
+            src_stat: os.stat() of the source if the caller already has it
+
+        Returns:
+            One of MOVED, LOCKED, BUSY, MISSING or FAILED, or COPIED if the
+            copy is in place but the source could not be removed (retry with
+            finish_copy, which only removes the source)
+        """
+        if src_stat is None:
+            try:
+                src_stat = os.stat(source)
+            except FileNotFoundError:
+                logger.warning("Source file does not exist: %s", source.name)
+                return self.MISSING
+            except OSError as e:
+                logger.warning("Could not stat '%s': %s", source.name, e)
+                return self.BUSY
+
+        if self.is_file_locked(source):
+            return self.LOCKED
+
+        if self.throttle is not None:
+            self.throttle.acquire(destination, src_stat.st_size)
+
+        try:
+            # Ensure destination directory exists (cached after the first move)
+            dest_dev = self.directories.ensure(destination.parent)
+
+            start = time.perf_counter()
+            left_behind = False
+            if dest_dev == src_stat.st_dev:
+                path_type = 'rename'
+                os.replace(source, destination)
+            else:
+                path_type = 'copy'
+                self._copy_across_devices(source, destination, src_stat.st_size)
+                left_behind = not self._remove_source(source, logger)
+            elapsed = time.perf_counter() - start
+        except FileNotFoundError as e:
+            # Either the source vanished or the destination folder was removed
+            self.directories.invalidate(destination.parent)
+            if not os.path.lexists(source):
+                logger.warning("Source file does not exist: %s", source.name)
+                return self.MISSING
+            logger.warning("Error moving '%s': %s", source.name, e)
+            return self.BUSY
+        except (IOError, OSError, PermissionError) as e:
+            self.directories.invalidate(destination.parent)
+            logger.warning("Error moving '%s': %s", source.name, e)
+            return self.BUSY
+        except Exception as e:
+            logger.error("Unexpected error moving '%s': %s", source.name, e)
+            return self.FAILED
+
+        self._record(path_type, src_stat.st_size, elapsed)
+        if left_behind:
+            with self._copied_lock:
+                self._copied[(str(source), src_stat.st_size, src_stat.st_mtime_ns)] = destination
+            logger.warning("Copied '%s' -> '%s'; the source will be removed on the next attempt",
+                           source.name, destination.name)
+            return self.COPIED
+        logger.info(
+            "Successfully moved '%s' -> '%s' (%s, %s)",
+            source.name, destination.name, path_type, self._describe_transfer(src_stat.st_size, elapsed)
+        )
+        return self.MOVED
+
+    def copied_to(self, source: Path, src_stat: os.stat_result) -> Optional[Path]:
+        """
+        Look up the copy made of a source that could not be removed.
+
+        Args:
+            source: Source file path
+            src_stat: os.stat() of the source
+
+        Returns:
+            Destination of the copy, or None if this FileMover made none
+        """
+        with self._copied_lock:
+            return self._copied.get((str(source), src_stat.st_size, src_stat.st_mtime_ns))
+
+    def finish_copy(
+        self,
+        source: Path,
+        destination: Path,
+        logger: logging.Logger,
+        src_stat: os.stat_result
+    ) -> Optional[str]:
+        """
+        Complete a cross-volume move whose copy is already in place.
+
+        The copy is trusted only while it still has the source's size and
+        mtime (the verified copy preserves both); then only the source is
+        removed, so a retry never copies the file a second time.
+
+        Args:
+            source: Source file path
+            destination: Where the source was copied
+            logger: Logger instance for logging
+            src_stat: os.stat() of the source
 
         Returns:
-            True if move was successful, False otherwise
+            MOVED if the source is gone now, COPIED if it still could not be
+            removed, or None if the copy no longer matches (move it again)
         """
-        if not source.exists():
-            logger.warning(f"Source file does not exist: {source.name}")
+        key = (str(source), src_stat.st_size, src_stat.st_mtime_ns)
+        with self._copied_lock:
+            self._copied.pop(key, None)
+        try:
+            dest_stat = os.stat(destination)
+        except OSError:
+            return None
+        if dest_stat.st_size != src_stat.st_size or dest_stat.st_mtime_ns != src_stat.st_mtime_ns:
+            return None
+
+        if not self._remove_source(source, logger):
+            with self._copied_lock:
+                self._copied[key] = destination
+            return self.COPIED
+        logger.info("Removed '%s', already copied to '%s'", source.name, destination.name)
+        return self.MOVED
+
+    @staticmethod
+    def _remove_source(source: Path, logger: logging.Logger) -> bool:
+        """
+        Remove the source of a verified copy.
+
+        Returns:
+            True if the source is gone, False if it could not be removed
+        """
+        try:
+            os.unlink(source)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Copied '%s' but could not remove the source: %s", source.name, e)
             return False
+        return True
 
-        # Ensure destination directory exists
-        destination.parent.mkdir(parents=True, exist_ok=True)
+    def _copy_across_devices(self, source: Path, destination: Path, size: int) -> None:
+        """
+        Copy a file to another volume via a temporary name and verify it.
 
-        for attempt in range(1, self.max_retries + 1):
-            if self.is_file_locked(source):
-                if attempt < self.max_retries:
-                    logger.info(
-                        f"File '{source.name}' is locked (attempt {attempt}/{self.max_retries}). "
-                        f"Retrying in {self.retry_delay} seconds..."
-                    )
-                    time.sleep(self.retry_delay)
-                    continue
-                else:
-                    logger.error(
-                        f"File '{source.name}' is locked after {self.max_retries} attempts. "
-                        f"Skipping move."
-                    )
-                    return False
+        Args:
+            source: Source file path
+            destination: Final destination path
+            size: Expected size in bytes
+
+        Raises:
+            OSError: If the copy or verification fails (the temp file is removed)
+        """
+        tmp = destination.with_name(f".{destination.name}.{os.getpid()}.partial")
+        try:
+            with open(source, 'rb') as fsrc, open(tmp, 'wb') as fdst:
+                self._copy_stream(fsrc, fdst)
+                fdst.flush()
+                copied = os.fstat(fdst.fileno()).st_size
 
+            if self.verify != 'none' and copied != size:
+                raise OSError(f"size mismatch after copy ({copied} of {size} bytes)")
+            if self.verify == 'checksum' and self._file_digest(source) != self._file_digest(tmp):
+                raise OSError("checksum mismatch after copy")
+
+            shutil.copystat(source, tmp)
+            os.replace(tmp, destination)
+        except BaseException:
             try:
-                shutil.move(str(source), str(destination))
-                logger.info(f"Successfully moved '{source.name}' -> '{destination.name}'")
-                return True
-            except (IOError, OSError, PermissionError) as e:
-                if attempt < self.max_retries:
-                    logger.warning(
-                        f"Error moving '{source.name}' (attempt {attempt}/{self.max_retries}): {e}. "
-                        f"Retrying in {self.retry_delay} seconds..."
-                    )
-                    time.sleep(self.retry_delay)
-                else:
-                    logger.error(f"Failed to move '{source.name}' after {self.max_retries} attempts: {e}")
-                    return False
-            except Exception as e:
-                logger.error(f"Unexpected error moving '{source.name}': {e}")
-                return False
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
 
-        return False
+    def _copy_stream(self, fsrc, fdst) -> None:
+        """
+        Copy file contents in chunks, in-kernel where the platform allows it.
 
+        Tries os.copy_file_range, then os.sendfile, then a buffered
+        read/write loop. A zero-copy call that is refused before any data
+        moved falls through to the next method.
 
-class YearExtractor:
+        Args:
+            fsrc: Source file opened for binary reading
+            fdst: Destination file opened for binary writing
+        """
+        in_fd = fsrc.fileno()
+        out_fd = fdst.fileno()
+        chunk = self.chunk_size
+
+        if hasattr(os, 'copy_file_range'):
+            copied = 0
+            try:
+                while True:
+                    n = os.copy_file_range(in_fd, out_fd, chunk)
+                    if n == 0:
+                        return
+                    copied += n
+            except OSError:
+                if copied:
+                    raise
+
+        if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+            offset = 0
+            try:
+                while True:
+                    n = os.sendfile(out_fd, in_fd, offset, chunk)
+                    if n == 0:
+                        return
+                    offset += n
+            except OSError:
+                if offset:
+                    raise
+
+        shutil.copyfileobj(fsrc, fdst, chunk)
+
+    def _file_digest(self, path: Path) -> str:
+        """
+        SHA-256 of a file, read in chunks.
+
+        Args:
+            path: File to hash
+
+        Returns:
+            Hex digest
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(self.chunk_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _record(self, path_type: str, size: int, elapsed: float) -> None:
+        """
+        Add a completed move to the per-path-type throughput totals.
+
+        Args:
+            path_type: "rename" or "copy"
+            size: Bytes moved
+            elapsed: Seconds taken
+        """
+        with self._stats_lock:
+            totals = self.stats[path_type]
+            totals['count'] += 1
+            totals['bytes'] += size
+            totals['seconds'] += elapsed
+        if self.metrics:
+            self.metrics.observe('watchdog_transfer_seconds', elapsed, path_type=path_type)
+            self.metrics.inc('watchdog_transfer_bytes_total', size, path_type=path_type)
+
+    def throughput_summary(self) -> str:
+        """
+        Summarize moves so far per path type.
+
+        Returns:
+            One-line summary for the log
+        """
+        with self._stats_lock:
+            parts = [
+                f"{path_type}: {int(t['count'])} file(s), "
+                f"{self._describe_transfer(int(t['bytes']), t['seconds'])}"
+                for path_type, t in self.stats.items()
+            ]
+        return "; ".join(parts)
+
+    @staticmethod
+    def _describe_transfer(size: int, elapsed: float) -> str:
+        """Format size, duration and rate of a transfer for the log."""
+        mb = size / (1024 * 1024)
+        rate = f", {mb / elapsed:.1f} MB/s" if elapsed > 0 and size else ""
+        return f"{mb:.2f} MB in {elapsed * 1000:.0f} ms{rate}"
+
+
+class MoveJournal:
     """
-    Extracts year information from filenames based on different strategies.
+    Durable SQLite journal of detected files and their moves.
+
+    Each file is identified by (path, size, mtime). A 'moving' row is
+    committed before the move starts so a crash leaves a record of what was
+    in flight; outcomes are batched and committed by a background thread.
+    The database runs in WAL mode so lookups never wait on those commits.
     """
 
-    @staticmethod
-    def extract_year_start(filename: str) -> Optional[str]:
+    MOVING = 'moving'
+    # Outcomes that mean the file needs no further work if seen again
+    HANDLED = frozenset((FileMover.MOVED, FileMover.SKIPPED, FileMover.DUPLICATE))
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path        TEXT    NOT NULL,
+            size        INTEGER NOT NULL,
+            mtime_ns    INTEGER NOT NULL,
+            rule        TEXT,
+            destination TEXT,
+            status      TEXT    NOT NULL,
+            updated_at  REAL    NOT NULL,
+            PRIMARY KEY (path, size, mtime_ns)
+        );
+        CREATE INDEX IF NOT EXISTS idx_files_status ON files (status);
+    """
+
+    _UPSERT = """
+        INSERT INTO files (path, size, mtime_ns, rule, destination, status, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (path, size, mtime_ns) DO UPDATE SET
+            rule = excluded.rule,
+            destination = excluded.destination,
+            status = excluded.status,
+            updated_at = excluded.updated_at
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        logger: logging.Logger,
+        flush_interval: float = 1.0,
+        batch_size: int = 200,
+        retention_days: float = 90
+    ):
         """
-        Extract year from the start of filename (first 4 digits).
+        Open (or create) the journal.
 
-        Pattern: YYYY_MM_Monthly_*.xlsx
-        Example: 2025_11_Monthly_CAD.xlsx -> "2025"
+        Args:
+            db_path: SQLite database file
+            logger: Logger instance for logging
+            flush_interval: Seconds between batched commits
+            batch_size: Pending records that trigger an early commit
+            retention_days: Completed records older than this are pruned at startup
+        """
+        self.db_path = db_path
+        self.logger = logger
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._conn.execute(
+            "DELETE FROM files WHERE status != ? AND updated_at < ?",
+            (self.MOVING, time.time() - retention_days * 86400)
+        )
+        self._conn.commit()
+
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, int, int], Tuple] = {}
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="watchdog-journal", daemon=True)
+        self._thread.start()
+
+    def begin_move(self, path: Path, size: int, mtime_ns: int, rule: str, destination: Path) -> None:
+        """
+        Record that a move is starting, committed before returning.
 
         Args:
-            filename: Filename to extract year from
+            path: Source file
+            size: Source size in bytes
+            mtime_ns: Source modification time in nanoseconds
+            rule: Name of the matching rule
+            destination: Destination path
+        """
+        row = (str(path), size, mtime_ns, rule, str(destination), self.MOVING, time.time())
+        with self._lock:
+            self._pending[row[:3]] = row
+            self._flush_locked()
+
+    def record(
+        self,
+        path: Path,
+        size: int,
+        mtime_ns: int,
+        rule: str,
+        destination: Optional[Path],
+        status: str
+    ) -> None:
+        """
+        Record the outcome of a move (committed with the next batch).
+
+        Args:
+            path: Source file
+            size: Source size in bytes
+            mtime_ns: Source modification time in nanoseconds
+            rule: Name of the matching rule
+            destination: Destination path, if one was chosen
+            status: FileMover outcome
+        """
+        row = (str(path), size, mtime_ns, rule, str(destination) if destination else None,
+               status, time.time())
+        with self._lock:
+            self._pending[row[:3]] = row
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def is_handled(self, path: Path, size: int, mtime_ns: int) -> bool:
+        """
+        Check whether this exact file (same path, size and mtime) was already filed.
+
+        Args:
+            path: File path
+            size: File size in bytes
+            mtime_ns: Modification time in nanoseconds
 
         Returns:
-            Year string (4 digits) or None if not found
+            True if the journal says no further work is needed
         """
-        match = re.match(r'^(\d{4})_', filename)
-        return match.group(1) if match else None
+        key = (str(path), size, mtime_ns)
+        with self._lock:
+            row = self._pending.get(key)
+            if row is not None:
+                return row[5] in self.HANDLED
+            found = self._conn.execute(
+                "SELECT status FROM files WHERE path = ? AND size = ? AND mtime_ns = ?", key
+            ).fetchone()
+        return found is not None and found[0] in self.HANDLED
 
-    @staticmethod
-    def extract_year_end_range(filename: str) -> Optional[str]:
+    def copied_to(self, path: Path, size: int, mtime_ns: int) -> Optional[Path]:
         """
-        Extract year from the end of a date range (after "to_").
+        Look up where this exact file was copied if its source could not be removed.
 
-        Pattern: YYYY_MM_to_YYYY_MM_*.xlsx
-        Example: 2024_09_to_2025_09_Rolling13_RMS.xlsx -> "2025"
+        Args:
+            path: File path
+            size: File size in bytes
+            mtime_ns: Modification time in nanoseconds
+
+        Returns:
+            Destination of the copy, or None if the journal has no such copy
+        """
+        key = (str(path), size, mtime_ns)
+        with self._lock:
+            row = self._pending.get(key)
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT path, size, mtime_ns, rule, destination, status FROM files "
+                    "WHERE path = ? AND size = ? AND mtime_ns = ?", key
+                ).fetchone()
+        if row is None or row[5] != FileMover.COPIED or not row[4]:
+            return None
+        return Path(row[4])
+
+    def recover(self) -> None:
+        """
+        Resolve moves left 'moving' by a previous run that was killed.
+
+        A move that completed (destination has the source's size and mtime,
+        which both the rename and the verified copy preserve) is rolled
+        forward, removing a leftover source if it is still the same file; if
+        that source cannot be removed the row is marked copied, so the next
+        attempt only removes it. A different file now at the source path (the
+        same name downloaded again) is left for the startup scan. Otherwise
+        any temporary copy is removed and the row is dropped so the startup
+        scan picks the source up again.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns, rule, destination FROM files WHERE status = ?",
+                (self.MOVING,)
+            ).fetchall()
+        if not rows:
+            return
+
+        self.logger.info("Journal: resolving %s move(s) interrupted by the last shutdown", len(rows))
+        for path_str, size, mtime_ns, rule, dest_str in rows:
+            source = Path(path_str)
+            destination = Path(dest_str)
+            try:
+                dest_stat = os.stat(destination)
+                completed = dest_stat.st_size == size and dest_stat.st_mtime_ns == mtime_ns
+            except OSError:
+                completed = False
+
+            if completed:
+                status = FileMover.MOVED
+                try:
+                    src_stat = os.stat(source)
+                except OSError:
+                    src_stat = None
+                if src_stat is not None and (src_stat.st_size, src_stat.st_mtime_ns) != (size, mtime_ns):
+                    self.logger.info("Journal: '%s' was downloaded again since; leaving the new file",
+                                     source.name)
+                elif src_stat is not None:
+                    try:
+                        source.unlink()
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        self.logger.warning("Journal: could not remove moved source '%s': %s", source.name, e)
+                        status = FileMover.COPIED
+                self.logger.info("Journal: '%s' had reached '%s'; marked %s", source.name, destination, status)
+                self.record(source, size, mtime_ns, rule, destination, status)
+                continue
+
+            for leftover in destination.parent.glob(f".{glob_escape(destination.name)}.*.partial"):
+                try:
+                    leftover.unlink()
+                    self.logger.info("Journal: removed partial copy '%s'", leftover.name)
+                except OSError as e:
+                    self.logger.warning("Journal: could not remove partial copy '%s': %s", leftover.name, e)
+
+            with self._lock:
+                self._pending.pop((path_str, size, mtime_ns), None)
+                self._conn.execute(
+                    "DELETE FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    (path_str, size, mtime_ns)
+                )
+                self._conn.commit()
+            if source.exists():
+                self.logger.info("Journal: '%s' was not moved; it will be picked up again", source.name)
+            else:
+                self.logger.warning("Journal: '%s' is missing from both source and destination", source.name)
+        self.flush()
+
+    def flush(self) -> None:
+        """Commit all pending records now."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """Commit pending records and close the database."""
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+    def _flush_locked(self) -> None:
+        """Write pending records in one transaction (caller holds the lock)."""
+        if not self._pending:
+            return
+        rows = list(self._pending.values())
+        self._pending.clear()
+        try:
+            with self._conn:
+                self._conn.executemany(self._UPSERT, rows)
+        except sqlite3.Error as e:
+            self.logger.error("Journal write failed (%s record(s) lost): %s", len(rows), e)
+
+    def _run(self) -> None:
+        """Background commit loop."""
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+class ContentHasher:
+    """
+    BLAKE2b digests of file contents, remembered per (path, size, mtime).
+
+    Files are read in chunks into one reused buffer; files of mmap_threshold
+    bytes or more are memory-mapped and hashed in slices straight from the
+    page cache. hashlib releases the GIL while it hashes, so several hashing
+    threads run in parallel.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1024 * 1024,
+        mmap_threshold: int = 16 * 1024 * 1024,
+        max_entries: int = 4096
+    ):
+        """
+        Initialize the ContentHasher.
 
         Args:
-            filename: Filename to extract year from
+            chunk_size: Bytes hashed per read or mmap slice
+            mmap_threshold: Files at least this large are memory-mapped
+            max_entries: Digests remembered (least recently used are dropped)
+        """
+        self.chunk_size = chunk_size
+        self.mmap_threshold = mmap_threshold
+        self.max_entries = max_entries
+        self._digests: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def digest(self, path: Path, st: os.stat_result) -> str:
+        """
+        Digest of a file, computed once per version of the file.
+
+        Args:
+            path: File to hash
+            st: os.stat() of the file; a changed size or mtime means a new digest
+
+        Returns:
+            Hex digest
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        key = (str(path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            value = self._digests.get(key)
+            if value is not None:
+                self._digests.move_to_end(key)
+                return value
+
+        value = self._compute(path, st.st_size)
+        with self._lock:
+            self._digests[key] = value
+            while len(self._digests) > self.max_entries:
+                self._digests.popitem(last=False)
+        return value
+
+    def _compute(self, path: Path, size: int) -> str:
+        """
+        Hash a file's contents.
+
+        Args:
+            path: File to hash
+            size: Expected size in bytes (selects read or mmap)
+
+        Returns:
+            Hex digest
+        """
+        digest = hashlib.blake2b(digest_size=32)
+        chunk = self.chunk_size
+        with open(path, 'rb') as f:
+            if size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, len(mapped), chunk):
+                            digest.update(view[offset:offset + chunk])
+                    finally:
+                        view.release()
+            else:
+                buf = bytearray(chunk)
+                view = memoryview(buf)
+                while True:
+                    n = f.readinto(buf)
+                    if not n:
+                        break
+                    digest.update(view[:n])
+        return digest.hexdigest()
+
+
+class DuplicateIndex:
+    """
+    Persistent SQLite index of the content filed into each destination folder.
+
+    Maps (folder, digest) to the file filed there, so a repeated download of
+    an export can be recognized without reading the destination. An entry is
+    only trusted while that file still has the size and mtime it was filed
+    with (the rename and the verified copy both preserve them).
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS content (
+            folder   TEXT    NOT NULL,
+            digest   TEXT    NOT NULL,
+            path     TEXT    NOT NULL,
+            size     INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            filed_at REAL    NOT NULL,
+            PRIMARY KEY (folder, digest)
+        );
+    """
+
+    def __init__(self, db_path: Path, logger: logging.Logger):
+        """
+        Open (or create) the index.
+
+        Args:
+            db_path: SQLite database file
+            logger: Logger instance for logging
+        """
+        self.db_path = db_path
+        self.logger = logger
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM content").fetchone()[0]
+
+    def find(self, folder: Path, digest: str) -> Optional[Path]:
+        """
+        Look up a file with this content already filed in a folder.
+
+        Args:
+            folder: Destination folder
+            digest: Content digest of the incoming file
+
+        Returns:
+            Path of the filed copy, or None (stale entries are removed)
+        """
+        key = (str(folder), digest)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mtime_ns FROM content WHERE folder = ? AND digest = ?", key
+            ).fetchone()
+        if row is None:
+            return None
+
+        path_str, size, mtime_ns = row
+        try:
+            st = os.stat(path_str)
+            if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                return Path(path_str)
+        except OSError:
+            pass
+
+        # The filed copy was edited, renamed or deleted since
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute("DELETE FROM content WHERE folder = ? AND digest = ?", key)
+            except sqlite3.Error as e:
+                self.logger.error("Duplicate index update failed: %s", e)
+        return None
+
+    def add(self, path: Path, digest: str, size: int, mtime_ns: int) -> None:
+        """
+        Record the content of a file that was just filed.
+
+        Args:
+            path: Filed file (its parent folder is the index scope)
+            digest: Content digest
+            size: Size in bytes
+            mtime_ns: Modification time in nanoseconds
+        """
+        row = (str(path.parent), digest, str(path), size, mtime_ns, time.time())
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO content (folder, digest, path, size, mtime_ns, filed_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        row
+                    )
+            except sqlite3.Error as e:
+                self.logger.error("Duplicate index update failed: %s", e)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+
+class CatalogEntry(NamedTuple):
+    """One file in the export catalog."""
+
+    path: str
+    rule: Optional[str]
+    year: Optional[str]
+    original_name: Optional[str]
+    size: int
+    mtime: float
+    filed_at: Optional[float]
+
+
+class ExportCatalog:
+    """
+    SQLite catalog of the files in the exports tree, for indexed lookups.
+
+    Every file the service files is added as it is moved, with its rule,
+    year and original name. The first time the catalog is opened it is
+    filled from the files already in the tree by a parallel directory scan
+    (rule and year are inferred from the folder a file sits in). Lookups
+    such as "the latest Monthly_CAD for 2025" then take one index probe
+    instead of a walk over OneDrive folders.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS exports (
+            path          TEXT PRIMARY KEY,
+            rule          TEXT,
+            year          TEXT,
+            name          TEXT    NOT NULL,
+            original_name TEXT,
+            size          INTEGER NOT NULL,
+            mtime         REAL    NOT NULL,
+            filed_at      REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_exports_rule ON exports (rule, year, mtime);
+        CREATE INDEX IF NOT EXISTS idx_exports_name ON exports (name);
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    _COLUMNS = "path, rule, year, original_name, size, mtime, filed_at"
+
+    def __init__(self, db_path: Path, logger: logging.Logger):
+        """
+        Open (or create) the catalog.
+
+        Args:
+            db_path: SQLite database file
+            logger: Logger instance for logging
+        """
+        self.db_path = db_path
+        self.logger = logger
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        # Trees waiting to be built; one thread builds them in turn
+        self._build_queue: Deque[Tuple[Path, Mapping[str, Tuple[str, bool]]]] = deque()
+        self._build_lock = threading.Lock()
+        self._build_thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM exports").fetchone()[0]
+
+    def built(self, base_exports: Path) -> bool:
+        """
+        Whether the catalog has been filled from an exports tree.
+
+        Args:
+            base_exports: Root of the exports tree
+
+        Returns:
+            True once build() has completed for that tree
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (f"built_at:{base_exports}",)
+            ).fetchone()
+        return row is not None
+
+    def record(
+        self,
+        path: Path,
+        rule: Optional[str],
+        year: Optional[str],
+        original_name: Optional[str],
+        size: int,
+        mtime: float
+    ) -> None:
+        """
+        Add (or replace) a file that was just filed.
+
+        Args:
+            path: Filed file
+            rule: Name of the rule that filed it
+            year: Year subfolder it was filed under, if any
+            original_name: Name it had when it was downloaded
+            size: Size in bytes
+            mtime: Modification time (seconds since the epoch)
+        """
+        row = (str(path), rule, year, path.name, original_name, size, mtime, time.time())
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO exports "
+                        "(path, rule, year, name, original_name, size, mtime, filed_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        row
+                    )
+            except sqlite3.Error as e:
+                self.logger.error("Catalog update failed for '%s': %s", path.name, e)
+
+    def remove(self, path: Path) -> None:
+        """
+        Drop a file from the catalog.
+
+        Args:
+            path: File that no longer exists
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM exports WHERE path = ?", (str(path),))
+
+    def latest(self, rule: str, year: Optional[str] = None, under: Optional[Path] = None) -> Optional[CatalogEntry]:
+        """
+        Most recent file of a rule (optionally for one year).
+
+        Entries whose file has since been removed are dropped on the way.
+
+        Args:
+            rule: Rule name, e.g. "Monthly_CAD"
+            year: Year subfolder, e.g. "2025"
+            under: Only files below this folder (e.g. one profile's exports)
+
+        Returns:
+            CatalogEntry, or None if the catalog has no such file
+        """
+        while True:
+            found = self.find(rule=rule, year=year, under=under, limit=1)
+            if not found:
+                return None
+            if os.path.exists(found[0].path):
+                return found[0]
+            self.remove(Path(found[0].path))
+
+    def find(
+        self,
+        rule: Optional[str] = None,
+        year: Optional[str] = None,
+        name: Optional[str] = None,
+        limit: Optional[int] = None,
+        under: Optional[Path] = None
+    ) -> List[CatalogEntry]:
+        """
+        Files matching all of the given filters, newest first.
+
+        Args:
+            rule: Rule name
+            year: Year subfolder
+            name: Filename pattern with * and ? wildcards (case-sensitive)
+            limit: Maximum number of results
+            under: Only files below this folder
+
+        Returns:
+            Matching catalog entries
+        """
+        clauses = []
+        params: List[Any] = []
+        for column, value in (('rule', rule), ('year', year)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if name is not None:
+            clauses.append("name GLOB ?")
+            params.append(name)
+        if under is not None:
+            prefix = os.path.join(str(under), '')
+            clauses.append("substr(path, 1, ?) = ?")
+            params += [len(prefix), prefix]
+        sql = f"SELECT {self._COLUMNS} FROM exports"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY mtime DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [CatalogEntry(*row) for row in rows]
+
+    def summary(self) -> List[Tuple[Optional[str], Optional[str], int, int]]:
+        """
+        File count and total size per rule and year.
+
+        Returns:
+            (rule, year, files, bytes) rows
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT rule, year, COUNT(*), SUM(size) FROM exports GROUP BY rule, year ORDER BY rule, year"
+            ).fetchall()
+
+    def build(self, base_exports: Path, rule_dirs: Mapping[str, Tuple[str, bool]], workers: int = 8) -> int:
+        """
+        Fill the catalog from the files already in the exports tree.
+
+        Folders are listed in parallel (each listing is a round trip on a
+        synced drive). Files the service has already recorded keep their
+        richer entries; entries for files no longer in the tree are dropped,
+        except those recorded after the build started (moves filed into a
+        folder the scan had already listed).
+
+        Args:
+            base_exports: Root of the exports tree
+            rule_dirs: Rule folder relative to base_exports (POSIX style) ->
+                (rule name, files are filed in year subfolders)
+            workers: Folders listed at once
+
+        Returns:
+            Number of files found
+        """
+        start = time.perf_counter()
+        build_start = time.time()
+        seen: Set[str] = set()
+        batch: List[Tuple] = []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="watchdog-catalog-scan") as pool:
+            pending = {pool.submit(self._list_folder, base_exports)}
+            while pending:
+                future = pending.pop()
+                try:
+                    files, folders = future.result()
+                except OSError as e:
+                    self.logger.warning("Catalog scan could not list a folder: %s", e)
+                    continue
+                pending.update(pool.submit(self._list_folder, folder) for folder in folders)
+                for path, size, mtime in files:
+                    rule, year = self._classify(path, base_exports, rule_dirs)
+                    batch.append((str(path), rule, year, path.name, None, size, mtime, None))
+                if len(batch) >= 1000 or not pending:
+                    seen.update(row[0] for row in batch)
+                    self._insert_scanned(batch)
+                    batch = []
+
+        prefix = os.path.join(str(base_exports), '')
+        with self._lock:
+            with self._conn:
+                known = self._conn.execute(
+                    "SELECT path FROM exports WHERE substr(path, 1, ?) = ? "
+                    "AND (filed_at IS NULL OR filed_at < ?)",
+                    (len(prefix), prefix, build_start)
+                ).fetchall()
+                self._conn.executemany(
+                    "DELETE FROM exports WHERE path = ?", [row for row in known if row[0] not in seen]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    (f"built_at:{base_exports}", str(time.time()))
+                )
+        self.logger.info("Catalog built: %s file(s) under %s in %.2fs",
+                         len(seen), base_exports, time.perf_counter() - start)
+        return len(seen)
+
+    def build_in_background(self, base_exports: Path, rule_dirs: Mapping[str, Tuple[str, bool]]) -> None:
+        """
+        Run build() on a background thread if the tree was never catalogued.
+
+        Trees queued by several profiles are built one after another.
+
+        Args:
+            base_exports: Root of the exports tree
+            rule_dirs: See build()
+        """
+        if self.built(base_exports):
+            return
+        with self._build_lock:
+            self._build_queue.append((base_exports, rule_dirs))
+            if self._build_thread is None:
+                self._build_thread = threading.Thread(target=self._run_builds, name="watchdog-catalog", daemon=True)
+                self._build_thread.start()
+
+    def _run_builds(self) -> None:
+        """Build thread: catalogue queued trees until none are left."""
+        while True:
+            with self._build_lock:
+                if not self._build_queue:
+                    self._build_thread = None
+                    return
+                base_exports, rule_dirs = self._build_queue.popleft()
+            try:
+                self.build(base_exports, rule_dirs)
+            except Exception as e:
+                self.logger.error("Catalog build of %s failed: %s", base_exports, e)
+
+    def close(self) -> None:
+        """Wait for queued builds and close the database."""
+        with self._build_lock:
+            thread = self._build_thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _list_folder(folder: Path) -> Tuple[List[Tuple[Path, int, float]], List[Path]]:
+        """List one folder: (files with size and mtime, subfolders)."""
+        files = []
+        folders = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False) and not DownloadFilter.is_temporary(entry.name):
+                    st = entry.stat(follow_symlinks=False)
+                    files.append((Path(entry.path), st.st_size, st.st_mtime))
+        return files, folders
+
+    @staticmethod
+    def _classify(
+        path: Path, base_exports: Path, rule_dirs: Mapping[str, Tuple[str, bool]]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Infer rule and year of a scanned file from its folder (longest rule folder wins)."""
+        parts = path.relative_to(base_exports).parent.parts
+        for depth in range(len(parts), 0, -1):
+            rule = rule_dirs.get('/'.join(parts[:depth]))
+            if rule is not None:
+                key, year_based = rule
+                below = parts[depth:]
+                year = below[0] if year_based and below and re.fullmatch(r'\d{4}', below[0]) else None
+                return key, year
+        return None, None
+
+    def _insert_scanned(self, rows: List[Tuple]) -> None:
+        """Insert scanned files, keeping entries the service recorded itself."""
+        if not rows:
+            return
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO exports "
+                        "(path, rule, year, name, original_name, size, mtime, filed_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+            except sqlite3.Error as e:
+                self.logger.error("Catalog write failed (%s entries lost): %s", len(rows), e)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket for rate limits (bytes or operations per second).
+
+    consume() reserves its tokens at once and sleeps off any debt, so callers
+    are served in arrival order and a request larger than the burst still
+    goes through, at the configured rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the TokenBucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Most tokens that can accumulate while idle (defaults to
+                one second's worth)
+            clock: Time source (monotonic seconds)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.clock = clock
+        self._tokens = self.burst
+        self._stamp = clock()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take tokens without waiting.
+
+        Args:
+            amount: Tokens needed
+
+        Returns:
+            Seconds the caller has to wait before using them
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += wait
+        return wait
+
+    def consume(self, amount: float, stop: Optional[threading.Event] = None) -> float:
+        """
+        Take tokens, sleeping until the rate allows them.
+
+        Args:
+            amount: Tokens needed
+            stop: Event that cuts the wait short when set
+
+        Returns:
+            Seconds waited
+        """
+        wait = self.reserve(amount)
+        if wait > 0:
+            if stop is not None:
+                stop.wait(wait)
+            else:
+                time.sleep(wait)
+        return wait
+
+
+class MoveThrottle:
+    """
+    Byte-rate and operations-per-second limits on moves into the exports tree.
+
+    Limits apply globally and per destination root (the top-level folder
+    under the exports base, e.g. "_CAD"), so one busy rule cannot take the
+    whole budget. With a batch size above one, moves are let through in
+    groups: the first move of a batch reserves the whole batch's operations
+    and the rest follow back-to-back, leaving the sync client quiet gaps to
+    catch up between batches instead of a steady trickle of changes.
+
+    acquire() sleeps on the moving worker, so a throttled burst fills the
+    move queue and slows intake instead of dropping files.
+    """
+
+    def __init__(
+        self,
+        base: Optional[Path],
+        bytes_per_second: Optional[float] = None,
+        ops_per_second: Optional[float] = None,
+        root_bytes_per_second: Optional[float] = None,
+        root_ops_per_second: Optional[float] = None,
+        batch: int = 1,
+        metrics: Optional['MetricsRegistry'] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the MoveThrottle. A limit left as None is not applied.
+
+        Args:
+            base: Exports base that destination roots are taken relative to
+                (more can be added with add_base())
+            bytes_per_second: Bytes moved per second, all roots together
+            ops_per_second: Moves per second, all roots together
+            root_bytes_per_second: Bytes moved per second into one root
+            root_ops_per_second: Moves per second into one root
+            batch: Moves let through together before the next pause
+            metrics: Registry receiving throttle wait times
+            clock: Time source for the rate limits (monotonic seconds)
+        """
+        # (exports base, label prefixed to its roots)
+        self.bases: List[Tuple[Path, str]] = [(base, '')] if base is not None else []
+        self.batch = max(1, batch)
+        self.metrics = metrics
+        self.root_bytes_per_second = root_bytes_per_second
+        self.root_ops_per_second = root_ops_per_second
+        self.clock = clock
+        self._bytes = TokenBucket(bytes_per_second, clock=clock) if bytes_per_second else None
+        self._ops = TokenBucket(ops_per_second, burst=self.batch, clock=clock) if ops_per_second else None
+        self._root_bytes: Dict[str, TokenBucket] = {}
+        self._root_ops: Dict[str, TokenBucket] = {}
+        # Moves left in the current batch per operations bucket
+        self._batch_left: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._released = threading.Event()
+        self.throttled_moves = 0
+        self.waited = 0.0
+
+    def add_base(self, base: Path, label: str) -> None:
+        """
+        Throttle roots under another exports base (multi-profile mode).
+
+        Args:
+            base: Exports base of a profile
+            label: Prefix for its roots, e.g. the profile name
+        """
+        self.bases.append((base, label))
+
+    def root_of(self, destination: Path) -> str:
+        """
+        Destination root a file is filed under.
+
+        Args:
+            destination: Destination path of a move
+
+        Returns:
+            Top-level folder under its base ("" for the base itself, prefixed
+            with the base's label), or the destination folder for paths
+            outside every base
+        """
+        for base, label in self.bases:
+            try:
+                parts = destination.relative_to(base).parts
+            except ValueError:
+                continue
+            root = parts[0] if len(parts) > 1 else ''
+            return f"{label}/{root}" if label else root
+        return str(destination.parent)
+
+    def acquire(self, destination: Path, size: int) -> float:
+        """
+        Wait until a move of `size` bytes into `destination` is within the limits.
+
+        Args:
+            destination: Destination path of the move
+            size: Bytes the move adds to the synced tree
+
+        Returns:
+            Seconds waited
+        """
+        root = self.root_of(destination)
+        with self._lock:
+            byte_buckets = [self._bytes]
+            ops_buckets = [self._ops]
+            if self.root_bytes_per_second:
+                bucket = self._root_bytes.get(root)
+                if bucket is None:
+                    bucket = self._root_bytes[root] = TokenBucket(self.root_bytes_per_second, clock=self.clock)
+                byte_buckets.append(bucket)
+            if self.root_ops_per_second:
+                bucket = self._root_ops.get(root)
+                if bucket is None:
+                    bucket = self._root_ops[root] = TokenBucket(
+                        self.root_ops_per_second, burst=self.batch, clock=self.clock
+                    )
+                ops_buckets.append(bucket)
+
+            wait = 0.0
+            for bucket in byte_buckets:
+                if bucket is not None:
+                    wait = max(wait, bucket.reserve(size))
+            for bucket in ops_buckets:
+                if bucket is None:
+                    continue
+                left = self._batch_left.get(id(bucket), 0)
+                if left == 0:
+                    # First move of a batch pays for all of it
+                    wait = max(wait, bucket.reserve(self.batch))
+                    left = self.batch
+                self._batch_left[id(bucket)] = left - 1
+            if wait > 0:
+                self.throttled_moves += 1
+                self.waited += wait
+
+        if wait > 0:
+            self._released.wait(wait)
+        if self.metrics:
+            self.metrics.observe('watchdog_throttle_wait_seconds', wait, root=root)
+        return wait
+
+    def release(self) -> None:
+        """Stop throttling (on shutdown, so queued moves drain at once)."""
+        self._released.set()
+
+
+class ArchivedEntry(NamedTuple):
+    """One file stored in a month archive."""
+
+    path: str
+    rule: Optional[str]
+    archive: str
+    member: str
+    month: str
+    size: int
+    mtime: float
+
+
+class ExportArchiver:
+    """
+    Low-priority background stage that moves aged exports into month archives.
+
+    Rules with an 'archive_after' setting (days) have their older files packed
+    into one zip per folder and month under base_exports/_Archive, with LZMA
+    (or deflate) compressed entries. A zip keeps a directory of its entries,
+    so a single file is read back without decompressing the rest. Every
+    archived file is indexed in SQLite by its original path. Rules with
+    'retain' (days) drop whole month archives once the month is that old.
+
+    Reads are paced by a byte-rate bucket and compression by a CPU duty
+    cycle, and the thread lowers its own scheduling priority where the OS
+    allows, so archiving never competes with live moves.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS archived (
+            path        TEXT PRIMARY KEY,
+            rule        TEXT,
+            archive     TEXT    NOT NULL,
+            member      TEXT    NOT NULL,
+            month       TEXT    NOT NULL,
+            size        INTEGER NOT NULL,
+            mtime       REAL    NOT NULL,
+            archived_at REAL    NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_archived_archive ON archived (archive);
+        CREATE INDEX IF NOT EXISTS idx_archived_rule ON archived (rule, month);
+    """
+
+    _COLUMNS = "path, rule, archive, member, month, size, mtime"
+
+    ARCHIVE_DIR = '_Archive'
+
+    def __init__(
+        self,
+        db_path: Path,
+        logger: logging.Logger,
+        compression: str = 'lzma',
+        bytes_per_second: float = 4 * 1024 * 1024,
+        cpu_share: float = 0.25,
+        interval: float = 3600.0,
+        chunk_size: int = 256 * 1024
+    ):
+        """
+        Open (or create) the archive index.
+
+        Args:
+            db_path: SQLite database file
+            logger: Logger instance for logging
+            compression: Entry compression: "lzma" or "deflate"
+            bytes_per_second: Most bytes read from exports per second
+            cpu_share: Fraction of one CPU the compression may use (0-1]
+            interval: Seconds between archiving passes
+            chunk_size: Bytes read and compressed per step
+        """
+        if compression == 'lzma' and lzma is None:
+            logger.warning("lzma is not available in this Python; archiving with deflate")
+            compression = 'deflate'
+        self.compress_type = zipfile.ZIP_LZMA if compression == 'lzma' else zipfile.ZIP_DEFLATED
+        self.logger = logger
+        self.bucket = TokenBucket(bytes_per_second, burst=chunk_size)
+        self.cpu_share = min(max(cpu_share, 0.01), 1.0)
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.archived_files = 0
+        self.archived_bytes = 0
+        self.expired_archives = 0
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # (base_exports, rules, catalog) per exports tree served
+        self._sources: List[Tuple[Path, Callable[[], 'RuleSet'], Optional[ExportCatalog]]] = []
+
+    def start(
+        self,
+        base_exports: Path,
+        rules: Callable[[], 'RuleSet'],
+        catalog: Optional[ExportCatalog] = None,
+        delay: float = 300.0
+    ) -> None:
+        """
+        Archive an exports tree, starting the archiving thread on the first call.
+
+        Later calls (one per profile) add their tree to the same thread.
+
+        Args:
+            base_exports: Root of the exports tree
+            rules: Returns the rules in effect (re-read every pass, so
+                reloads apply)
+            catalog: Catalog to drop archived files from
+            delay: Seconds to wait before the first pass, so startup work
+                finishes first
+        """
+        self._sources.append((base_exports, rules, catalog))
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(delay,), name="watchdog-archive", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the archiving thread (an archive being written is finished first)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self) -> None:
+        """Stop the thread and close the index."""
+        self.stop()
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, path: Path) -> Optional[ArchivedEntry]:
+        """
+        Where an archived file is stored.
+
+        Args:
+            path: Path the file had before it was archived
+
+        Returns:
+            ArchivedEntry, or None if the file was not archived
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM archived WHERE path = ?", (str(path),)
+            ).fetchone()
+        return ArchivedEntry(*row) if row else None
+
+    def find(self, rule: Optional[str] = None, month: Optional[str] = None) -> List[ArchivedEntry]:
+        """
+        Archived files of a rule and/or month ("YYYY-MM"), newest first.
+
+        Args:
+            rule: Rule name
+            month: Month the file was last modified in
+
+        Returns:
+            Matching entries
+        """
+        clauses = []
+        params: List[Any] = []
+        for column, value in (('rule', rule), ('month', month)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        sql = f"SELECT {self._COLUMNS} FROM archived"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY mtime DESC"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [ArchivedEntry(*row) for row in rows]
+
+    def restore(self, path: Path, dest: Optional[Path] = None) -> Path:
+        """
+        Extract one archived file; only its own entry is decompressed.
+
+        Args:
+            path: Path the file had before it was archived
+            dest: Where to write it (defaults to its original path)
+
+        Returns:
+            Path of the extracted file
+
+        Raises:
+            KeyError: If the file is not in the index
+            OSError: If the archive cannot be read
+        """
+        entry = self.lookup(path)
+        if entry is None:
+            raise KeyError(str(path))
+        dest = dest or Path(entry.path)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(entry.archive) as zf, zf.open(entry.member) as src, open(dest, 'wb') as out:
+            shutil.copyfileobj(src, out, self.chunk_size)
+        os.utime(dest, (entry.mtime, entry.mtime))
+        return dest
+
+    def run_once(self, base_exports: Path, rules: 'RuleSet', catalog: Optional[ExportCatalog] = None) -> int:
+        """
+        Archive aged files of every rule and apply retention.
+
+        Args:
+            base_exports: Root of the exports tree
+            rules: Rules in effect
+            catalog: Catalog to drop archived files from
+
+        Returns:
+            Number of files archived
+        """
+        configs = {**rules.legacy_rules, **rules.new_rules}
+        now = time.time()
+        archived = 0
+        for folder, (key, year_based) in rules.catalog_dirs(base_exports).items():
+            cfg = configs[key]
+            if self._stop.is_set():
+                break
+            if 'archive_after' in cfg:
+                cutoff = now - cfg['archive_after'] * 86400
+                archived += self._archive_folder(base_exports, folder, key, year_based, cutoff, catalog)
+        for key, cfg in configs.items():
+            if 'retain' in cfg and not self._stop.is_set():
+                self._expire(key, now - cfg['retain'] * 86400)
+        return archived
+
+    def _run(self, delay: float) -> None:
+        """Archiving thread: a pass over every tree each interval until stopped."""
+        if hasattr(os, 'setpriority'):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+            except OSError:
+                pass
+        if self._stop.wait(delay):
+            return
+        while True:
+            for base_exports, rules, catalog in list(self._sources):
+                if self._stop.is_set():
+                    return
+                start = time.perf_counter()
+                try:
+                    archived = self.run_once(base_exports, rules(), catalog)
+                    if archived:
+                        self.logger.info("Archived %s file(s) under %s in %.1fs",
+                                         archived, base_exports, time.perf_counter() - start)
+                except Exception as e:
+                    self.logger.error("Archiving pass over %s failed: %s", base_exports, e)
+            if self._stop.wait(self.interval):
+                return
+
+    def _archive_folder(
+        self,
+        base_exports: Path,
+        folder: str,
+        rule: str,
+        year_based: bool,
+        cutoff: float,
+        catalog: Optional[ExportCatalog]
+    ) -> int:
+        """Archive the files of one rule folder (and its year subfolders) modified before cutoff."""
+        root = base_exports / folder
+        folders = [root]
+        if year_based:
+            try:
+                with os.scandir(root) as entries:
+                    folders += [Path(e.path) for e in entries
+                                if e.is_dir(follow_symlinks=False) and re.fullmatch(r'\d{4}', e.name)]
+            except OSError:
+                return 0
+
+        archived = 0
+        for source in folders:
+            by_month: Dict[str, List[Tuple[Path, os.stat_result]]] = {}
+            try:
+                with os.scandir(source) as entries:
+                    for entry in entries:
+                        if not entry.is_file(follow_symlinks=False) or DownloadFilter.is_temporary(entry.name):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_mtime < cutoff:
+                            month = datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m')
+                            by_month.setdefault(month, []).append((Path(entry.path), st))
+            except OSError as e:
+                self.logger.warning("Archiver could not list '%s': %s", source, e)
+                continue
+            relative = source.relative_to(base_exports)
+            for month, files in sorted(by_month.items()):
+                if self._stop.is_set():
+                    return archived
+                archive = base_exports / self.ARCHIVE_DIR / relative / f"{month}.zip"
+                archived += self._archive_month(archive, month, rule, files, catalog)
+        return archived
+
+    def _archive_month(
+        self,
+        archive: Path,
+        month: str,
+        rule: str,
+        files: List[Tuple[Path, os.stat_result]],
+        catalog: Optional[ExportCatalog]
+    ) -> int:
+        """
+        Append files to a month archive, then index and remove the originals.
+
+        The zip is closed (its directory written) before anything is indexed
+        or removed, so an interrupted pass leaves the originals in place. A
+        member of the same name counts as this file only if its size and
+        CRC-32 match (stored by an interrupted pass); a different file of
+        that name is stored as name_1, name_2, ...
+        """
+        archive.parent.mkdir(parents=True, exist_ok=True)
+        written: List[Tuple[Path, os.stat_result, str]] = []
+        try:
+            with zipfile.ZipFile(archive, 'a', allowZip64=True) as zf:
+                members = {info.filename: (info.file_size, info.CRC) for info in zf.infolist()}
+                for path, st in files:
+                    if self._stop.is_set():
+                        break
+                    try:
+                        member = self._member_name(members, path, st)
+                        if member not in members:
+                            info = self._write_member(zf, path, st, member)
+                            members[member] = (info.file_size, info.CRC)
+                    except OSError as e:
+                        self.logger.warning("Could not archive '%s': %s", path.name, e)
+                        continue
+                    written.append((path, st, member))
+        except (OSError, zipfile.BadZipFile) as e:
+            self.logger.error("Could not write archive '%s': %s", archive, e)
+            return 0
+
+        archived = 0
+        for path, st, member in written:
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if (current.st_size, current.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+                self.logger.warning("'%s' changed while it was archived; keeping it", path.name)
+                continue
+            with self._lock:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO archived "
+                        "(path, rule, archive, member, month, size, mtime, archived_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (str(path), rule, str(archive), member, month, st.st_size, st.st_mtime, time.time())
+                    )
+            try:
+                os.unlink(path)
+            except OSError as e:
+                self.logger.warning("Archived '%s' but could not remove it: %s", path.name, e)
+                continue
+            if catalog is not None:
+                catalog.remove(path)
+            archived += 1
+            self.archived_files += 1
+            self.archived_bytes += st.st_size
+        return archived
+
+    def _member_name(self, members: Mapping[str, Tuple[int, int]], path: Path, st: os.stat_result) -> str:
+        """
+        Choose the archive member for a file.
+
+        Args:
+            members: Size and CRC-32 of every member already in the archive
+            path: File to archive
+            st: os.stat() of the file
+
+        Returns:
+            The member that already holds this file's content, or the first
+            free name (path.name, then name_1, name_2, ...)
+
+        Raises:
+            OSError: If the file cannot be read to compare it with a member
+        """
+        member = path.name
+        crc = None
+        counter = 0
+        while member in members:
+            size, member_crc = members[member]
+            if size == st.st_size:
+                if crc is None:
+                    crc = self._file_crc(path)
+                if member_crc == crc:
+                    return member
+            counter += 1
+            member = f"{path.stem}_{counter}{path.suffix}"
+        return member
+
+    def _file_crc(self, path: Path) -> int:
+        """CRC-32 of a file as stored in zip entries, read through the byte bucket."""
+        crc = 0
+        with open(path, 'rb') as src:
+            while True:
+                chunk = src.read(self.chunk_size)
+                if not chunk:
+                    return crc
+                self.bucket.consume(len(chunk), self._stop)
+                crc = zlib.crc32(chunk, crc)
+
+    def _write_member(self, zf: zipfile.ZipFile, path: Path, st: os.stat_result, member: str) -> zipfile.ZipInfo:
+        """Compress one file into the archive, paced by the byte bucket and the CPU duty cycle."""
+        info = zipfile.ZipInfo(member, date_time=time.localtime(st.st_mtime)[:6])
+        info.compress_type = self.compress_type
+        info.file_size = st.st_size
+        idle_per_busy = (1 - self.cpu_share) / self.cpu_share
+        with open(path, 'rb') as src, zf.open(info, 'w', force_zip64=st.st_size >= zipfile.ZIP64_LIMIT) as out:
+            while True:
+                chunk = src.read(self.chunk_size)
+                if not chunk:
+                    break
+                self.bucket.consume(len(chunk), self._stop)
+                busy = time.thread_time()
+                out.write(chunk)
+                busy = time.thread_time() - busy
+                if busy > 0 and idle_per_busy > 0:
+                    time.sleep(busy * idle_per_busy)
+        return info
+
+    def _expire(self, rule: str, cutoff: float) -> None:
+        """Delete the month archives of a rule whose month ended before cutoff."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT archive, month FROM archived WHERE rule = ?", (rule,)
+            ).fetchall()
+        for archive, month in rows:
+            year, mon = (int(part) for part in month.split('-'))
+            month_end = datetime(year + mon // 12, mon % 12 + 1, 1).timestamp()
+            if month_end >= cutoff:
+                continue
+            try:
+                os.unlink(archive)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.warning("Could not remove expired archive '%s': %s", archive, e)
+                continue
+            with self._lock:
+                with self._conn:
+                    self._conn.execute("DELETE FROM archived WHERE archive = ?", (archive,))
+            self.expired_archives += 1
+            self.logger.info("Retention: removed %s archive '%s'", rule, archive)
+
+
+class RetryScheduler:
+    """
+    Delay queue for moves that hit a locked or busy file.
+
+    Retries wait on a heap serviced by one timer thread instead of sleeping
+    on a worker, so a workbook left open in Excel costs no thread time between
+    attempts. Delays grow exponentially with jitter up to max_delay, and
+    retrying continues at that low rate until retry_window has passed.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        retry_window: float = 3600.0,
+        jitter: float = 0.25
+    ):
+        """
+        Initialize the RetryScheduler.
+
+        Args:
+            logger: Logger instance for logging
+            base_delay: Delay in seconds before the first retry
+            max_delay: Upper bound for the delay between retries
+            retry_window: Seconds after the first failure to keep retrying
+            jitter: Fraction of each delay that is randomized, so files that
+                failed together don't retry in lockstep
+        """
+        self.logger = logger
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_window = retry_window
+        self.jitter = jitter
+
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, Callable[..., Any], Tuple]] = []
+        self._seq = itertools.count()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending_count(self) -> int:
+        """Number of retries waiting for their due time."""
+        with self._cond:
+            return len(self._heap)
+
+    def next_delay(self, attempt: int) -> float:
+        """
+        Delay before the given retry attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed (1-based)
+
+        Returns:
+            Seconds to wait
+        """
+        delay = min(self.base_delay * (2 ** (attempt - 1)), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+    def start(self) -> None:
+        """Start the timer thread."""
+        self._thread = threading.Thread(target=self._run, name="watchdog-retry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the timer thread; pending retries are dropped."""
+        with self._cond:
+            self._stopping = True
+            pending = len(self._heap)
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+        if pending:
+            self.logger.info(
+                "Retry scheduler stopped with %s retr%s pending", pending, 'y' if pending == 1 else 'ies'
+            )
+
+    def schedule(self, delay: float, fn: Callable[..., Any], *args: Any) -> None:
+        """
+        Run fn(*args) on the timer thread after a delay.
+
+        The callable should only hand work off (e.g. re-queue a move); it must
+        not block, since it delays every other due retry.
+
+        Args:
+            delay: Seconds to wait
+            fn: Callable to run
+            *args: Arguments for the callable
+        """
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), fn, args))
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        """Timer loop: run whichever retry is due next."""
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._stopping:
+                    return
+                _, _, fn, args = heapq.heappop(self._heap)
+
+            try:
+                fn(*args)
+            except Exception as e:
+                self.logger.error("Error running scheduled retry: %s", e)
+
+
+class ExpiringCache:
+    """
+    Bounded map whose entries expire a fixed time after they were added.
+
+    Entries are kept in insertion order, so expired ones are always at the
+    front and are evicted lazily as new entries arrive. Insert, lookup and
+    eviction are O(1) amortized, and the size never exceeds max_size (the
+    oldest entry is dropped first).
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the ExpiringCache.
+
+        Args:
+            ttl: Seconds an entry stays live
+            max_size: Hard upper bound on the number of entries
+            clock: Time source (monotonic seconds)
+        """
+        self.ttl = ttl
+        self.max_size = max(1, max_size)
+        self.clock = clock
+        self._entries: 'OrderedDict[Any, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of stored entries (expired ones may linger until evicted)."""
+        return len(self._entries)
+
+    def __contains__(self, key: Any) -> bool:
+        """True if the key has a live entry."""
+        return self.get(key) is not None
+
+    def get(self, key: Any) -> Optional[Any]:
+        """
+        Look up a live entry.
+
+        Args:
+            key: Entry key
+
+        Returns:
+            The stored value, or None if the key is absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.clock() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def add(self, key: Any, value: Any = True) -> bool:
+        """
+        Insert a key unless a live entry already exists.
+
+        Args:
+            key: Entry key
+            value: Value to store (must not be None)
+
+        Returns:
+            True if the key was added, False if it was already live
+        """
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                return False
+            if entry is not None:
+                del self._entries[key]
+
+            self._entries[key] = (now, value)
+            self._evict(now)
+            return True
+
+    def discard(self, key: Any) -> None:
+        """
+        Remove a key if present.
+
+        Args:
+            key: Entry key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries from the front, then enforce the size bound."""
+        entries = self._entries
+        while entries:
+            oldest_key, (added, _) = next(iter(entries.items()))
+            if now - added < self.ttl and len(entries) <= self.max_size:
+                break
+            del entries[oldest_key]
+
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and latency histograms in Prometheus style.
+
+    Metrics are created on first use and keyed by name plus labels (e.g. the
+    rule name). Gauges are read from callbacks when the metrics are rendered,
+    so queue depths are always current without being pushed.
+    """
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+    HELP = {
+        'watchdog_detect_seconds': "Time to classify an event and start its work item",
+        'watchdog_ready_seconds': "Time from detection until the file stopped changing",
+        'watchdog_move_seconds': "Time spent moving a file (one attempt)",
+        'watchdog_total_seconds': "Time from detection until the file was filed",
+        'watchdog_write_to_filed_seconds': "Time from the file's last write until it was filed",
+        'watchdog_transfer_seconds': "Time spent transferring file data, by path type",
+        'watchdog_transfer_bytes_total': "Bytes moved, by path type",
+        'watchdog_moves_total': "Move attempts by outcome",
+        'watchdog_retries_total': "Retries scheduled for locked or busy files",
+        'watchdog_locked_total': "Move attempts that found the file locked",
+        'watchdog_failures_total': "Files that could not be moved",
+        'watchdog_dropped_total': "Files dropped because the service was stopping",
+        'watchdog_rule_reloads_total': "Rule file reloads by result",
+        'watchdog_hash_seconds': "Time spent hashing a file for duplicate detection",
+        'watchdog_validate_seconds': "Time spent checking a file's integrity before filing",
+        'watchdog_throttle_wait_seconds': "Time a move waited on the byte and operation rate limits, by root",
+        'watchdog_deferred_total': "Ready files parked because the move queue stayed full",
+    }
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize the MetricsRegistry.
+
+        Args:
+            buckets: Upper bounds (seconds) of the histogram buckets
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, List[float]]] = {}
+        self._gauges: Dict[str, Tuple[Callable[[], float], str, str]] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name: Metric name
+            amount: Value to add
+            **labels: Label values
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Record a value in a histogram.
+
+        Args:
+            name: Metric name
+            value: Observed value (seconds)
+            **labels: Label values
+        """
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # Per-bucket counts, then +Inf count, then sum
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def gauge(self, name: str, fn: Callable[[], float], help_text: str = '', kind: str = 'gauge') -> None:
+        """
+        Register a metric whose value is read from a callback at render time.
+
+        Args:
+            name: Metric name
+            fn: Callback returning the current value
+            help_text: Description for the HELP line
+            kind: "gauge", or "counter" for running totals kept elsewhere
+        """
+        with self._lock:
+            self._gauges[name] = (fn, help_text, kind)
+
+    def value(self, name: str, **labels: str) -> float:
+        """
+        Current value of a counter series (0 if never incremented).
+
+        Args:
+            name: Metric name
+            **labels: Label values
+
+        Returns:
+            Counter value
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            return self._counters.get(name, {}).get(key, 0.0)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        lines: List[str] = []
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            histograms = {n: {k: list(v) for k, v in s.items()} for n, s in self._histograms.items()}
+            gauges = dict(self._gauges)
+
+        for name in sorted(counters):
+            self._header(lines, name, 'counter', self.HELP.get(name, ''))
+            for key, value in sorted(counters[name].items()):
+                lines.append(f"{name}{self._labels(key)} {value:g}")
+
+        for name in sorted(histograms):
+            self._header(lines, name, 'histogram', self.HELP.get(name, ''))
+            for key, state in sorted(histograms[name].items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._labels(key, le=f'{bound:g}')} {cumulative:g}")
+                cumulative += state[len(self.buckets)]
+                lines.append(f"{name}_bucket{self._labels(key, le='+Inf')} {cumulative:g}")
+                lines.append(f"{name}_sum{self._labels(key)} {state[-1]:.6f}")
+                lines.append(f"{name}_count{self._labels(key)} {cumulative:g}")
+
+        for name in sorted(gauges):
+            fn, help_text, kind = gauges[name]
+            try:
+                value = float(fn())
+            except Exception:
+                continue
+            self._header(lines, name, kind, help_text)
+            lines.append(f"{name} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _header(lines: List[str], name: str, kind: str, help_text: str) -> None:
+        """Append HELP/TYPE lines for a metric."""
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    @staticmethod
+    def _labels(key: Tuple, **extra: str) -> str:
+        """Format a label set, e.g. {rule="Monthly_CAD",le="0.5"}."""
+        pairs = list(key) + list(extra.items())
+        if not pairs:
+            return ''
+        body = ','.join(
+            f'{k}="' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"' for k, v in pairs
+        )
+        return '{' + body + '}'
+
+
+class RuleMatch:
+    """
+    Result of classifying a filename against the export rules.
+    """
+
+    __slots__ = ('key', 'cfg', 'kind', 'keyword')
+
+    def __init__(self, key: str, cfg: Dict, kind: str, keyword: str):
+        """
+        Initialize the RuleMatch.
+
+        Args:
+            key: Name of the matching rule
+            cfg: Configuration dictionary for the rule
+            kind: "legacy" or "new"
+            keyword: Lowercased keyword that matched the filename ("" when
+                the rule was identified by the file's columns)
+        """
+        self.key = key
+        self.cfg = cfg
+        self.kind = kind
+        self.keyword = keyword
+
+
+class DownloadFilter:
+    """
+    Recognizes in-progress downloads and editor lock files by name.
+
+    Browsers write a download under a temporary name and rename it once it is
+    complete; Excel and LibreOffice drop lock files next to open workbooks.
+    None of these is ever an export, so they are dropped before classification.
+    """
+
+    # Chrome/Edge, temp files, Firefox, old IE/Edge, Safari, Opera
+    TEMP_SUFFIXES = frozenset(('.crdownload', '.tmp', '.part', '.partial', '.download', '.opdownload'))
+    # Excel owner files, LibreOffice locks, Word/Excel save temporaries
+    TEMP_PREFIXES = ('~$', '.~lock.', '~wrl')
+
+    @classmethod
+    def is_temporary(cls, name: str) -> bool:
+        """
+        Check whether a filename is a partial download or lock file.
+
+        Args:
+            name: Filename without directory
+
+        Returns:
+            True if the file should be ignored
+        """
+        lower = name.lower()
+        dot = lower.rfind('.')
+        if dot > 0 and lower[dot:] in cls.TEMP_SUFFIXES:
+            return True
+        return lower.startswith(cls.TEMP_PREFIXES)
+
+    @classmethod
+    def final_name(cls, name: str) -> Optional[str]:
+        """
+        Name a partial download will have once it is complete.
+
+        Args:
+            name: Temporary filename, e.g. "report.xlsx.crdownload"
+
+        Returns:
+            "report.xlsx", or None if the name carries no temporary suffix
+        """
+        dot = name.rfind('.')
+        if dot > 0 and name[dot:].lower() in cls.TEMP_SUFFIXES:
+            return name[:dot]
+        return None
+
+
+class ExportValidator:
+    """
+    Cheap integrity checks for exports, run before a file is filed.
+
+    Only a bounded amount of each file is read, so the cost barely grows with
+    file size:
+
+    - .xlsx: the zip end-of-central-directory record and the central
+      directory it points to (entry table only, nothing is decompressed).
+      A truncated download loses the end record; a damaged one has offsets
+      pointing past the data.
+    - .csv: the header and the last row. The last row must have as many
+      fields as the header, and neither end may contain NUL bytes (the zero
+      fill left by an interrupted pre-allocated download).
+    """
+
+    EOCD_SIGNATURE = b'PK\x05\x06'
+    ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+    CENTRAL_SIGNATURE = b'PK\x01\x02'
+    LOCAL_SIGNATURE = b'PK\x03\x04'
+    EOCD = struct.Struct('<4s4H2IH')
+    CENTRAL = struct.Struct('<4s6H3I5H2I')
+    # End record (22 bytes) plus the longest possible archive comment
+    EOCD_SEARCH = EOCD.size + 0xFFFF
+    REQUIRED_XLSX_ENTRIES = ('[Content_Types].xml', 'xl/workbook.xml')
+    CSV_DELIMITERS = ',;\t|'
+
+    def __init__(self, edge_bytes: int = 64 * 1024, max_directory_bytes: int = 4 * 1024 * 1024):
+        """
+        Initialize the ExportValidator.
+
+        Args:
+            edge_bytes: Bytes read from each end of a CSV file
+            max_directory_bytes: Largest zip central directory that is read;
+                bigger ones only get the end-record checks
+        """
+        self.edge_bytes = edge_bytes
+        self.max_directory_bytes = max_directory_bytes
+
+    def check(self, path: Path, st: os.stat_result) -> Optional[str]:
+        """
+        Validate a file by its extension.
+
+        Args:
+            path: File to check
+            st: os.stat() of the file
+
+        Returns:
+            Why the file is invalid, or None if it looks intact (or its type
+            is not checked)
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        suffix = path.suffix.lower()
+        if suffix not in ('.xlsx', '.csv'):
+            return None
+        if st.st_size == 0:
+            return "file is empty"
+        with open(path, 'rb') as f:
+            if suffix == '.xlsx':
+                return self._check_xlsx(f, st.st_size)
+            return self._check_csv(f, st.st_size)
+
+    def _check_xlsx(self, f, size: int) -> Optional[str]:
+        """
+        Check the zip structure of a workbook.
+
+        Args:
+            f: File opened for binary reading
+            size: File size in bytes
+
+        Returns:
+            Problem description, or None
+        """
+        if f.read(4) != self.LOCAL_SIGNATURE:
+            return "not a zip archive"
+
+        tail_start = max(0, size - self.EOCD_SEARCH)
+        f.seek(tail_start)
+        tail = f.read()
+        pos = tail.rfind(self.EOCD_SIGNATURE)
+        if pos < 0 or len(tail) - pos < self.EOCD.size:
+            return "zip end-of-central-directory record missing (truncated?)"
+        eocd_offset = tail_start + pos
+        (_, _, _, _, entries, cd_size, cd_offset, _) = self.EOCD.unpack_from(tail, pos)
+
+        if cd_offset == 0xFFFFFFFF or cd_size == 0xFFFFFFFF or entries == 0xFFFF:
+            # Zip64 (over 4 GB or 65535 entries): just require its locator
+            locator = pos - 20
+            if locator < 0 or tail[locator:locator + 4] != self.ZIP64_LOCATOR_SIGNATURE:
+                return "zip64 locator missing"
+            return None
+        if entries == 0:
+            return "zip archive is empty"
+        if cd_offset + cd_size > eocd_offset:
+            return "zip central directory extends past its end record (damaged)"
+        if cd_size > self.max_directory_bytes:
+            return None
+
+        if cd_offset >= tail_start:
+            directory = tail[cd_offset - tail_start:cd_offset - tail_start + cd_size]
+        else:
+            f.seek(cd_offset)
+            directory = f.read(cd_size)
+        if len(directory) != cd_size:
+            return "zip central directory is incomplete"
+
+        names = set()
+        offset = 0
+        for _ in range(entries):
+            if directory[offset:offset + 4] != self.CENTRAL_SIGNATURE:
+                return "zip central directory entry is damaged"
+            fields = self.CENTRAL.unpack_from(directory, offset)
+            compressed, name_len, extra_len, comment_len, local_offset = (
+                fields[8], fields[10], fields[11], fields[12], fields[16]
+            )
+            if local_offset + compressed > cd_offset:
+                return "zip entry data extends past the central directory (damaged)"
+            start = offset + self.CENTRAL.size
+            names.add(directory[start:start + name_len].decode('utf-8', 'replace'))
+            offset = start + name_len + extra_len + comment_len
+            if offset > cd_size:
+                return "zip central directory entry is damaged"
+
+        missing = [name for name in self.REQUIRED_XLSX_ENTRIES if name not in names]
+        if missing:
+            return f"workbook part missing: {', '.join(missing)}"
+        return None
+
+    def _check_csv(self, f, size: int) -> Optional[str]:
+        """
+        Check the header and last row of a CSV file.
+
+        Args:
+            f: File opened for binary reading
+            size: File size in bytes
+
+        Returns:
+            Problem description, or None
+        """
+        head = f.read(self.edge_bytes)
+        if b'\0' in head:
+            return "binary data (NUL bytes) at the start of the file"
+        header, newline, _ = head.partition(b'\n')
+        if not newline and size > len(head):
+            return f"header row is longer than {self.edge_bytes} bytes"
+        header_text = header.decode('utf-8-sig', 'replace').rstrip('\r')
+        if not header_text.strip():
+            return "header row is empty"
+        if not newline:
+            return None  # header only
+
+        in_quotes = False
+        if size > len(head):
+            f.seek(max(0, size - self.edge_bytes))
+            tail = f.read()
+            if b'\0' in tail:
+                return "file ends in NUL bytes (truncated download?)"
+            # Drop the partial line the tail window starts in
+            tail = tail.partition(b'\n')[2]
+            # The window may start inside a quoted field that holds line
+            # breaks; an intact file then has an odd number of quotes left
+            in_quotes = tail.count(b'"') % 2 == 1
+        else:
+            tail = head.partition(b'\n')[2]
+        tail_text = tail.decode('utf-8', 'replace')
+        if not tail_text.strip():
+            return None  # header only
+
+        delimiter = max(self.CSV_DELIMITERS, key=header_text.count)
+        expected = len(next(csv.reader([header_text], delimiter=delimiter)))
+        if in_quotes:
+            # Parse from inside the quoted field; the first row is only the
+            # end of a record, so nothing can be said if it is the last one
+            tail_text = '"' + tail_text
+        rows = [row for row in csv.reader(tail_text.splitlines(), delimiter=delimiter) if row]
+        last_row = rows[-1] if len(rows) > in_quotes else None
+        if expected > 1 and last_row is not None and len(last_row) < expected:
+            return f"last row has {len(last_row)} of {expected} fields (truncated?)"
+        return None
+
+
+class FileProfile:
+    """
+    What ContentSniffer read from a file: its column headers and a sample of rows.
+    """
+
+    __slots__ = ('columns', 'rows', 'created_year')
+
+    def __init__(self, columns: Tuple[str, ...], rows: List[List[Any]], created_year: Optional[int] = None):
+        """
+        Initialize the FileProfile.
+
+        Args:
+            columns: Normalized column headers
+            rows: Sampled data rows (text, or numbers for xlsx numeric cells)
+            created_year: Year from the workbook properties, if any
+        """
+        self.columns = columns
+        self.rows = rows
+        self.created_year = created_year
+
+    def year_range(self, date_column: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """
+        Earliest and latest year found in the sampled dates.
+
+        The rule's date_column is used if given; otherwise the first column
+        whose header mentions a date or time, then any column holding dates.
+        Workbooks without dates fall back to their creation year.
+
+        Args:
+            date_column: Normalized header of the column holding the dates
+
+        Returns:
+            (first year, last year), or None if no date was found
+        """
+        if date_column is not None and date_column in self.columns:
+            dated = [self.columns.index(date_column)]
+            others: List[int] = []
+        else:
+            dated = [i for i, c in enumerate(self.columns) if 'date' in c or 'time' in c]
+            others = [i for i in range(len(self.columns)) if i not in dated]
+
+        for index, serials in [(i, True) for i in dated] + [(i, False) for i in others]:
+            years = [year for row in self.rows if index < len(row)
+                     for year in [ContentSniffer.value_year(row[index], serials)] if year]
+            if years:
+                return min(years), max(years)
+        if self.created_year:
+            return self.created_year, self.created_year
+        return None
+
+
+class ContentSniffer:
+    """
+    Reads just enough of a CSV or xlsx file to identify the report it holds.
+
+    CSV files: the first head_bytes (header and first rows) and the last
+    tail_bytes (last rows, for the end of the date range). Workbooks are
+    read through streaming zip access: docProps/core.xml, the first sheet
+    up to sample_rows rows, and only as much of the shared strings table as
+    those rows refer to. Profiles are cached by (path, size, mtime), so
+    repeated events for an unchanged file never read it again.
+    """
+
+    EXTENSIONS = frozenset(('.csv', '.xlsx'))
+    CSV_DELIMITERS = ',;\t|'
+    DATE_PATTERN = re.compile(
+        r'(?<!\d)(?:(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})|(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}))(?!\d)'
+    )
+    EXCEL_EPOCH = datetime(1899, 12, 30)
+
+    MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+    REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+    PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+    DCTERMS_CREATED = '{http://purl.org/dc/terms/}created'
+
+    def __init__(
+        self,
+        head_bytes: int = 16 * 1024,
+        tail_bytes: int = 4 * 1024,
+        sample_rows: int = 50,
+        max_entries: int = 2048
+    ):
+        """
+        Initialize the ContentSniffer.
+
+        Args:
+            head_bytes: Bytes read from the start of a CSV file
+            tail_bytes: Bytes read from the end of a CSV file
+            sample_rows: Worksheet rows read from a workbook (header included)
+            max_entries: File profiles remembered
+        """
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.sample_rows = sample_rows
+        self._profiles = ExpiringCache(24 * 3600, max_size=max_entries)
+        self.reads = 0
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Fold a column header for comparison: collapse whitespace, lowercase."""
+        return ' '.join(name.split()).lower()
+
+    @classmethod
+    def value_year(cls, value: Any, serials: bool) -> Optional[int]:
+        """
+        Year of a date value.
+
+        Args:
+            value: Cell text, or a number from an xlsx numeric cell
+            serials: Treat numbers as Excel date serials (date columns only)
+
+        Returns:
+            Year, or None if the value is not a date
+        """
+        if isinstance(value, float):
+            if serials and 1 <= value < 2958466:
+                return (cls.EXCEL_EPOCH + timedelta(days=value)).year
+            return None
+        m = cls.DATE_PATTERN.search(value)
+        if m is None:
+            return None
+        if m.group(1):
+            year, month, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        else:
+            year, month, day = int(m.group(6)), int(m.group(4)), int(m.group(5))
+            if month > 12:  # day first
+                month, day = day, month
+        if 1900 <= year <= 2999 and 1 <= month <= 12 and 1 <= day <= 31:
+            return year
+        return None
+
+    def profile(self, path: Path, st: os.stat_result) -> Optional[FileProfile]:
+        """
+        Read (or recall) the columns and sample rows of a file.
+
+        Args:
+            path: CSV or xlsx file
+            st: os.stat() of the file
+
+        Returns:
+            FileProfile, or None if the file type is not sniffed or the file
+            could not be parsed
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        suffix = path.suffix.lower()
+        if suffix not in self.EXTENSIONS:
+            return None
+        key = (str(path), st.st_size, st.st_mtime_ns)
+        cached = self._profiles.get(key)
+        if cached is not None:
+            return cached or None
+
+        self.reads += 1
+        try:
+            if suffix == '.csv':
+                profile = self._read_csv(path, st.st_size)
+            else:
+                profile = self._read_xlsx(path)
+        except (zipfile.BadZipFile, ElementTree.ParseError, KeyError, ValueError, csv.Error,
+                RuntimeError, NotImplementedError):
+            profile = None
+        # False marks a file that was read but could not be profiled
+        self._profiles.add(key, profile or False)
+        return profile
+
+    def _read_csv(self, path: Path, size: int) -> Optional[FileProfile]:
+        """
+        Profile a CSV file from its first and last few KB.
+
+        Args:
+            path: CSV file
+            size: File size in bytes
+
+        Returns:
+            FileProfile, or None if there is no header row
+        """
+        with open(path, 'rb') as f:
+            head = f.read(self.head_bytes)
+            tail = b''
+            if size > self.head_bytes:
+                f.seek(max(self.head_bytes, size - self.tail_bytes))
+                tail = f.read()
+        if size > self.head_bytes:
+            # Drop the partial lines at the edges of the two windows
+            head = head[:head.rfind(b'\n') + 1]
+            tail = tail.partition(b'\n')[2]
+
+        lines = head.decode('utf-8-sig', 'replace').splitlines()
+        if not lines or not lines[0].strip():
+            return None
+        delimiter = max(self.CSV_DELIMITERS, key=lines[0].count)
+        rows = list(csv.reader(lines, delimiter=delimiter))
+        rows += csv.reader(tail.decode('utf-8', 'replace').splitlines(), delimiter=delimiter)
+        columns = tuple(self.normalize(c) for c in rows[0])
+        return FileProfile(columns, [row for row in rows[1:] if row])
+
+    def _read_xlsx(self, path: Path) -> Optional[FileProfile]:
+        """
+        Profile a workbook: properties, first sheet header and first rows.
+
+        Args:
+            path: xlsx file
+
+        Returns:
+            FileProfile, or None if the first sheet has no rows
+        """
+        with zipfile.ZipFile(path) as zf:
+            names = set(zf.namelist())
+            created_year = None
+            if 'docProps/core.xml' in names:
+                created = ElementTree.fromstring(zf.read('docProps/core.xml')).find(self.DCTERMS_CREATED)
+                if created is not None and created.text and created.text[:4].isdigit():
+                    created_year = int(created.text[:4])
+
+            rows, shared_needed = self._read_sheet(zf, self._first_sheet(zf, names))
+            if not rows:
+                return None
+            if shared_needed:
+                # Indexes into a missing (or short) table resolve to empty text
+                strings: List[str] = []
+                if 'xl/sharedStrings.xml' in names:
+                    strings = self._read_shared_strings(zf, max(shared_needed))
+                for row in rows:
+                    for i, value in enumerate(row):
+                        if isinstance(value, int):
+                            row[i] = strings[value] if value < len(strings) else ''
+
+        header = rows[0]
+        return FileProfile(tuple(self.normalize(str(c)) for c in header), rows[1:], created_year)
+
+    def _first_sheet(self, zf: zipfile.ZipFile, names: Set[str]) -> str:
+        """Path inside the archive of the workbook's first worksheet."""
+        workbook = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+        sheet = workbook.find(f'{self.MAIN_NS}sheets/{self.MAIN_NS}sheet')
+        if sheet is not None and 'xl/_rels/workbook.xml.rels' in names:
+            rel_id = sheet.get(f'{self.REL_NS}id')
+            rels = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+            for rel in rels.iter(f'{self.PKG_REL_NS}Relationship'):
+                if rel.get('Id') == rel_id:
+                    target = rel.get('Target', '')
+                    return target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+        return 'xl/worksheets/sheet1.xml'
+
+    def _read_sheet(self, zf: zipfile.ZipFile, sheet_path: str) -> Tuple[List[List[Any]], Set[int]]:
+        """
+        Stream the first sample_rows rows of a worksheet.
+
+        Shared-string cells are returned as their int index (resolved by the
+        caller); numeric cells as floats; everything else as text.
+
+        Returns:
+            (rows, shared string indexes used)
+        """
+        rows: List[List[Any]] = []
+        shared: Set[int] = set()
+        cell_tag = f'{self.MAIN_NS}c'
+        row_tag = f'{self.MAIN_NS}row'
+        with zf.open(sheet_path) as stream:
+            for _, elem in ElementTree.iterparse(stream, events=('end',)):
+                if elem.tag != row_tag:
+                    continue
+                row: List[Any] = []
+                for cell in elem.iter(cell_tag):
+                    column = self._column_index(cell.get('r', ''))
+                    if column is None:
+                        column = len(row)
+                    row.extend([''] * (column + 1 - len(row)))
+                    row[column] = self._cell_value(cell, shared)
+                rows.append(row)
+                elem.clear()
+                if len(rows) >= self.sample_rows:
+                    break
+        return rows, shared
+
+    def _cell_value(self, cell: ElementTree.Element, shared: Set[int]) -> Any:
+        """Value of one worksheet cell (see _read_sheet)."""
+        kind = cell.get('t', 'n')
+        if kind == 'inlineStr':
+            return ''.join(t.text or '' for t in cell.iter(f'{self.MAIN_NS}t'))
+        v = cell.find(f'{self.MAIN_NS}v')
+        text = v.text if v is not None and v.text else ''
+        if kind == 's' and text.isdigit():
+            shared.add(int(text))
+            return int(text)
+        if kind == 'n' and text:
+            try:
+                return float(text)
+            except ValueError:
+                return text
+        return text
+
+    @staticmethod
+    def _column_index(ref: str) -> Optional[int]:
+        """Zero-based column of a cell reference like "C7"."""
+        index = 0
+        for ch in ref:
+            if not ch.isalpha():
+                break
+            index = index * 26 + (ord(ch.upper()) - 64)
+        return index - 1 if index else None
+
+    def _read_shared_strings(self, zf: zipfile.ZipFile, last: int) -> List[str]:
+        """Stream the shared strings table up to index `last`."""
+        strings: List[str] = []
+        item_tag = f'{self.MAIN_NS}si'
+        text_tag = f'{self.MAIN_NS}t'
+        with zf.open('xl/sharedStrings.xml') as stream:
+            for _, elem in ElementTree.iterparse(stream, events=('end',)):
+                if elem.tag != item_tag:
+                    continue
+                strings.append(''.join(t.text or '' for t in elem.iter(text_tag)))
+                elem.clear()
+                if len(strings) > last:
+                    break
+        return strings
+
+
+class MoveJob:
+    """
+    One file working its way through readiness, the move queue and retries.
+
+    Carries the timestamps used for per-stage latency metrics.
+    """
+
+    __slots__ = ('path', 'match', 'detected_at', 'ready_at', 'filed_at', 'attempt', 'first_failure')
+
+    def __init__(self, path: Path, match: Optional[RuleMatch]):
+        """
+        Initialize the MoveJob.
+
+        Args:
+            path: Path to the matched file
+            match: Classification result for the file; None until the
+                content sniffer has identified a file its name did not match
+        """
+        self.path = path
+        self.match = match
+        self.detected_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.filed_at: Optional[float] = None
+        self.attempt = 1
+        self.first_failure: Optional[float] = None
+
+
+class RuleMatcher:
+    """
+    Precompiled single-pass classifier for export filenames.
+
+    All rule keywords are folded into one trie-shaped regex at construction
+    time, so a filename is scanned once no matter how many rules exist. When
+    several keywords match, the longest one wins (so "ResponseTime_CAD" beats
+    "ResponseTime"); ties go to the rule defined first, legacy rules before
+    new rules, as in the original rule order.
+    """
+
+    def __init__(self, legacy_rules: Dict[str, Dict], new_rules: Dict[str, Dict]):
+        """
+        Compile the matcher.
+
+        Args:
+            legacy_rules: Legacy rule configurations keyed by rule name
+            new_rules: Year-based rule configurations keyed by rule name
+        """
+        # (priority, key, cfg, kind, extensions) per rule
+        entries = []
+        keyword_rules: Dict[str, list] = {}
+
+        rule_sets = [('legacy', legacy_rules), ('new', new_rules)]
+        for kind, rules in rule_sets:
+            for key, cfg in rules.items():
+                entry = (len(entries), key, cfg, kind, frozenset(cfg['extensions']))
+                entries.append(entry)
+                keywords = [key] if kind == 'legacy' else cfg['keywords']
+                for keyword in {k.lower() for k in keywords}:
+                    keyword_rules.setdefault(keyword, []).append(entry)
+
+        self.rule_count = len(entries)
+        self.extensions = frozenset(ext for entry in entries for ext in entry[4])
+
+        # Rules that can also be recognized by their column headers
+        self._signatures = [(entry, frozenset(entry[2]['signature'])) for entry in entries
+                            if entry[2].get('signature')]
+        self.signature_extensions = frozenset(
+            ext for entry, _ in self._signatures for ext in entry[4]
+        ) & ContentSniffer.EXTENSIONS
+
+        # The regex reports the longest keyword starting at each position;
+        # shorter keywords that are prefixes of it are ranked alongside it.
+        self._candidates: Dict[str, list] = {}
+        for keyword in keyword_rules:
+            ranked = []
+            for length in range(1, len(keyword) + 1):
+                other = keyword[:length]
+                for entry in keyword_rules.get(other, ()):
+                    ranked.append((length, entry[0], other, entry))
+            ranked.sort(key=lambda c: (-c[0], c[1]))
+            self._candidates[keyword] = ranked
+
+        if keyword_rules:
+            trie = self._build_trie_pattern(sorted(keyword_rules))
+            self._pattern = re.compile(f"(?=({trie}))")
+        else:
+            self._pattern = None
+
+    @staticmethod
+    def _build_trie_pattern(words: list) -> str:
+        """
+        Build a regex that matches the longest of the given words.
+
+        Args:
+            words: Lowercased keywords
+
+        Returns:
+            Regex source with common prefixes factored out
+        """
+        trie: Dict[str, Dict] = {}
+        for word in words:
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+
+        def build(node: Dict[str, Dict]) -> str:
+            branches = [re.escape(ch) + build(child) for ch, child in node.items() if ch]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            # Greedy optional tail: prefer the longer keyword when both fit
+            return f"(?:{body})?" if '' in node else body
+
+        return build(trie)
+
+    def match(self, filename: str) -> Optional[RuleMatch]:
+        """
+        Classify a filename.
+
+        Args:
+            filename: Name of the file (not the full path)
+
+        Returns:
+            RuleMatch for the best matching rule, or None if no rule applies
+        """
+        name_lower = filename.lower()
+        dot = name_lower.rfind('.')
+        ext = name_lower[dot:] if dot >= 0 else ''
+        if ext not in self.extensions or self._pattern is None:
+            return None
+
+        best = None
+        best_score = None
+        for m in self._pattern.finditer(name_lower):
+            for length, priority, keyword, entry in self._candidates[m.group(1)]:
+                if ext in entry[4]:
+                    score = (length, -priority)
+                    if best_score is None or score > best_score:
+                        best_score = score
+                        best = (entry, keyword)
+                    break
+
+        if best is None:
+            return None
+        (_, key, cfg, kind, _), keyword = best
+        return RuleMatch(key, cfg, kind, keyword)
+
+    def match_columns(self, filename: str, columns: Tuple[str, ...]) -> Optional[RuleMatch]:
+        """
+        Classify a file by its column headers, for names no keyword matches.
+
+        A rule matches when every column of its signature is present; the
+        rule with the longest signature wins, ties going to rule order.
+
+        Args:
+            filename: Name of the file (its extension must suit the rule)
+            columns: Normalized column headers (see ContentSniffer.normalize)
+
+        Returns:
+            RuleMatch for the best matching rule, or None
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        present = set(columns)
+        best = None
+        for entry, signature in self._signatures:
+            if ext in entry[4] and signature <= present:
+                if best is None or len(signature) > len(best[1]):
+                    best = (entry, signature)
+        if best is None:
+            return None
+        _, key, cfg, kind, _ = best[0]
+        return RuleMatch(key, cfg, kind, '')
+
+
+class _ScopeNode:
+    """One folder of a ScopeTrie, with the settings in effect there."""
+
+    __slots__ = ('children', 'rules', 'recursive', 'excluded', 'ignore', 'walk')
+
+    def __init__(
+        self,
+        rules: Optional[FrozenSet[str]] = None,
+        recursive: bool = False,
+        excluded: bool = False,
+        ignore: Optional[Pattern] = None
+    ):
+        self.children: Dict[str, '_ScopeNode'] = {}
+        self.rules = rules
+        self.recursive = recursive
+        self.excluded = excluded
+        self.ignore = ignore
+        # Set by ScopeTrie: this folder or one below it is watched
+        self.walk = not excluded
+
+    def allows(self, rule: str) -> bool:
+        """Check whether files here may be filed by a rule."""
+        return self.rules is None or rule in self.rules
+
+    def child(self, name: str) -> '_ScopeNode':
+        """Settings inherited by an undeclared subfolder."""
+        excluded = (self.excluded or not self.recursive
+                    or (self.ignore is not None and self.ignore.match(name) is not None))
+        return _ScopeNode(self.rules, self.recursive, excluded, self.ignore)
+
+
+class ScopeTrie:
+    """
+    Which folders below the monitored folders are watched, and for which rules.
+
+    Built from the "scopes" section of the rule file. Each scope names a
+    monitored folder, optionally followed by a subfolder path
+    ("downloads/Reports/2025"), and sets for that subtree:
+
+    - recursive: subfolders not named by a scope of their own are watched too
+    - rules: only these rules file the files found there
+    - exclude: the subtree is not watched (a scope below it can re-include
+      part of it)
+    - ignore: folder name patterns (* and ?) skipped anywhere below
+
+    Settings are inherited down the tree and resolved once when the trie is
+    built. Without scopes every monitored folder is watched on its own, for
+    every rule, as before.
+
+    lookup() runs for every event before the file is classified, so events
+    from pruned subtrees cost a dirname and a dictionary hit.
+    """
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, roots: Mapping[str, Path], scopes: Optional[Mapping[str, Mapping]] = None):
+        """
+        Initialize the ScopeTrie.
+
+        Args:
+            roots: Monitored folder for each name scopes may start with
+            scopes: Validated scope settings keyed by "folder[/sub/path]"
+                (see RuleSet.from_dict)
+        """
+        self._default = _ScopeNode()
+        self._roots: Dict[str, _ScopeNode] = {}
+        self._prefixes: List[Tuple[str, _ScopeNode]] = []
+        self._cache: Dict[str, Optional[_ScopeNode]] = {}
+        named = {name: self._root(path) for name, path in roots.items()}
+
+        # Shallow scopes first, so a node's parent is final before it inherits
+        for key, spec in sorted((scopes or {}).items(), key=lambda item: item[0].count('/')):
+            name, _, sub = key.partition('/')
+            node = named[name]
+            for part in filter(None, sub.split('/')):
+                part = os.path.normcase(part)
+                child = node.children.get(part)
+                if child is None:
+                    child = node.children[part] = node.child(part)
+                node = child
+            self._apply(node, spec)
+        for node in self._roots.values():
+            self._mark_walk(node)
+
+    def _root(self, path: Path) -> _ScopeNode:
+        """Add a monitored folder."""
+        key = os.path.normcase(str(path))
+        node = self._roots.get(key)
+        if node is None:
+            node = self._roots[key] = _ScopeNode()
+            self._prefixes.append((key.rstrip(os.sep) + os.sep, node))
+        return node
+
+    @staticmethod
+    def _apply(node: _ScopeNode, spec: Mapping) -> None:
+        """Set a declared scope on its node, on top of what it inherited."""
+        node.excluded = bool(spec.get('exclude', False))
+        if 'recursive' in spec:
+            node.recursive = bool(spec['recursive'])
+        if 'rules' in spec:
+            node.rules = frozenset(spec['rules'])
+        patterns = spec.get('ignore')
+        if patterns:
+            inherited = [node.ignore.pattern] if node.ignore is not None else []
+            regex = '|'.join(inherited + [fnmatch.translate(os.path.normcase(p)) for p in patterns])
+            node.ignore = re.compile(regex)
+
+    @classmethod
+    def _mark_walk(cls, node: _ScopeNode) -> bool:
+        """Set walk on a node and its children; returns the node's value."""
+        below = False
+        for child in node.children.values():
+            below = cls._mark_walk(child) or below
+        node.walk = not node.excluded or below
+        return node.walk
+
+    def _locate(self, folder: str) -> Tuple[_ScopeNode, List[str]]:
+        """
+        Find the deepest node on a folder's path.
+
+        Returns:
+            (node, names of the folders below it); the default node for
+            folders outside every monitored folder
+        """
+        key = os.path.normcase(folder)
+        node = self._roots.get(key)
+        if node is not None:
+            return node, []
+        for prefix, root in self._prefixes:
+            if key.startswith(prefix):
+                node = root
+                rest = key[len(prefix):].split(os.sep)
+                for i, part in enumerate(rest):
+                    child = node.children.get(part)
+                    if child is None:
+                        return node, rest[i:]
+                    node = child
+                return node, []
+        return self._default, []
+
+    def lookup(self, folder: str) -> Optional[_ScopeNode]:
+        """
+        Settings for files directly in a folder.
+
+        Args:
+            folder: Folder holding the file (os.path.dirname of its path)
+
+        Returns:
+            Node whose rules apply, or None if files there are ignored
+        """
+        try:
+            return self._cache[folder]
+        except KeyError:
+            pass
+        node, rest = self._locate(folder)
+        for part in rest:
+            node = node.child(part)
+            if node.excluded:
+                break
+        found = None if node.excluded else node
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[folder] = found
+        return found
+
+    def walks(self, folder: str) -> bool:
+        """
+        Check whether a folder has to be watched or scanned.
+
+        True for folders whose files are handled and for folders on the way
+        to a watched scope.
+
+        Args:
+            folder: Full path of the folder
+        """
+        node, rest = self._locate(folder)
+        if not rest:
+            return node.walk
+        return self.lookup(folder) is not None
+
+    def descends(self, folder: str) -> bool:
+        """
+        Check whether any subfolder of a folder can be watched.
+
+        Args:
+            folder: Full path of a watched folder
+
+        Returns:
+            False when the folder is watched on its own (no recursion needed)
+        """
+        node, rest = self._locate(folder)
+        if rest:
+            return self.lookup(folder) is not None and node.recursive
+        return (node.recursive and not node.excluded) or any(c.walk for c in node.children.values())
+
+
+class RuleSet:
+    """
+    Validated, compiled routing rules.
+
+    Built from a rule file (JSON, or TOML on Python 3.11+) and never modified
+    afterwards: rule configurations are read-only mappings and the matcher is
+    compiled once. A reload builds a new RuleSet and swaps it in whole, so
+    an event is always classified and routed by one consistent set of rules.
+    """
+
+    FOLDERS = ('desktop', 'onedrive_downloads', 'downloads')
+    YEAR_STRATEGIES = ('start', 'end_range')
+
+    LEGACY_REQUIRED = {'dest', 'format'}
+    LEGACY_OPTIONAL = {
+        'src', 'suffix', 'type', 'overwrite', 'remove_trailing_numbers', 'quiet_period',
+        'signature', 'date_column', 'archive_after', 'retain', 'extensions',
+    }
+    YEAR_REQUIRED = {'keywords', 'target_dir', 'year_strategy', 'format'}
+    YEAR_OPTIONAL = {
+        'detect_type', 'quiet_period', 'signature', 'date_column', 'archive_after', 'retain', 'extensions',
+    }
+    SCOPE_OPTIONAL = {'recursive', 'rules', 'exclude', 'ignore'}
+
+    def __init__(
+        self,
+        legacy_rules: Dict[str, Dict],
+        new_rules: Dict[str, Dict],
+        source: Optional[Path] = None,
+        scopes: Optional[ScopeTrie] = None
+    ):
+        """
+        Initialize the RuleSet from already-resolved rule configurations.
+
+        Args:
+            legacy_rules: Legacy rule configurations keyed by rule name
+            new_rules: Year-based rule configurations keyed by rule name
+            source: File the rules were loaded from, if any
+            scopes: Watched subtrees and the rules allowed in them (default:
+                the monitored folders only, every rule)
+        """
+        self.legacy_rules: Mapping[str, Mapping] = MappingProxyType(
+            {key: MappingProxyType(dict(cfg, name=key)) for key, cfg in legacy_rules.items()}
+        )
+        self.new_rules: Mapping[str, Mapping] = MappingProxyType(
+            {key: MappingProxyType(dict(cfg, name=key)) for key, cfg in new_rules.items()}
+        )
+        self.matcher = RuleMatcher(self.legacy_rules, self.new_rules)
+        self.source = source
+        self.scopes = scopes or ScopeTrie({})
+
+    def __len__(self) -> int:
+        return len(self.legacy_rules) + len(self.new_rules)
+
+    def catalog_dirs(self, base_exports: Path) -> Dict[str, Tuple[str, bool]]:
+        """
+        Destination folder of every rule, for ExportCatalog.build().
+
+        Args:
+            base_exports: Base directory that rule destinations are relative to
+
+        Returns:
+            Folder relative to base_exports (POSIX style) -> (rule name,
+            files are filed in year subfolders)
+        """
+        dirs: Dict[str, Tuple[str, bool]] = {}
+        for key, cfg in self.legacy_rules.items():
+            dirs[cfg['dest'].relative_to(base_exports).as_posix()] = (key, False)
+        for key, cfg in self.new_rules.items():
+            dirs[Path(cfg['target_dir']).as_posix()] = (key, True)
+        # Response-time files detected as CAD or RMS are filed outside their target_dir
+        for key, cfg in self.new_rules.items():
+            if cfg['detect_type']:
+                dirs.setdefault('_CAD/response_time', (key, True))
+                dirs.setdefault('_RMS/response_time', (key, True))
+        return dirs
+
+    @classmethod
+    def load(cls, path: Path, base_exports: Path, folders: Dict[str, Path]) -> 'RuleSet':
+        """
+        Read, validate and compile a rule file.
+
+        Args:
+            path: Rule file (.json or .toml)
+            base_exports: Base directory that rule destinations are relative to
+            folders: Monitored folder for each name in FOLDERS
+
+        Returns:
+            Compiled RuleSet
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file cannot be parsed or a rule is invalid
+        """
+        data = cls.read_file(path)
+        return cls.from_dict(data, base_exports, folders, source=path)
+
+    @staticmethod
+    def read_file(path: Path) -> Dict:
+        """
+        Parse a rule file.
+
+        Args:
+            path: Rule file (.json or .toml)
+
+        Returns:
+            Parsed document
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file cannot be parsed
+        """
+        if path.suffix.lower() == '.toml':
+            if tomllib is None:
+                raise ValueError(f"{path.name}: TOML rule files need Python 3.11 or newer; use JSON")
+            with open(path, 'rb') as f:
+                return tomllib.load(f)
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Dict,
+        base_exports: Path,
+        folders: Dict[str, Path],
+        source: Optional[Path] = None
+    ) -> 'RuleSet':
+        """
+        Validate a parsed rule document and compile it.
+
+        Args:
+            data: Document with "legacy" and "year_based" tables of rules,
+                and optionally a "scopes" table of watched subtrees
+            base_exports: Base directory that rule destinations are relative to
+            folders: Monitored folder for each name in FOLDERS
+            source: File the rules were loaded from, if any
+
+        Returns:
+            Compiled RuleSet
+
+        Raises:
+            ValueError: If a rule is invalid
+        """
+        if not isinstance(data, dict):
+            raise ValueError("rule file must contain a table/object")
+        unknown = set(data) - {'legacy', 'year_based', 'scopes'}
+        if unknown:
+            raise ValueError(f"unknown section(s): {', '.join(sorted(unknown))}")
+
+        legacy_rules: Dict[str, Dict] = {}
+        for key, raw in cls._section(data, 'legacy').items():
+            cfg = cls._check_keys('legacy', key, raw, cls.LEGACY_REQUIRED, cls.LEGACY_OPTIONAL)
+            src = cfg.get('src')
+            if src is not None and src not in folders:
+                raise ValueError(f"legacy rule '{key}': src must be one of {', '.join(cls.FOLDERS)}")
+            legacy_rules[key] = {
+                'src': folders[src] if src is not None else None,
+                'dest': base_exports / cls._relative_dir('legacy', key, 'dest', cfg['dest']),
+                'suffix': cls._text('legacy', key, 'suffix', cfg.get('suffix', key)),
+                'type': cls._text('legacy', key, 'type', cfg.get('type', key)),
+                'format': cls._format('legacy', key, cfg['format']),
+                'year_based': False,
+                'overwrite': bool(cfg.get('overwrite', False)),
+                'remove_trailing_numbers': bool(cfg.get('remove_trailing_numbers', False)),
+            }
+            cls._extensions('legacy', key, cfg, legacy_rules[key])
+            cls._quiet_period('legacy', key, cfg, legacy_rules[key])
+            cls._signature('legacy', key, cfg, legacy_rules[key])
+            cls._archive('legacy', key, cfg, legacy_rules[key])
+
+        new_rules: Dict[str, Dict] = {}
+        for key, raw in cls._section(data, 'year_based').items():
+            cfg = cls._check_keys('year-based', key, raw, cls.YEAR_REQUIRED, cls.YEAR_OPTIONAL)
+            if key in legacy_rules:
+                raise ValueError(f"rule name '{key}' is used by both a legacy and a year-based rule")
+            keywords = cfg['keywords']
+            if (not isinstance(keywords, list) or not keywords
+                    or not all(isinstance(k, str) and k for k in keywords)):
+                raise ValueError(f"year-based rule '{key}': keywords must be a non-empty list of strings")
+            if cfg['year_strategy'] not in cls.YEAR_STRATEGIES:
+                raise ValueError(
+                    f"year-based rule '{key}': year_strategy must be one of {', '.join(cls.YEAR_STRATEGIES)}"
+                )
+            new_rules[key] = {
+                'keywords': tuple(keywords),
+                'target_dir': cls._relative_dir('year-based', key, 'target_dir', cfg['target_dir']),
+                'year_strategy': cfg['year_strategy'],
+                'format': cls._format('year-based', key, cfg['format']),
+                'year_based': True,
+                'detect_type': bool(cfg.get('detect_type', False)),
+            }
+            cls._extensions('year-based', key, cfg, new_rules[key])
+            cls._quiet_period('year-based', key, cfg, new_rules[key])
+            cls._signature('year-based', key, cfg, new_rules[key])
+            cls._archive('year-based', key, cfg, new_rules[key])
+
+        if not legacy_rules and not new_rules:
+            raise ValueError("rule file defines no rules")
+        scopes = cls._scopes(data, folders, set(legacy_rules) | set(new_rules))
+        return cls(legacy_rules, new_rules, source=source, scopes=ScopeTrie(folders, scopes))
+
+    @classmethod
+    def _scopes(cls, data: Dict, folders: Dict[str, Path], rule_names: Set[str]) -> Dict[str, Dict]:
+        """Check the scopes section; returns settings keyed by "folder[/sub/path]"."""
+        section = data.get('scopes', {})
+        if not isinstance(section, dict):
+            raise ValueError("'scopes' must be a table/object of settings keyed by folder")
+        scopes: Dict[str, Dict] = {}
+        for key, cfg in section.items():
+            if not isinstance(cfg, dict):
+                raise ValueError(f"scope '{key}' must be a table/object")
+            unknown = set(cfg) - cls.SCOPE_OPTIONAL
+            if unknown:
+                raise ValueError(f"scope '{key}': unknown setting(s) {', '.join(sorted(unknown))}")
+            parts = key.replace('\\', '/').strip('/').split('/')
+            if parts[0] not in folders:
+                raise ValueError(f"scope '{key}': must start with one of {', '.join(cls.FOLDERS)}")
+            if any(part in ('', '.', '..') for part in parts[1:]):
+                raise ValueError(f"scope '{key}': must name a folder below {parts[0]}")
+            for field in ('recursive', 'exclude'):
+                if field in cfg and not isinstance(cfg[field], bool):
+                    raise ValueError(f"scope '{key}': {field} must be true or false")
+            if 'rules' in cfg:
+                names = cfg['rules']
+                if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+                    raise ValueError(f"scope '{key}': rules must be a list of rule names")
+                unknown = set(names) - rule_names
+                if unknown:
+                    raise ValueError(f"scope '{key}': unknown rule(s) {', '.join(sorted(unknown))}")
+            if 'ignore' in cfg:
+                patterns = cfg['ignore']
+                if (not isinstance(patterns, list)
+                        or not all(isinstance(p, str) and p and '/' not in p and '\\' not in p for p in patterns)):
+                    raise ValueError(f"scope '{key}': ignore must be a list of folder name patterns")
+            normalized = '/'.join(parts)
+            if normalized in scopes:
+                raise ValueError(f"scope '{key}' is given more than once")
+            scopes[normalized] = cfg
+        return scopes
+
+    @staticmethod
+    def _section(data: Dict, name: str) -> Dict:
+        """Return a rule section, checking that it is a table."""
+        section = data.get(name, {})
+        if not isinstance(section, dict):
+            raise ValueError(f"'{name}' must be a table/object of rules keyed by name")
+        return section
+
+    @staticmethod
+    def _check_keys(kind: str, key: str, cfg: Any, required: Set[str], optional: Set[str]) -> Dict:
+        """Check a rule for missing and unknown settings."""
+        if not isinstance(cfg, dict):
+            raise ValueError(f"{kind} rule '{key}' must be a table/object")
+        missing = required - set(cfg)
+        if missing:
+            raise ValueError(f"{kind} rule '{key}': missing {', '.join(sorted(missing))}")
+        unknown = set(cfg) - required - optional
+        if unknown:
+            raise ValueError(f"{kind} rule '{key}': unknown setting(s) {', '.join(sorted(unknown))}")
+        return cfg
+
+    @staticmethod
+    def _text(kind: str, key: str, field: str, value: Any) -> str:
+        """Check a non-empty string setting."""
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"{kind} rule '{key}': {field} must be a non-empty string")
+        return value
+
+    @classmethod
+    def _format(cls, kind: str, key: str, value: Any, field: str = 'format') -> str:
+        """Check a file extension setting (without the dot)."""
+        value = cls._text(kind, key, field, value)
+        if not value.isalnum():
+            raise ValueError(f"{kind} rule '{key}': {field} must be an extension like 'xlsx' or 'csv'")
+        return value.lower()
+
+    @classmethod
+    def _relative_dir(cls, kind: str, key: str, field: str, value: Any) -> str:
+        """Check a destination folder relative to the exports base."""
+        value = cls._text(kind, key, field, value)
+        parts = Path(value).parts
+        if Path(value).is_absolute() or '..' in parts or Path(value).drive:
+            raise ValueError(f"{kind} rule '{key}': {field} must be a folder inside the exports base")
+        return value
+
+    @classmethod
+    def _extensions(cls, kind: str, key: str, cfg: Dict, compiled: Dict) -> None:
+        """
+        Resolve the file extensions a rule accepts (lowercased, with the dot).
+
+        Defaults to the rule's format; legacy xlsx rules also take .xls by
+        default, as they always have.
+        """
+        if 'extensions' in cfg:
+            values = cfg['extensions']
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"{kind} rule '{key}': extensions must be a non-empty list like ['xlsx', 'csv']")
+            extensions = [cls._format(kind, key, value, field='extensions') for value in values]
+            if compiled['format'] not in extensions:
+                raise ValueError(f"{kind} rule '{key}': extensions must include the format '{compiled['format']}'")
+        else:
+            extensions = [compiled['format']]
+            if kind == 'legacy' and compiled['format'] == 'xlsx':
+                extensions.append('xls')
+        compiled['extensions'] = tuple(dict.fromkeys(f".{ext}" for ext in extensions))
+
+    @staticmethod
+    def _quiet_period(kind: str, key: str, cfg: Dict, compiled: Dict) -> None:
+        """Copy an optional per-rule quiet period, checking that it is a number."""
+        if 'quiet_period' not in cfg:
+            return
+        value = cfg['quiet_period']
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"{kind} rule '{key}': quiet_period must be a number of seconds")
+        compiled['quiet_period'] = float(value)
+
+    @staticmethod
+    def _archive(kind: str, key: str, cfg: Dict, compiled: Dict) -> None:
+        """Copy the optional archiving age and retention (days), checking that they are numbers."""
+        for field in ('archive_after', 'retain'):
+            if field not in cfg:
+                continue
+            value = cfg[field]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                raise ValueError(f"{kind} rule '{key}': {field} must be a positive number of days")
+            compiled[field] = float(value)
+        if 'retain' in compiled and compiled['retain'] < compiled.get('archive_after', 0):
+            raise ValueError(f"{kind} rule '{key}': retain must not be shorter than archive_after")
+        if compiled.get('overwrite') and 'archive_after' in compiled:
+            raise ValueError(f"{kind} rule '{key}': overwrite rules keep a single file and cannot be archived")
+
+    @staticmethod
+    def _signature(kind: str, key: str, cfg: Dict, compiled: Dict) -> None:
+        """Copy an optional column signature and date column, normalizing the names."""
+        if 'signature' in cfg:
+            columns = cfg['signature']
+            if (not isinstance(columns, list) or not columns
+                    or not all(isinstance(c, str) and c.strip() for c in columns)):
+                raise ValueError(f"{kind} rule '{key}': signature must be a non-empty list of column names")
+            compiled['signature'] = tuple(ContentSniffer.normalize(c) for c in columns)
+        if 'date_column' in cfg:
+            value = cfg['date_column']
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"{kind} rule '{key}': date_column must be a column name")
+            compiled['date_column'] = ContentSniffer.normalize(value)
+
+
+class RuleFileWatcher:
+    """
+    Polls rule files and calls back when one changes.
+
+    Compares each file's modification time and size every few seconds; a
+    poll is one stat() call per file, so this costs nothing next to the
+    observer. One thread serves every file added with watch().
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        on_change: Callable[[], None],
+        logger: logging.Logger,
+        interval: float = 2.0
+    ):
+        """
+        Initialize the RuleFileWatcher.
+
+        Args:
+            path: Rule file to watch
+            on_change: Called (on the watcher thread) after the file changes
+            logger: Logger instance for logging
+            interval: Seconds between polls
+        """
+        self.path = path
+        self.logger = logger
+        self.interval = interval
+        # [path, callback, last (mtime_ns, size)] per watched file
+        self._files: List[List[Any]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="watchdog-rules", daemon=True)
+        self.watch(path, on_change)
+
+    def watch(self, path: Path, on_change: Callable[[], None]) -> None:
+        """
+        Poll another file on the same thread.
+
+        Args:
+            path: Rule file to watch
+            on_change: Called (on the watcher thread) after the file changes
+        """
+        with self._lock:
+            self._files.append([path, on_change, self._stat(path)])
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[Tuple[int, int]]:
+        """Return (mtime_ns, size) of a file, or None if it is missing."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def start(self) -> None:
+        """Start polling."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Poll loop."""
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                files = list(self._files)
+            for watched in files:
+                path, on_change, previous = watched
+                signature = self._stat(path)
+                if signature == previous or signature is None:
+                    # Unchanged, or mid-save by an editor that replaces the file
+                    continue
+                watched[2] = signature
+                try:
+                    on_change()
+                except Exception as e:
+                    self.logger.error("Error reloading rules from '%s': %s", path, e)
+
+
+class ReadinessMonitor:
+    """
+    Waits for candidate files to finish being written before they are moved.
+
+    Each tracked file is stat'ed on an adaptive schedule. A file is ready once
+    its size and modification time have been seen unchanged for its quiet period;
+    polls start fast and back off exponentially while nothing changes, and
+    reset to fast whenever the file grows again. One thread serves all files.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        on_ready: Callable[[Path, Any], None],
+        quiet_period: float = 0.5,
+        initial_poll: float = 0.1,
+        max_poll: float = 5.0,
+        empty_file_grace: float = 30.0,
+        max_wait: float = 6 * 3600
+    ):
+        """
+        Initialize the ReadinessMonitor.
+
+        Args:
+            logger: Logger instance for logging
+            on_ready: Called with (path, token) once a file is stable
+            quiet_period: Default seconds a file must stay unchanged
+            initial_poll: First poll delay, and the delay after a change
+            max_poll: Upper bound for the backed-off poll delay
+            empty_file_grace: Quiet period for zero-byte files, which are often
+                placeholders created before the real download lands
+            max_wait: Give up on files that are still changing after this long
+        """
+        self.logger = logger
+        self.on_ready = on_ready
+        self.quiet_period = quiet_period
+        self.initial_poll = initial_poll
+        self.max_poll = max_poll
+        self.empty_file_grace = empty_file_grace
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, Path]] = []
+        self._seq = itertools.count()
+        self._candidates: Dict[Path, Dict[str, Any]] = {}
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending_count(self) -> int:
+        """Number of files waiting to become stable."""
+        with self._cond:
+            return len(self._candidates)
+
+    def start(self) -> None:
+        """Start the polling thread."""
+        self._thread = threading.Thread(
+            target=self._run,
+            name="watchdog-readiness",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling; files still being written are dropped."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+        if self._candidates:
+            self.logger.info("Readiness monitor stopped with %s file(s) pending", len(self._candidates))
+
+    def track(self, path: Path, token: Any, quiet_period: Optional[float] = None) -> bool:
+        """
+        Start watching a file for write completion.
+
+        Args:
+            path: File to watch
+            token: Passed back to on_ready with the path
+            quiet_period: Seconds the file must stay unchanged (default per monitor)
+
+        Returns:
+            True if tracking started, False if the file was already tracked
+        """
+        now = time.monotonic()
+        with self._cond:
+            if path in self._candidates or self._stopping:
+                return False
+            self._candidates[path] = {
+                'token': token,
+                'quiet': self.quiet_period if quiet_period is None else quiet_period,
+                'signature': None,
+                'changed_at': now,
+                'delay': self.initial_poll,
+                'first_seen': now,
+            }
+            heapq.heappush(self._heap, (now, next(self._seq), path))
+            self._cond.notify_all()
+        return True
+
+    def complete(self, path: Path) -> bool:
+        """
+        Mark a tracked file as finished without waiting for it to go quiet.
+
+        Used when the platform reports that the writer closed the file.
+
+        Args:
+            path: File reported complete
+
+        Returns:
+            True if the file was being tracked
+        """
+        with self._cond:
+            cand = self._candidates.get(path)
+            if cand is None:
+                return False
+            cand['complete'] = True
+            heapq.heappush(self._heap, (time.monotonic(), next(self._seq), path))
+            self._cond.notify_all()
+        return True
+
+    def _run(self) -> None:
+        """Polling loop: stat whichever file is due next."""
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._stopping:
+                    return
+                _, _, path = heapq.heappop(self._heap)
+                cand = self._candidates.get(path)
+            if cand is None:
+                continue
+
+            next_poll = self._poll(path, cand)
+
+            with self._cond:
+                if next_poll is None:
+                    self._candidates.pop(path, None)
+                else:
+                    heapq.heappush(self._heap, (next_poll, next(self._seq), path))
+
+            if next_poll is None and cand.get('ready'):
+                try:
+                    self.on_ready(path, cand['token'])
+                except Exception as e:
+                    self.logger.error("Error handing off ready file '%s': %s", path.name, e)
+
+    def _poll(self, path: Path, cand: Dict[str, Any]) -> Optional[float]:
+        """
+        Check one file.
+
+        Args:
+            path: File being watched
+            cand: Tracking state for the file
+
+        Returns:
+            Monotonic time of the next poll, or None when tracking ends
+            (cand['ready'] is set if the file is stable)
+        """
+        if cand.get('complete'):
+            cand['ready'] = True
+            return None
+
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.logger.info("File disappeared before it finished writing: %s", path.name)
+            return None
+        except OSError as e:
+            self.logger.warning("Could not stat '%s': %s", path.name, e)
+            st = None
+
+        now = time.monotonic()
+        wait = cand['delay']
+        if st is not None:
+            signature = (st.st_size, st.st_mtime_ns)
+            if signature != cand['signature']:
+                first_poll = cand['signature'] is None
+                cand['signature'] = signature
+                cand['delay'] = wait = self.initial_poll
+                if not first_poll:
+                    cand['changed_at'] = now
+            else:
+                cand['delay'] = min(cand['delay'] * 2, self.max_poll)
+
+                # Unchanged since the last poll. An old mtime alone proves
+                # nothing (copies can carry the source's mtime), so the file
+                # must first be watched through one whole quiet period; after
+                # that the mtime dates a later change more precisely than the
+                # poll that noticed it.
+                quiet = cand['quiet'] if st.st_size else max(cand['quiet'], self.empty_file_grace)
+                quiet_for = now - cand['changed_at']
+                if now - cand['first_seen'] >= quiet:
+                    quiet_for = max(quiet_for, time.time() - st.st_mtime)
+                if quiet_for >= quiet:
+                    cand['ready'] = True
+                    return None
+                # Back off, but look again as soon as the quiet period could be over
+                wait = min(cand['delay'], quiet - quiet_for)
+
+        if now - cand['first_seen'] > self.max_wait:
+            self.logger.warning(
+                "Gave up waiting for '%s' to finish writing after %.0f minutes",
+                path.name, self.max_wait / 60
+            )
+            return None
+
+        return now + wait
+
+
+class MoveDispatcher:
+    """
+    Runs file moves on a bounded pool of worker threads.
+
+    Jobs are grouped into lanes keyed by destination directory. Each lane is
+    worked by at most one thread at a time, so moves into the same folder stay
+    ordered while different destinations proceed in parallel.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        max_workers: int = 4,
+        max_queue_depth: int = 256
+    ):
+        """
+        Initialize the MoveDispatcher.
+
+        Args:
+            logger: Logger instance for logging
+            max_workers: Number of worker threads running moves
+            max_queue_depth: Maximum number of queued jobs before submit blocks
+        """
+        self.logger = logger
+        self.max_workers = max(1, max_workers)
+        self.max_queue_depth = max(1, max_queue_depth)
+
+        self._cond = threading.Condition()
+        self._lanes: Dict[str, Deque[Tuple[Callable[..., Any], Tuple]]] = {}
+        self._ready: Deque[str] = deque()
+        self._busy: Set[str] = set()
+        self._depth = 0
+        self._stopping = False
+        self._threads = []
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs queued or running."""
+        with self._cond:
+            return self._depth
+
+    @property
+    def stopping(self) -> bool:
+        """True once shutdown() has been called."""
+        with self._cond:
+            return self._stopping
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        for i in range(self.max_workers):
+            t = threading.Thread(
+                target=self._worker,
+                name=f"watchdog-mover-{i + 1}",
+                daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+
+    def submit(
+        self,
+        key: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """
+        Queue a job on the lane for the given key.
+
+        Blocks while the queue is at its depth limit, so a burst of events
+        slows the producer down instead of growing memory without bound.
+
+        Args:
+            key: Lane key (destination directory); jobs sharing a key run in order
+            fn: Callable to run on a worker thread
+            *args: Arguments for the callable
+            timeout: Maximum seconds to wait for queue space (None waits forever)
+
+        Returns:
+            True if the job was queued, False if the dispatcher is stopping or
+            the queue stayed full for the whole timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._depth >= self.max_queue_depth and not self._stopping:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            if self._stopping:
+                return False
+
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = deque()
+            if not lane and key not in self._busy:
+                self._ready.append(key)
+            lane.append((fn, args))
+            self._depth += 1
+            self._cond.notify_all()
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting jobs and let the workers drain the queue.
+
+        Args:
+            wait: Block until every queued job has run
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def _worker(self) -> None:
+        """Worker loop: take the next ready lane, run one job, hand it back."""
+        while True:
+            with self._cond:
+                while not self._ready and not self._stopping:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                key = self._ready.popleft()
+                fn, args = self._lanes[key].popleft()
+                self._busy.add(key)
+
+            try:
+                fn(*args)
+            except Exception as e:
+                self.logger.error("Unhandled error in move worker for '%s': %s", key, e)
+            finally:
+                with self._cond:
+                    self._busy.discard(key)
+                    self._depth -= 1
+                    if self._lanes[key]:
+                        self._ready.append(key)
+                    else:
+                        del self._lanes[key]
+                    self._cond.notify_all()
+
+
+class YearExtractor:
+    """
+    Extracts year information from filenames based on different strategies.
+    """
+
+    @staticmethod
+    def extract_year_start(filename: str) -> Optional[str]:
+        """
+        Extract year from the start of filename (first 4 digits).
+
+        Pattern: YYYY_MM_Monthly_*.xlsx
+        Example: 2025_11_Monthly_CAD.xlsx -> "2025"
+
+        Args:
+            filename: Filename to extract year from
+
+        Returns:
+            Year string (4 digits) or None if not found
+        """
+        match = re.match(r'^(\d{4})_', filename)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def extract_year_end_range(filename: str) -> Optional[str]:
+        """
+        Extract year from the end of a date range (after "to_").
+
+        Pattern: YYYY_MM_to_YYYY_MM_*.xlsx
+        Example: 2024_09_to_2025_09_Rolling13_RMS.xlsx -> "2025"
+
+        Args:
+            filename: Filename to extract year from
+
+        Returns:
+            Year string (4 digits) or None if not found
+        """
+        match = re.search(r'to_(\d{4})_', filename)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def extract_year(filename: str, strategy: str) -> Optional[str]:
+        """
+        Extract year based on the specified strategy.
+
+        Args:
+            filename: Filename to extract year from
+            strategy: Strategy to use ("start" or "end_range")
+
+        Returns:
+            Year string (4 digits) or None if not found
+        """
+        if strategy == "start":
+            return YearExtractor.extract_year_start(filename)
+        elif strategy == "end_range":
+            return YearExtractor.extract_year_end_range(filename)
+        else:
+            return None
+
+
+class ProfileLogAdapter(logging.LoggerAdapter):
+    """Prefixes a profile's log lines with its name."""
+
+    def __init__(self, logger: logging.Logger, profile: str):
+        super().__init__(logger, {'profile': profile})
+
+    def process(self, msg: Any, kwargs: Any) -> Tuple[Any, Any]:
+        return f"[{self.extra['profile']}] {msg}", kwargs
+
+
+class Profile(NamedTuple):
+    """One user served by a multi-profile service."""
+
+    name: str
+    home: Path
+    base_exports: Path
+    rules_file: Optional[Path] = None
+    quarantine_dir: Optional[Path] = None
+
+
+def load_profiles(path: Path) -> List[Profile]:
+    """
+    Read a profiles file for multi-profile mode.
+
+    The file is a JSON object mapping profile names to tables with "home"
+    (required), and optionally "exports" (defaults to 05_EXPORTS in that
+    home's OneDrive), "rules" and "quarantine". Relative paths are taken
+    relative to the profiles file.
+
+    Args:
+        path: Profiles file
+
+    Returns:
+        Profiles in file order
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file cannot be parsed or a profile is invalid
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('profiles'), dict) or not data['profiles']:
+        raise ValueError(f"{path.name}: expected an object with a non-empty 'profiles' table")
+
+    def resolve(value: Any, name: str, field: str) -> Path:
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"profile '{name}': {field} must be a path")
+        return (path.parent / Path(value).expanduser()).resolve()
+
+    profiles = []
+    for name, cfg in data['profiles'].items():
+        if not isinstance(cfg, dict):
+            raise ValueError(f"profile '{name}' must be a table/object")
+        unknown = set(cfg) - {'home', 'exports', 'rules', 'quarantine'}
+        if unknown:
+            raise ValueError(f"profile '{name}': unknown setting(s) {', '.join(sorted(unknown))}")
+        if 'home' not in cfg:
+            raise ValueError(f"profile '{name}': missing home")
+        home = resolve(cfg['home'], name, 'home')
+        profiles.append(Profile(
+            name=name,
+            home=home,
+            base_exports=resolve(cfg['exports'], name, 'exports') if 'exports' in cfg else default_exports_dir(home),
+            rules_file=resolve(cfg['rules'], name, 'rules') if 'rules' in cfg else None,
+            quarantine_dir=resolve(cfg['quarantine'], name, 'quarantine') if 'quarantine' in cfg else None,
+        ))
+    folders = {p.base_exports for p in profiles}
+    if len(folders) != len(profiles):
+        raise ValueError(f"{path.name}: two profiles share an exports folder")
+    return profiles
+
+
+class SharedServices:
+    """
+    Workers and background stages shared by every profile in one process.
+
+    One move worker pool, readiness thread, retry timer, rule-file poller
+    and hashing/sniffing pool serve all ExportWatchdogHandler instances
+    given this object, so threads and memory stay flat as profiles are
+    added. A handler created without one makes a private instance.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        max_workers: int = 4,
+        max_queue_depth: int = 256,
+        quiet_period: float = 0.5,
+        retry_window: float = 3600.0,
+        verify: str = 'size',
+        metrics: Optional[MetricsRegistry] = None,
+        hash_workers: int = 2,
+        sniffer: Optional[ContentSniffer] = None,
+        throttle: Optional[MoveThrottle] = None,
+        rules_poll_interval: Optional[float] = 2.0
+    ):
+        """
+        Start the shared workers.
+
+        Args:
+            logger: Logger instance for logging
+            max_workers: Number of worker threads running moves
+            max_queue_depth: Maximum number of moves waiting for a worker
+            quiet_period: Seconds a file must stop changing before it is moved
+            retry_window: Seconds to keep retrying a locked file before giving up
+            verify: Check for cross-volume copies: "none", "size" or "checksum"
+            metrics: Registry for latency histograms and counters (a private
+                one is created if not given)
+            hash_workers: Threads hashing files for duplicate detection
+            sniffer: Content sniffer for files no rule name matches
+            throttle: Byte and operation rate limits on moves
+            rules_poll_interval: Seconds between checks of the rule files for
+                changes; None disables reloading
+        """
+        self.logger = logger
+        self.metrics = metrics or MetricsRegistry()
+        self.file_mover = FileMover(verify=verify, metrics=self.metrics, throttle=throttle)
+        self.profiles: List['ExportWatchdogHandler'] = []
+
+        # === Duplicate detection ===
+        self.hasher = ContentHasher()
+        self.hash_workers = hash_workers
+        self.hash_pool: Optional[ThreadPoolExecutor] = None
+
+        # === Content sniffing ===
+        self.sniffer = sniffer
+        self.sniff_pool: Optional[ThreadPoolExecutor] = None
+        if sniffer is not None:
+            self.sniff_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="watchdog-sniff")
+
+        # === Retries for locked files ===
+        # Waiting retries live on a timer heap, not on a worker thread
+        self.retry_scheduler = RetryScheduler(logger, retry_window=retry_window)
+        self.retry_scheduler.start()
+
+        # === Move workers ===
+        # Events are only classified on the observer thread; the moves run here
+        self.dispatcher = MoveDispatcher(logger, max_workers, max_queue_depth)
+        self.dispatcher.start()
+
+        # === Write-completion detection ===
+        # Matched files wait here until their size and mtime stop changing
+        self.readiness = ReadinessMonitor(logger, self._on_file_ready, quiet_period=quiet_period)
+        self.readiness.start()
+
+        # === Rule reloading ===
+        self.rules_poll_interval = rules_poll_interval
+        self.rules_watcher: Optional[RuleFileWatcher] = None
+
+        profiles = self.profiles
+        self.metrics.gauge('watchdog_queue_depth', lambda: self.dispatcher.queue_depth,
+                           "Moves queued or running")
+        self.metrics.gauge('watchdog_retry_pending', lambda: self.retry_scheduler.pending_count,
+                           "Retries waiting for their due time")
+        self.metrics.gauge('watchdog_readiness_pending', lambda: self.readiness.pending_count,
+                           "Files waiting to finish being written")
+        self.metrics.gauge('watchdog_coalesced_events_total', lambda: sum(p.coalesced_events for p in profiles),
+                           "Events folded into an existing work item", kind='counter')
+        self.metrics.gauge('watchdog_filtered_events_total', lambda: sum(p.filtered_events for p in profiles),
+                           "Events for partial downloads and lock files, dropped unclassified",
+                           kind='counter')
+        self.metrics.gauge('watchdog_pruned_events_total', lambda: sum(p.pruned_events for p in profiles),
+                           "Events from subfolders outside every scope, dropped unclassified",
+                           kind='counter')
+        self.metrics.gauge('watchdog_completed_downloads_total',
+                           lambda: sum(p.completed_downloads for p in profiles),
+                           "Partial downloads renamed to their final name", kind='counter')
+        if sniffer is not None:
+            self.metrics.gauge('watchdog_sniffed_files_total', lambda: sniffer.reads,
+                               "Files whose content was read to classify them or find their year",
+                               kind='counter')
+        if throttle is not None:
+            self.metrics.gauge('watchdog_throttled_moves_total', lambda: throttle.throttled_moves,
+                               "Moves that waited on a rate limit", kind='counter')
+            self.metrics.gauge('watchdog_throttle_wait_seconds_total', lambda: throttle.waited,
+                               "Seconds moves waited on rate limits", kind='counter')
+
+    def ensure_hash_pool(self) -> ThreadPoolExecutor:
+        """Hashing pool, started by the first profile with duplicate detection."""
+        if self.hash_pool is None:
+            self.hash_pool = ThreadPoolExecutor(max_workers=self.hash_workers, thread_name_prefix="watchdog-hash")
+        return self.hash_pool
+
+    def watch_rules(self, path: Path, on_change: Callable[[], None]) -> None:
+        """
+        Poll a profile's rule file for changes on the shared poller thread.
+
+        Args:
+            path: Rule file
+            on_change: Called after the file changes
+        """
+        if not self.rules_poll_interval:
+            return
+        if self.rules_watcher is None:
+            self.rules_watcher = RuleFileWatcher(path, on_change, self.logger, interval=self.rules_poll_interval)
+            self.rules_watcher.start()
+        else:
+            self.rules_watcher.watch(path, on_change)
+
+    def _on_file_ready(self, fp: Path, token: Tuple['ExportWatchdogHandler', MoveJob]) -> None:
+        """Hand a stable file back to the profile that tracked it."""
+        handler, job = token
+        handler._on_file_ready(fp, job)
+
+    def shutdown(self) -> None:
+        """Stop accepting new moves and wait for queued moves to finish."""
+        if self.rules_watcher:
+            self.rules_watcher.stop()
+        self.readiness.stop()
+        self.retry_scheduler.stop()
+        if self.sniff_pool is not None:
+            self.sniff_pool.shutdown(wait=True)
+        if self.hash_pool is not None:
+            self.hash_pool.shutdown(wait=True)
+        if self.file_mover.throttle is not None:
+            self.file_mover.throttle.release()
+        self.dispatcher.shutdown(wait=True)
+        self.logger.info("Move throughput - %s", self.file_mover.throughput_summary())
+
+
+class ExportWatchdogHandler(FileSystemEventHandler):
+    """
+    File system event handler that monitors and organizes export files.
+    """
+
+    def __init__(
+        self,
+        base_exports: Path,
+        logger: logging.Logger,
+        max_workers: int = 4,
+        max_queue_depth: int = 256,
+        home: Optional[Path] = None,
+        quiet_period: float = 0.5,
+        retry_window: float = 3600.0,
+        verify: str = 'size',
+        journal: Optional[MoveJournal] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        rules_file: Optional[Path] = None,
+        rules_poll_interval: Optional[float] = 2.0,
+        duplicates: Optional[DuplicateIndex] = None,
+        dedupe: str = 'skip',
+        hash_workers: int = 2,
+        validator: Optional[ExportValidator] = None,
+        quarantine_dir: Optional[Path] = None,
+        sniffer: Optional[ContentSniffer] = None,
+        catalog: Optional[ExportCatalog] = None,
+        archiver: Optional[ExportArchiver] = None,
+        throttle: Optional[MoveThrottle] = None,
+        services: Optional['SharedServices'] = None,
+        profile: Optional[str] = None,
+        recorder: Optional['EventRecorder'] = None
+    ):
+        """
+        Initialize the watchdog handler.
+
+        Args:
+            base_exports: Base directory for all exports
+            logger: Logger instance for logging
+            max_workers: Number of worker threads running moves
+            max_queue_depth: Maximum number of moves waiting for a worker
+            home: User home directory holding the monitored folders
+                (defaults to Path.home())
+            quiet_period: Seconds a file must stop changing before it is moved;
+                a rule can override it with a 'quiet_period' entry
+            retry_window: Seconds to keep retrying a locked file before giving up
+            verify: Check for cross-volume copies: "none", "size" or "checksum"
+            journal: Durable record of moves; enables crash recovery and lets
+                the startup scan skip files that were already filed
+            metrics: Registry for latency histograms and counters (a private
+                one is created if not given)
+            rules_file: JSON or TOML rule file (defaults to export_rules.json
+                next to this script)
+            rules_poll_interval: Seconds between checks of the rule file for
+                changes; None disables reloading
+            duplicates: Index of content already filed per destination folder;
+                enables duplicate detection
+            dedupe: What to do with a file whose content is already filed:
+                "skip" (remove it) or "link" (file it as a hard link to the
+                existing copy)
+            hash_workers: Threads hashing files for duplicate detection
+            validator: Integrity checks run before filing; files that fail
+                are moved to the quarantine folder
+            quarantine_dir: Where invalid files go (defaults to
+                base_exports/_Quarantine)
+            sniffer: Reads CSV/xlsx headers to classify files no keyword
+                matches (rules with a signature) and to find the year of
+                files whose name has none
+            catalog: Catalog of filed files; every move is added to it and it
+                is built from the existing tree once if it is new
+            archiver: Background stage packing aged files of rules with
+                'archive_after' into month archives
+            throttle: Byte and operation rate limits on moves into the exports
+                tree; throttled moves hold their worker, so the queue fills
+                and intake slows instead of files being dropped
+            services: Workers and background stages shared with other
+                profiles; when given, max_workers, max_queue_depth,
+                quiet_period, retry_window, verify, metrics, hash_workers,
+                sniffer, throttle and rules_poll_interval come from it
+            profile: Name of the profile this handler serves (prefixes its
+                log lines and move records)
+            recorder: Trace that every event received is written to, for
+                replaying it offline
+        """
+        self.base_exports = base_exports
+        self.profile = profile
+        # Structured move records (JSON lines when --json-log is given)
+        self.events = logger.getChild('events')
+        self.logger = ProfileLogAdapter(logger, profile) if profile else logger
+
+        # === Workers and background stages ===
+        # Shared with other profiles when services is given, otherwise private
+        self._owns_services = services is None
+        if services is None:
+            services = SharedServices(
+                logger,
+                max_workers=max_workers,
+                max_queue_depth=max_queue_depth,
+                quiet_period=quiet_period,
+                retry_window=retry_window,
+                verify=verify,
+                metrics=metrics,
+                hash_workers=hash_workers,
+                sniffer=sniffer,
+                throttle=throttle,
+                rules_poll_interval=rules_poll_interval
+            )
+        self.services = services
+        services.profiles.append(self)
+        self.metrics = services.metrics
+        self.file_mover = services.file_mover
+        self.retry_scheduler = services.retry_scheduler
+        self.dispatcher = services.dispatcher
+        self.readiness = services.readiness
+        self.enqueue_timeout = 30.0
+        self._retry_pending: Set[Path] = set()
+        self.year_extractor = YearExtractor()
+        self.journal = journal
+
+        # === Duplicate detection ===
+        # Ready files are hashed on their own pool before they reach the movers
+        self.duplicates = duplicates
+        self.dedupe = dedupe
+        self.hasher = services.hasher
+        self.hash_pool = services.ensure_hash_pool() if duplicates is not None else None
+
+        # === Integrity validation ===
+        self.validator = validator
+        self.quarantine_dir = quarantine_dir or base_exports / '_Quarantine'
+        # Every lane quarantines into the same folder, so names are picked under a lock
+        self._quarantine_lock = threading.Lock()
+
+        # === Content sniffing ===
+        # Files whose name matches no rule are identified by their columns off the event thread
+        self.sniffer = services.sniffer
+        self.sniff_pool = services.sniff_pool
+
+        # === Export catalog ===
+        self.catalog = catalog
+
+        # Get user home directory dynamically
+        home = home or Path.home()
+        onedrive_base = home / "OneDrive - City of Hackensack"
+
+        # === Monitored folders ===
+        self.desktop_path = onedrive_base / "Desktop"
+        self.down_onedrive = onedrive_base / "Downloads"
+        self.down_local = home / "Downloads"
+        self.monitor_paths = [
+            self.desktop_path,
+            self.down_onedrive,
+            self.down_local
+        ]
+
+        # Ensure monitored folders exist
+        for p in self.monitor_paths:
+            p.mkdir(parents=True, exist_ok=True)
+
+        # === Debounce duplicate events ===
+        # Created/modified/moved events for a path within the window are
+        # coalesced into the single work item started by the first one.
+        self.event_debounce_seconds = 5
+        self.recently_handled = ExpiringCache(self.event_debounce_seconds, max_size=50000)
+        self.coalesced_events = 0
+        self.filtered_events = 0
+        self.pruned_events = 0
+        self.completed_downloads = 0
+
+        # Next free _N counter per timestamped legacy name (see _unique_destination)
+        self._next_counter = ExpiringCache(5, max_size=1000)
+
+        # === Export configurations ===
+        # Routing rules come from a rule file and are swapped in whole on reload
+        self.rules_file = rules_file or DEFAULT_RULES_FILE
+        self.rule_folders = {
+            'desktop': self.desktop_path,
+            'onedrive_downloads': self.down_onedrive,
+            'downloads': self.down_local,
+        }
+        self.rules = RuleSet.load(self.rules_file, self.base_exports, self.rule_folders)
+        self._create_destinations(self.rules)
+
+        # === Event recording ===
+        self.recorder = recorder
+        self._trace_roots = [(name, str(path) + os.sep) for name, path in self.rule_folders.items()]
+        self.logger.info("Loaded %s rules from %s", len(self.rules), self.rules_file)
+        if catalog is not None:
+            catalog.build_in_background(self.base_exports, self.rules.catalog_dirs(self.base_exports))
+
+        # === Archiving ===
+        self.archiver = archiver
+        if archiver is not None:
+            self.metrics.gauge('watchdog_archived_files_total', lambda: archiver.archived_files,
+                               "Files moved into month archives", kind='counter')
+            self.metrics.gauge('watchdog_archived_bytes_total', lambda: archiver.archived_bytes,
+                               "Bytes of files moved into month archives", kind='counter')
+            self.metrics.gauge('watchdog_archive_throttle_seconds_total', lambda: archiver.bucket.waited,
+                               "Seconds archiving waited on its byte-rate limit", kind='counter')
+            archiver.start(self.base_exports, lambda: self.rules, catalog=catalog)
+
+        services.watch_rules(self.rules_file, self.reload_rules)
+
+        self.logger.info("Export Watchdog initialized. Base exports: %s", self.base_exports)
+        self.logger.info("Watching folders:")
+        for p in self.monitor_paths:
+            self.logger.info("  • %s", p)
+
+        # Finish or roll back moves interrupted by the last shutdown
+        if self.journal:
+            self.journal.recover()
+
+        # Process any existing matching files
+        self._process_existing_files()
+
+    @property
+    def legacy_rules(self) -> Mapping[str, Mapping]:
+        """Legacy rule configurations of the current rule set."""
+        return self.rules.legacy_rules
+
+    @property
+    def new_rules(self) -> Mapping[str, Mapping]:
+        """Year-based rule configurations of the current rule set."""
+        return self.rules.new_rules
+
+    @property
+    def matcher(self) -> RuleMatcher:
+        """Filename classifier of the current rule set."""
+        return self.rules.matcher
+
+    def _create_destinations(self, rules: RuleSet) -> None:
+        """
+        Create the destination directories of a rule set (without year subfolders).
+
+        Args:
+            rules: Rule set about to be used
+        """
+        for cfg in rules.legacy_rules.values():
+            cfg['dest'].mkdir(parents=True, exist_ok=True)
+
+    def reload_rules(self) -> bool:
+        """
+        Reload the rule file and swap the new rules in.
+
+        The old rules stay in effect if the file cannot be read or is invalid.
+        Files already being tracked keep the rule they were matched with;
+        folders are not rescanned. New scopes apply to events right away;
+        a monitored folder that starts or stops needing recursive watching
+        keeps its watch until the service restarts.
+
+        Returns:
+            True if the new rules were applied
+        """
+        start = time.perf_counter()
+        try:
+            rules = RuleSet.load(self.rules_file, self.base_exports, self.rule_folders)
+            self._create_destinations(rules)
+        except (OSError, ValueError) as e:
+            self.metrics.inc('watchdog_rule_reloads_total', result='error')
+            self.logger.error("Rule file %s not applied, keeping previous rules: %s", self.rules_file, e)
+            return False
+
+        for p in self.monitor_paths:
+            if rules.scopes.descends(str(p)) != self.rules.scopes.descends(str(p)):
+                self.logger.warning("Subfolder watching of '%s' changed; restart the service to apply it", p)
+        self.rules = rules
+        self.metrics.inc('watchdog_rule_reloads_total', result='ok')
+        self.logger.info(
+            "Reloaded %s rules from %s in %.1f ms",
+            len(rules), self.rules_file, (time.perf_counter() - start) * 1000
+        )
+        return True
+
+    def _process_existing_files(self) -> None:
+        """
+        Scan monitored folders for existing files matching our rules.
+
+        Each folder is listed once; every entry goes through the same
+        classifier as live events and matches are queued for the move workers.
+        Subfolders are entered only where the rule file's scopes watch them.
+        A legacy rule with a `src` folder only picks up files found in (or
+        below) that folder; live events still file them from any folder.
+        """
+        self.logger.info("Starting initial directory scan")
+        start = time.perf_counter()
+        scanned = 0
+        queued = 0
+        skipped = 0
+        matcher = self.matcher
+        scopes = self.rules.scopes
+
+        folders = deque(str(p) for p in self.monitor_paths)
+        while folders:
+            monitor_path = folders.popleft()
+            scope = scopes.lookup(monitor_path)
+            descend = scopes.descends(monitor_path)
+            try:
+                with os.scandir(monitor_path) as entries:
+                    for entry in entries:
+                        scanned += 1
+                        if descend and entry.is_dir(follow_symlinks=False):
+                            if scopes.walks(entry.path):
+                                folders.append(entry.path)
+                            continue
+                        if scope is None or DownloadFilter.is_temporary(entry.name):
+                            continue
+                        match = matcher.match(entry.name)
+                        if match is not None and not scope.allows(match.key):
+                            match = None
+                        if match is not None and not self._in_source(match, monitor_path):
+                            continue
+                        if match is None and not self._sniffable(entry.name):
+                            continue
+                        if not entry.is_file():
+                            continue
+                        fp = Path(entry.path)
+                        if self.journal:
+                            st = entry.stat()
+                            if self.journal.is_handled(fp, st.st_size, st.st_mtime_ns):
+                                skipped += 1
+                                continue
+                        if match is not None:
+                            self.logger.info("Startup scan: found '%s' matching '%s'", fp.name, match.key)
+                        job = MoveJob(fp, match)
+                        self.recently_handled.add(fp, job)
+                        self._track(job)
+                        queued += 1
+            except OSError as e:
+                self.logger.error("Startup scan could not list '%s': %s", monitor_path, e)
+
+        elapsed = time.perf_counter() - start
+        self.logger.info(
+            "Initial scan complete: %s entries checked, %s matched, %s already filed, in %.2fs",
+            scanned, queued, skipped, elapsed
+        )
+
+    @staticmethod
+    def _in_source(match: RuleMatch, folder: str) -> bool:
+        """
+        Check a startup-scan match against its legacy rule's source folder.
+
+        Args:
+            match: Classification of a file found by the scan
+            folder: Folder the file was found in
+
+        Returns:
+            False if the rule has a `src` folder and folder is outside it
+        """
+        src = match.cfg.get('src') if match.kind == 'legacy' else None
+        if src is None:
+            return True
+        folder = os.path.normcase(folder)
+        src = os.path.normcase(str(src))
+        return folder == src or folder.startswith(src.rstrip(os.sep) + os.sep)
+
+    def dispatch(self, event) -> None:
+        """Record the event when tracing, then hand it to its on_* method."""
+        if self.recorder is not None:
+            # A file being handled that disappears was (almost always) just moved by us
+            own = (event.event_type == 'deleted' and not event.is_directory
+                   and self.recently_handled.get(Path(event.src_path)) is not None)
+            self.recorder.record(event, self._trace_roots, self.profile, own=own)
+        super().dispatch(event)
+
+    def on_created(self, event) -> None:
+        """Handle file creation events."""
+        if not event.is_directory:
+            self._handle(event.src_path)
+
+    def on_modified(self, event) -> None:
+        """Handle file modification events."""
+        if not event.is_directory:
+            self._handle(event.src_path)
+
+    def on_moved(self, event: FileSystemMovedEvent) -> None:
+        """
+        Handle file move events.
+
+        A browser renaming its partial download to the final name means the
+        download is complete, so the file is moved right away.
+        """
+        if event.is_directory:
+            return
+        finished = DownloadFilter.is_temporary(os.path.basename(event.src_path))
+        if finished:
+            self.completed_downloads += 1
+        self._handle(event.dest_path, complete=finished)
+
+    def on_closed(self, event: FileClosedEvent) -> None:
+        """Handle close-after-write events; the file is complete, so no waiting."""
+        if not event.is_directory:
+            self._handle(event.src_path, complete=True)
+
+    def rescan(self) -> None:
+        """Re-run the startup scan, e.g. after the event backend lost events."""
+        self._process_existing_files()
+
+    def should_watch(self, folder: str) -> bool:
+        """
+        Check whether a subfolder found by a recursive observer needs watching.
+
+        Args:
+            folder: Full path of the subfolder
+
+        Returns:
+            True if its files are handled or a watched scope lies below it
+        """
+        return self.rules.scopes.walks(folder)
+
+    def watches_subfolders(self, folder: Path) -> bool:
+        """
+        Check whether a monitored folder has to be scheduled recursively.
+
+        Args:
+            folder: One of monitor_paths
+
+        Returns:
+            True if the scopes watch any of its subfolders
+        """
+        return self.rules.scopes.descends(str(folder))
+
+    def _handle(self, path_str: str, complete: bool = False) -> None:
+        """
+        Process a file system event.
+
+        Args:
+            path_str: Path to the file that triggered the event
+            complete: The event says the writer is done with the file
+        """
+        started = time.perf_counter()
+
+        # Events from subfolders outside every scope are dropped before anything else
+        rules = self.rules
+        scope = rules.scopes.lookup(os.path.dirname(path_str))
+        if scope is None:
+            self.pruned_events += 1
+            return
+
+        # Partial downloads and lock files are dropped unclassified
+        if DownloadFilter.is_temporary(os.path.basename(path_str)):
+            self.filtered_events += 1
+            return
+        fp = Path(path_str)
+
+        # A retry is already scheduled for this file; it will pick up the change
+        if fp in self._retry_pending:
+            return
+
+        # Fold duplicates within the debounce window into the existing work item,
+        # unless that item was filed and a new file has since landed at the path
+        previous = self.recently_handled.get(fp)
+        if previous is not None and (previous.filed_at is None or not fp.exists()):
+            self.coalesced_events += 1
+            if complete:
+                # Already waiting on this file; it can go now
+                self.readiness.complete(fp)
+            return
+
+        match = rules.matcher.match(fp.name)
+        if match is not None and not scope.allows(match.key):
+            match = None
+        if match is None:
+            if self._sniffable(fp.name):
+                # Identify it by its columns once it is complete
+                job = MoveJob(fp, None)
+                self.recently_handled.add(fp, job)
+                if complete and not self.readiness.complete(fp):
+                    self._dispatch_job(job, timeout=self.enqueue_timeout)
+                else:
+                    self._track(job)
+            return
+
+        job = MoveJob(fp, match)
+        self.recently_handled.add(fp, job)
+        self.metrics.observe('watchdog_detect_seconds', time.perf_counter() - started, rule=match.key)
+        if complete and not self.readiness.complete(fp):
+            self.logger.info("Detected '%s' in '%s' (write complete), queued for move.", match.key, fp.name)
+            self._dispatch_job(job, timeout=self.enqueue_timeout)
+            return
+
+        self.logger.info("Detected '%s' in '%s', waiting for write to finish.", match.key, fp.name)
+        self._track(job)
+
+    def _track(self, job: MoveJob) -> None:
+        """
+        Hand a classified file to the readiness stage.
+
+        Args:
+            job: Work item for the matched file
+        """
+        quiet_period = job.match.cfg.get('quiet_period') if job.match is not None else None
+        self.readiness.track(job.path, (self, job), quiet_period)
+
+    def _on_file_ready(self, fp: Path, job: MoveJob) -> None:
+        """
+        Queue a file for moving once it has stopped changing.
+
+        Runs on the readiness thread; waits for queue space since no further
+        event may arrive for a file that is already complete.
+
+        Args:
+            fp: Path to the stable file
+            job: Work item for the file
+        """
+        self._dispatch_job(job, timeout=None)
+
+    def _lane_for(
+        self, match: RuleMatch, file_path: Path
+    ) -> Tuple[Callable[[Path, Mapping, Optional[os.stat_result]], str], Path]:
+        """
+        Pick the move method and destination lane for a classified file.
+
+        Args:
+            match: Classification result for the file
+            file_path: Path to the file
+
+        Returns:
+            (move method, destination directory used to serialize moves)
+        """
+        if match.kind == 'legacy':
+            return self._move_legacy_file, match.cfg['dest']
+        return self._move_new_rule_file, self.base_exports / self._target_dir(file_path, match.cfg)
+
+    @staticmethod
+    def _target_dir(file_path: Path, cfg: Mapping) -> str:
+        """
+        Folder a year-based file is filed under, below the exports base.
+
+        Generic Response_Time files (detect_type) go to _CAD or _RMS by their
+        filename, and to the rule's own target_dir if it names neither.
+
+        Args:
+            file_path: Path to the file
+            cfg: Configuration dictionary for the rule
+
+        Returns:
+            Folder relative to the exports base, without the year
+        """
+        if cfg.get('detect_type', False):
+            name_lower = file_path.name.lower()
+            if 'cad' in name_lower:
+                return '_CAD/response_time'
+            if 'rms' in name_lower:
+                return '_RMS/response_time'
+        return cfg['target_dir']
+
+    def _dispatch_job(self, job: MoveJob, timeout: Optional[float]) -> None:
+        """
+        Hand a ready file to the move workers.
+
+        Args:
+            job: Work item for the file
+            timeout: Maximum seconds to wait for queue space (None waits forever)
+        """
+        if job.match is None:
+            self.sniff_pool.submit(self._sniff_job, job, timeout)
+            return
+
+        job.ready_at = time.monotonic()
+        self.metrics.observe('watchdog_ready_seconds', job.ready_at - job.detected_at, rule=job.match.key)
+
+        if self.hash_pool is not None and not job.match.cfg.get('overwrite', False):
+            self.hash_pool.submit(self._hash_job, job, timeout)
+            return
+        self._submit_move(job, timeout)
+
+    def _sniffable(self, name: str) -> bool:
+        """
+        Check whether a file no keyword matched could be identified by its columns.
+
+        Args:
+            name: Filename without directory
+
+        Returns:
+            True if sniffing is on and some rule with a signature takes this extension
+        """
+        if self.sniffer is None:
+            return False
+        return os.path.splitext(name)[1].lower() in self.matcher.signature_extensions
+
+    def _sniff_job(self, job: MoveJob, timeout: Optional[float]) -> None:
+        """
+        Classify a complete file by its column headers, then hand it on.
+
+        Runs on the sniff pool. Files that match no signature are dropped
+        quietly, like files whose name matches no rule.
+
+        Args:
+            job: Work item for the file (match is None)
+            timeout: Maximum seconds to wait for queue space (None waits forever)
+        """
+        try:
+            st = os.stat(job.path)
+            profile = self.sniffer.profile(job.path, st)
+            if profile is None:
+                return
+            match = self.matcher.match_columns(job.path.name, profile.columns)
+            if match is None:
+                return
+            scope = self.rules.scopes.lookup(str(job.path.parent))
+            if scope is None or not scope.allows(match.key):
+                return
+            self.logger.info("Identified '%s' as '%s' from its columns, queued for move.",
+                             job.path.name, match.key)
+            job.match = match
+            self._dispatch_job(job, timeout)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.error("Error classifying '%s' by content: %s", job.path.name, e)
+
+    def _year_from_content(self, file_path: Path, st: os.stat_result, cfg: Mapping) -> Optional[str]:
+        """
+        Take the year from the dates in a file whose name has none.
+
+        Args:
+            file_path: CSV or xlsx file
+            st: os.stat() of the file
+            cfg: Configuration dictionary for the rule (year_strategy, date_column)
+
+        Returns:
+            Year as a string, or None
+        """
+        try:
+            profile = self.sniffer.profile(file_path, st)
+        except OSError as e:
+            self.logger.warning("Could not read '%s' for its dates: %s", file_path.name, e)
+            return None
+        if profile is None:
+            return None
+        years = profile.year_range(cfg.get('date_column'))
+        if years is None:
+            return None
+        year = str(years[0] if cfg['year_strategy'] == 'start' else years[1])
+        self.logger.info("Year %s taken from the dates in '%s'", year, file_path.name)
+        return year
+
+    def _hash_job(self, job: MoveJob, timeout: Optional[float]) -> None:
+        """
+        Hash a ready file for duplicate detection, then queue its move.
+
+        Runs on the hash pool. The digest is remembered by the hasher, so the
+        move worker only looks it up; if hashing fails the move still goes
+        ahead and hashes inline.
+
+        Args:
+            job: Work item for the file
+            timeout: Maximum seconds to wait for queue space (None waits forever)
+        """
+        try:
+            st = os.stat(job.path)
+            start = time.perf_counter()
+            self.hasher.digest(job.path, st)
+            self.metrics.observe('watchdog_hash_seconds', time.perf_counter() - start, rule=job.match.key)
+        except OSError:
+            pass
+        try:
+            self._submit_move(job, timeout)
+        except Exception as e:
+            self.logger.error("Error queueing '%s' after hashing: %s", job.path.name, e)
+
+    def _submit_move(self, job: MoveJob, timeout: Optional[float]) -> None:
+        """
+        Queue a ready (and, with duplicate detection, hashed) file for the move workers.
+
+        Args:
+            job: Work item for the file
+            timeout: Maximum seconds to wait for queue space (None waits forever)
+        """
+        _, dest_dir = self._lane_for(job.match, job.path)
+        queued = self.dispatcher.submit(str(dest_dir), self._run_move, job, timeout=timeout)
+        if not queued and not self.dispatcher.stopping:
+            # Moves are behind (e.g. throttled); park the file with the readiness
+            # stage, whose thread waits for queue space, rather than drop it
+            self.metrics.inc('watchdog_deferred_total', rule=job.match.key)
+            self.logger.info("Move queue full (%s pending); '%s' waits its turn.",
+                             self.dispatcher.queue_depth, job.path.name)
+            self._track(job)
+        elif not queued:
+            # Forget the file so the next event for it gets another chance
+            self.recently_handled.discard(job.path)
+            self.metrics.inc('watchdog_dropped_total', rule=job.match.key)
+            self.logger.warning(
+                "Service stopping (%s moves pending); dropped '%s' for now.",
+                self.dispatcher.queue_depth, job.path.name
+            )
+
+    def _run_move(self, job: MoveJob) -> None:
+        """
+        Worker-side move of a matched file; schedules a retry if it is locked.
+
+        Args:
+            job: Work item for the file
+        """
+        fp = job.path
+        rule = job.match.key
+        move_fn, _ = self._lane_for(job.match, fp)
+
+        # One stat serves the whole move: existence, journal key, same-volume check
+        status = None
+        try:
+            st = os.stat(fp)
+        except FileNotFoundError:
+            st = None
+        except OSError as e:
+            st = None
+            self.logger.warning("Could not stat '%s': %s", fp.name, e)
+            status = FileMover.BUSY
+        last_write = st.st_mtime if st else None
+
+        self.logger.info("Moving '%s' for rule '%s'.", fp.name, rule)
+        started = time.monotonic()
+        if status is None and st is not None:
+            status = self._finish_copy(fp, job.match.cfg, st)
+        if status is None:
+            status = move_fn(fp, job.match.cfg, st)
+        finished = time.monotonic()
+
+        self.metrics.inc('watchdog_moves_total', rule=rule, outcome=status)
+        self.metrics.observe('watchdog_move_seconds', finished - started, rule=rule)
+        if status in FileMover.FILED:
+            job.filed_at = finished
+            self.metrics.observe('watchdog_total_seconds', finished - job.detected_at, rule=rule)
+            if last_write is not None:
+                self.metrics.observe(
+                    'watchdog_write_to_filed_seconds', max(0.0, time.time() - last_write), rule=rule
+                )
+        elif status == FileMover.LOCKED:
+            self.metrics.inc('watchdog_locked_total', rule=rule)
+        elif status in FileMover.FAILURES:
+            self.metrics.inc('watchdog_failures_total', rule=rule)
+
+        if status not in FileMover.RETRYABLE:
+            self._retry_pending.discard(fp)
+            return
+
+        now = time.monotonic()
+        if job.first_failure is None:
+            job.first_failure = now
+        if status == FileMover.LOCKED:
+            reason = "is locked"
+        elif status == FileMover.COPIED:
+            reason = "was copied but could not be removed"
+        else:
+            reason = "could not be moved"
+        waited = now - job.first_failure
+        if waited >= self.retry_scheduler.retry_window:
+            self._retry_pending.discard(fp)
+            self.metrics.inc('watchdog_failures_total', rule=rule)
+            self.logger.error(
+                "File '%s' %s after %s attempts over %.0f minutes. Skipping move.",
+                fp.name, reason, job.attempt, waited / 60
+            )
+            return
+
+        delay = self.retry_scheduler.next_delay(job.attempt)
+        job.attempt += 1
+        self._retry_pending.add(fp)
+        self.metrics.inc('watchdog_retries_total', rule=rule)
+        self.logger.info(
+            "File '%s' %s (attempt %s). Retrying in %.1f seconds...",
+            fp.name, reason, job.attempt - 1, delay
+        )
+        self.retry_scheduler.schedule(delay, self._retry_move, job)
+
+    def _retry_move(self, job: MoveJob) -> None:
+        """
+        Re-queue a move whose retry delay has passed.
+
+        Runs on the retry timer thread, so it never waits for queue space; a
+        full queue just pushes the retry back.
+
+        Args:
+            job: Work item for the file
+        """
+        _, dest_dir = self._lane_for(job.match, job.path)
+        queued = self.dispatcher.submit(str(dest_dir), self._run_move, job, timeout=0)
+        if not queued:
+            self.retry_scheduler.schedule(self.retry_scheduler.base_delay, self._retry_move, job)
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting new moves and wait for queued moves to finish.
+
+        Shared services are left running; whoever created them shuts them
+        down once every profile has stopped.
+        """
+        if self.archiver is not None:
+            self.archiver.stop()
+        if self._owns_services:
+            self.services.shutdown()
+
+    def _move_legacy_file(self, file_path: Path, cfg: Mapping, st: Optional[os.stat_result]) -> str:
+        """
+        Move a file using legacy naming convention (timestamp prefix).
+
+        Args:
+            file_path: Path to the file to move
+            cfg: Configuration dictionary for this rule
+            st: os.stat() of the file, or None if it is gone
+
+        Returns:
+            FileMover outcome of the move
+        """
+        try:
+            if st is None:
+                self.logger.warning("File not found (already moved?): %s", file_path.name)
+                return FileMover.MISSING
+
+            status = self._check_integrity(file_path, cfg, st)
+            if status is not None:
+                return status
+
+            # Handle overwrite mode (for Benchmark reports)
+            if cfg.get('overwrite', False):
+                return self._move_with_overwrite(file_path, cfg, st)
+
+            ts = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+            # Keep the file's own extension when the rule accepts several
+            extension = file_path.suffix.lower()
+            if extension not in cfg['extensions']:
+                extension = f".{cfg['format']}"
+            new_name = f"{ts}_{cfg['suffix']}{extension}"
+            dest_path = self._unique_destination(cfg['dest'] / new_name)
+            new_name = dest_path.name
+
+            self.logger.info("Moving '%s' -> '%s'", file_path.name, dest_path.name)
+            status = self._move_unique(file_path, dest_path, cfg, st)
+
+            if status == FileMover.MOVED:
+                self.logger.info("SUCCESS: %s moved: '%s' -> '%s'", cfg['type'], file_path.name, new_name)
+            elif status in FileMover.FAILURES:
+                self.logger.error("FAILED: Could not move %s file '%s'", cfg['type'], file_path.name)
+            return status
+
+        except Exception as e:
+            self.logger.error("Error moving %s file '%s': %s", cfg['type'], file_path.name, e)
+            return FileMover.FAILED
+
+    def _journaled_move(self, file_path: Path, dest_path: Path, cfg: Mapping, st: os.stat_result) -> str:
+        """
+        Move a file through FileMover, recording it in the journal.
+
+        Args:
+            file_path: Path to the file to move
+            dest_path: Destination path
+            cfg: Configuration dictionary for the rule
+            st: os.stat() of the file
+
+        Returns:
+            FileMover outcome of the move
+        """
+        if self.journal:
+            if self.journal.is_handled(file_path, st.st_size, st.st_mtime_ns):
+                self.logger.info("Already filed according to the journal, skipping: %s", file_path.name)
+                return FileMover.SKIPPED
+            self.journal.begin_move(file_path, st.st_size, st.st_mtime_ns, cfg['name'], dest_path)
+
+        start = time.perf_counter()
+        status = self.file_mover.move_file(file_path, dest_path, self.logger, src_stat=st)
+        elapsed = time.perf_counter() - start
+
+        if self.journal:
+            self.journal.record(file_path, st.st_size, st.st_mtime_ns, cfg['name'], dest_path, status)
+        if status in (FileMover.MOVED, FileMover.COPIED):
+            self._catalog(file_path, dest_path, cfg, st)
+        self._log_move_event(file_path, dest_path, cfg, st, elapsed, status)
+        return status
+
+    def _finish_copy(self, file_path: Path, cfg: Mapping, st: os.stat_result) -> Optional[str]:
+        """
+        Remove the source of an earlier cross-volume copy instead of moving it again.
+
+        Args:
+            file_path: Path to the file to move
+            cfg: Configuration dictionary for the rule
+            st: os.stat() of the file
+
+        Returns:
+            FileMover outcome, or None if the file has no copy in place yet
+        """
+        dest_path = self.file_mover.copied_to(file_path, st)
+        if dest_path is None and self.journal:
+            dest_path = self.journal.copied_to(file_path, st.st_size, st.st_mtime_ns)
+        if dest_path is None:
+            return None
+
+        start = time.perf_counter()
+        status = self.file_mover.finish_copy(file_path, dest_path, self.logger, src_stat=st)
+        if status is None:
+            return None
+        if self.journal:
+            self.journal.record(file_path, st.st_size, st.st_mtime_ns, cfg['name'], dest_path, status)
+        if status == FileMover.MOVED:
+            self._log_move_event(file_path, dest_path, cfg, st, time.perf_counter() - start, status)
+        return status
+
+    def _catalog(self, file_path: Path, dest_path: Path, cfg: Mapping, st: os.stat_result) -> None:
+        """
+        Add a filed file to the export catalog.
+
+        Args:
+            file_path: Name the file had in the monitored folder
+            dest_path: Where it was filed
+            cfg: Configuration dictionary for the rule
+            st: os.stat() of the file before the move (moves keep size and mtime)
+        """
+        if self.catalog is None:
+            return
+        year = dest_path.parent.name if cfg['year_based'] else None
+        if year is not None and not re.fullmatch(r'\d{4}', year):
+            year = None
+        self.catalog.record(dest_path, cfg['name'], year, file_path.name, st.st_size, st.st_mtime)
+
+    def _log_move_event(
+        self, file_path: Path, dest_path: Path, cfg: Mapping, st: os.stat_result, elapsed: float, status: str
+    ) -> None:
+        """
+        Emit the structured record of a move attempt (JSON lines with --json-log).
+
+        Args:
+            file_path: Source file
+            dest_path: Destination path
+            cfg: Configuration dictionary for the rule
+            st: os.stat() of the source
+            elapsed: Seconds the attempt took
+            status: FileMover outcome
+        """
+        if self.events.isEnabledFor(logging.INFO):
+            fields = {
+                'rule': cfg['name'],
+                'src': str(file_path),
+                'dest': str(dest_path),
+                'bytes': st.st_size,
+                'latency_ms': round(elapsed * 1000, 3),
+                'outcome': status,
+            }
+            if self.profile:
+                fields['profile'] = self.profile
+            self.events.info('move', extra=fields)
+
+    def _move_unique(self, file_path: Path, dest_path: Path, cfg: Mapping, st: os.stat_result) -> str:
+        """
+        Move a file unless its content is already filed in the destination folder.
+
+        Args:
+            file_path: Path to the file to move
+            dest_path: Destination path
+            cfg: Configuration dictionary for the rule
+            st: os.stat() of the file
+
+        Returns:
+            FileMover outcome of the move (DUPLICATE if the content was already filed)
+        """
+        if self.duplicates is None:
+            return self._journaled_move(file_path, dest_path, cfg, st)
+
+        try:
+            digest = self.hasher.digest(file_path, st)
+        except OSError as e:
+            self.logger.warning("Could not hash '%s', moving without a duplicate check: %s", file_path.name, e)
+            return self._journaled_move(file_path, dest_path, cfg, st)
+
+        existing = self.duplicates.find(dest_path.parent, digest)
+        if existing is not None:
+            status = self._file_duplicate(file_path, dest_path, existing, cfg, st)
+            if status is not None:
+                return status
+
+        status = self._journaled_move(file_path, dest_path, cfg, st)
+        if status in (FileMover.MOVED, FileMover.COPIED):
+            self.duplicates.add(dest_path, digest, st.st_size, st.st_mtime_ns)
+        return status
+
+    def _file_duplicate(
+        self, file_path: Path, dest_path: Path, existing: Path, cfg: Mapping, st: os.stat_result
+    ) -> Optional[str]:
+        """
+        Dispose of a file whose content is already filed as `existing`.
+
+        In "skip" mode the file is removed; in "link" mode dest_path becomes a
+        hard link to the existing copy first, so the new name still appears
+        without storing the content twice.
+
+        Args:
+            file_path: Duplicate file
+            dest_path: Where it would have been filed
+            existing: Filed file with the same content
+            cfg: Configuration dictionary for the rule
+            st: os.stat() of the file
+
+        Returns:
+            DUPLICATE, LOCKED if the file could not be removed yet, or None to
+            move it normally (the hard link could not be made)
+        """
+        if self.journal and self.journal.is_handled(file_path, st.st_size, st.st_mtime_ns):
+            self.logger.info("Already filed according to the journal, skipping: %s", file_path.name)
+            return FileMover.SKIPPED
+
+        start = time.perf_counter()
+        filed_as = existing
+        if self.dedupe == 'link' and existing != dest_path:
+            try:
+                os.link(existing, dest_path)
+            except OSError as e:
+                self.logger.info("Could not hard-link '%s' to '%s' (%s); moving it instead",
+                                 dest_path.name, existing.name, e)
+                return None
+            filed_as = dest_path
+
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Still open elsewhere (Windows); undo the link and try again later
+            if filed_as != existing:
+                try:
+                    os.unlink(filed_as)
+                except OSError:
+                    pass
+            self.logger.warning("Could not remove duplicate '%s': %s", file_path.name, e)
+            return FileMover.LOCKED
+        elapsed = time.perf_counter() - start
+
+        status = FileMover.DUPLICATE
+        if self.journal:
+            self.journal.record(file_path, st.st_size, st.st_mtime_ns, cfg['name'], filed_as, status)
+        if filed_as != existing:
+            self._catalog(file_path, filed_as, cfg, st)
+        self._log_move_event(file_path, filed_as, cfg, st, elapsed, status)
+        if filed_as == existing:
+            self.logger.info("DUPLICATE: '%s' is already filed as '%s'; removed", file_path.name, existing)
+        else:
+            self.logger.info("DUPLICATE: '%s' filed as '%s', a hard link to '%s'",
+                             file_path.name, dest_path.name, existing.name)
+        return status
+
+    def _check_integrity(self, file_path: Path, cfg: Mapping, st: os.stat_result) -> Optional[str]:
+        """
+        Validate a file before filing it and quarantine it if it is damaged.
+
+        Args:
+            file_path: Path to the file to check
+            cfg: Configuration dictionary for the rule
+            st: os.stat() of the file
+
+        Returns:
+            None if the file may be filed, otherwise the outcome of this attempt
+            (QUARANTINED, or a FileMover outcome if it could not be read or moved)
+        """
+        if self.validator is None:
+            return None
+
+        start = time.perf_counter()
+        try:
+            problem = self.validator.check(file_path, st)
+        except FileNotFoundError:
+            return FileMover.MISSING
+        except OSError as e:
+            self.logger.warning("Could not validate '%s': %s", file_path.name, e)
+            return FileMover.BUSY
+        self.metrics.observe('watchdog_validate_seconds', time.perf_counter() - start, rule=cfg['name'])
+        if problem is None:
+            return None
+
+        with self._quarantine_lock:
+            dest_path = self._unique_destination(self.quarantine_dir / file_path.name)
+            status = self.file_mover.move_file(file_path, dest_path, self.logger, src_stat=st)
+        if status != FileMover.MOVED:
+            return status
+
+        status = FileMover.QUARANTINED
+        if self.journal:
+            self.journal.record(file_path, st.st_size, st.st_mtime_ns, cfg['name'], dest_path, status)
+        self._log_move_event(file_path, dest_path, cfg, st, time.perf_counter() - start, status)
+        self.logger.error("QUARANTINED: '%s' failed validation (%s) -> '%s'", file_path.name, problem, dest_path)
+        return status
+
+    def _unique_destination(self, dest_path: Path) -> Path:
+        """
+        Avoid clobbering a file that already has the same timestamped name.
+
+        Moves now run back-to-back, so two exports of one type can land in the
+        same second. Moves into a folder are serialized, so the check is safe.
+        The next free counter for a name is remembered for a few seconds, so
+        a burst checks one candidate per file instead of every earlier one.
+
+        Args:
+            dest_path: Preferred destination path
+
+        Returns:
+            dest_path, or the same name with a _1, _2, ... counter appended
+        """
+        counter = self._next_counter.get(dest_path) or 0
+        candidate = dest_path
+        if counter:
+            candidate = dest_path.with_name(f"{dest_path.stem}_{counter}{dest_path.suffix}")
+        while os.path.lexists(candidate):
+            counter += 1
+            candidate = dest_path.with_name(f"{dest_path.stem}_{counter}{dest_path.suffix}")
+        self._next_counter.discard(dest_path)
+        self._next_counter.add(dest_path, counter + 1)
+        return candidate
+
+    def _move_with_overwrite(self, file_path: Path, cfg: Mapping, st: os.stat_result) -> str:
+        """
+        Move a file with overwrite behavior, removing trailing numbers from filename.
+
+        Args:
+            file_path: Path to the file to move
+            cfg: Configuration dictionary for this rule
+            st: os.stat() of the file
+
+        Returns:
+            FileMover outcome of the move
+        """
+        try:
+            # Remove trailing numbers like (1), (02), (003), etc. from filename
+            original_name = file_path.stem  # filename without extension
+            if cfg.get('remove_trailing_numbers', False):
+                # Pattern: matches ( followed by optional digits, then )
+                cleaned_name = re.sub(r'\(\d+\)$', '', original_name)
+            else:
+                cleaned_name = original_name
+
+            # Construct destination filename
+            dest_filename = f"{cleaned_name}.{cfg['format']}"
+            dest_path = cfg['dest'] / dest_filename
+
+            # The move replaces an existing file atomically, so it is not deleted
+            # first (a locked source would otherwise leave no file at all)
+            self.logger.info("Moving '%s' -> '%s' (overwrite mode)", file_path.name, dest_path.name)
+            status = self._journaled_move(file_path, dest_path, cfg, st)
+
+            if status == FileMover.MOVED:
+                self.logger.info(
+                    "SUCCESS: %s moved: '%s' -> '%s'", cfg['type'], file_path.name, dest_path.name
+                )
+            elif status in FileMover.FAILURES:
+                self.logger.error("FAILED: Could not move %s file '%s'", cfg['type'], file_path.name)
+            return status
+
+        except Exception as e:
+            self.logger.error("Error moving %s file '%s': %s", cfg['type'], file_path.name, e)
+            return FileMover.FAILED
+
+    def _move_new_rule_file(self, file_path: Path, cfg: Mapping, st: Optional[os.stat_result]) -> str:
+        """
+        Move a file using new naming convention with year-based subfolders.
+
+        Args:
+            file_path: Path to the file to move
+            cfg: Configuration dictionary for this rule
+            st: os.stat() of the file, or None if it is gone
+
+        Returns:
+            FileMover outcome of the move
+        """
+        try:
+            if st is None:
+                self.logger.warning("File not found (already moved?): %s", file_path.name)
+                return FileMover.MISSING
+
+            status = self._check_integrity(file_path, cfg, st)
+            if status is not None:
+                return status
+
+            # Extract year from filename, or failing that from the dates in the file
+            year = self.year_extractor.extract_year(file_path.name, cfg['year_strategy'])
+            if not year and self.sniffer is not None:
+                year = self._year_from_content(file_path, st, cfg)
+
+            # Handle generic Response_Time files - detect CAD/RMS from filename
+            target_dir = self._target_dir(file_path, cfg)
+            if cfg.get('detect_type', False):
+                self.logger.info("Detected type from filename: %s", target_dir)
+
+            if not year:
+                self.logger.warning(
+                    "Could not extract year from '%s' using strategy '%s'. "
+                    "Moving to base directory without year subfolder.",
+                    file_path.name, cfg['year_strategy']
+                )
+                dest_dir = self.base_exports / target_dir
+            else:
+                dest_dir = self.base_exports / target_dir / year
+
+            # Keep original filename
+            dest_path = dest_dir / file_path.name
+
+            self.logger.info("Moving '%s' -> '%s'", file_path.name, dest_path)
+            status = self._move_unique(file_path, dest_path, cfg, st)
+
+            if status == FileMover.MOVED:
+                self.logger.info(
+                    "SUCCESS: %s file moved: '%s' -> '%s'", target_dir, file_path.name, dest_path
+                )
+            elif status in FileMover.FAILURES:
+                self.logger.error("FAILED: Could not move file '%s'", file_path.name)
+            return status
+
+        except Exception as e:
+            self.logger.error("Error moving file '%s': %s", file_path.name, e)
+            return FileMover.FAILED
+
+
+class InotifyObserver:
+    """
+    Minimal Linux inotify event source subscribed to IN_CLOSE_WRITE and IN_MOVED_TO.
+
+    A drop-in for watchdog's Observer (schedule/start/stop/join). The kernel
+    only reports a file once its writer closes it or it is renamed into a
+    watched folder, so each export produces a single event and needs no
+    stability polling. Both are delivered to the handler as FileClosedEvent.
+
+    inotify watches one folder at a time, so a recursive schedule adds a
+    watch per subfolder, and for subfolders created or moved in later.
+    Handlers with a should_watch(folder) method decide which subfolders
+    get one; pruned subtrees cost no watches and produce no events.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+
+    _EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, logger: logging.Logger):
+        """
+        Initialize the InotifyObserver.
+
+        Args:
+            logger: Logger instance for logging
+
+        Raises:
+            OSError: If inotify is unavailable or cannot be initialized
+        """
+        self.logger = logger
+        self._libc = self._load_libc()
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._wake_r, self._wake_w = os.pipe()
+        # wd -> (folder, handler, recursive)
+        self._watches: Dict[int, Tuple[str, FileSystemEventHandler, bool]] = {}
+        self._recursive_roots: List[Tuple[str, FileSystemEventHandler]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def watch_count(self) -> int:
+        """Number of folders with an inotify watch."""
+        return len(self._watches)
+
+    @staticmethod
+    def _load_libc() -> ctypes.CDLL:
+        """Load libc with the inotify entry points."""
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+
+    @staticmethod
+    def is_available() -> bool:
+        """
+        Check whether this backend can run on the current platform.
+
+        Returns:
+            True on Linux with a libc that provides inotify
+        """
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            return hasattr(InotifyObserver._load_libc(), 'inotify_init1')
+        except OSError:
+            return False
+
+    def schedule(
+        self,
+        handler: FileSystemEventHandler,
+        path: str,
+        recursive: bool = False
+    ) -> None:
+        """
+        Watch a folder.
+
+        Args:
+            handler: Event handler receiving FileClosedEvent
+            path: Folder to watch
+            recursive: Also watch its subfolders (those the handler's
+                should_watch() accepts, if it has one)
+
+        Raises:
+            OSError: If the watch cannot be added
+        """
+        self._add_watch(path, handler, recursive)
+        if recursive:
+            self._recursive_roots.append((path, handler))
+            self._add_tree(path, handler)
+
+    def _add_watch(self, path: str, handler: FileSystemEventHandler, recursive: bool) -> None:
+        """
+        Add (or update) the watch of one folder.
+
+        Raises:
+            OSError: If the watch cannot be added
+        """
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+        if recursive:
+            mask |= self.IN_CREATE
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch failed for '{path}': {os.strerror(err)}")
+        self._watches[wd] = (path, handler, recursive)
+
+    def _add_tree(self, path: str, handler: FileSystemEventHandler, report: bool = False) -> None:
+        """
+        Watch the subfolders of a recursively watched folder.
+
+        Args:
+            path: Folder whose subfolders are added
+            handler: Handler of the recursive watch
+            report: Deliver FileCreatedEvent for the files found (for a
+                folder that appeared after its parent was watched, whose
+                files no watch has seen)
+        """
+        should_watch = getattr(handler, 'should_watch', None)
+        folders = [path]
+        while folders:
+            folder = folders.pop()
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if should_watch is None or should_watch(entry.path):
+                                try:
+                                    self._add_watch(entry.path, handler, True)
+                                except OSError as e:
+                                    # Typically fs.inotify.max_user_watches reached
+                                    self.logger.warning("Not watching '%s': %s", entry.path, e)
+                                    continue
+                                folders.append(entry.path)
+                        elif report:
+                            handler.dispatch(FileCreatedEvent(entry.path))
+            except OSError as e:
+                self.logger.warning("Could not list '%s': %s", folder, e)
+
+    def start(self) -> None:
+        """Start reading events."""
+        self._thread = threading.Thread(target=self._run, name="watchdog-inotify", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the reader thread to exit."""
+        os.write(self._wake_w, b'x')
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the reader thread to exit and release the inotify descriptor.
+
+        Args:
+            timeout: Maximum seconds to wait
+        """
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        """Reader loop: block until events arrive, then dispatch them."""
+        while True:
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [])
+            if self._wake_r in readable:
+                return
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except OSError as e:
+                self.logger.error("inotify read failed: %s", e)
+                return
+            self._dispatch(buf)
+
+    def _dispatch(self, buf: bytes) -> None:
+        """
+        Decode a buffer of inotify events and deliver them.
+
+        Args:
+            buf: Raw bytes read from the inotify descriptor
+        """
+        header = self._EVENT_HEADER
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _cookie, length = header.unpack_from(buf, offset)
+            offset += header.size
+            name = buf[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                self.logger.warning("inotify queue overflowed; rescanning monitored folders")
+                # Subfolders created while events were lost have no watch yet
+                for root, handler in self._recursive_roots:
+                    self._add_tree(root, handler)
+                for handler in {id(w[1]): w[1] for w in self._watches.values()}.values():
+                    if hasattr(handler, 'rescan'):
+                        handler.rescan()
+                continue
+            if mask & self.IN_IGNORED:
+                path, _, recursive = self._watches.pop(wd, (None, None, False))
+                if path and not recursive:
+                    self.logger.warning("inotify watch removed for '%s' (folder deleted?)", path)
+                continue
+            if not name or wd not in self._watches:
+                continue
+
+            folder, handler, recursive = self._watches[wd]
+            src_path = os.path.join(folder, os.fsdecode(name))
+            if mask & self.IN_ISDIR:
+                if recursive and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._watch_new_folder(src_path, handler)
+                continue
+            if mask & self.IN_CREATE:
+                # Only wanted for folders; files are reported when closed
+                continue
+            try:
+                handler.dispatch(FileClosedEvent(src_path))
+            except Exception as e:
+                self.logger.error("Error handling event for '%s': %s", src_path, e)
+
+    def _watch_new_folder(self, path: str, handler: FileSystemEventHandler) -> None:
+        """
+        Watch a folder created or moved into a recursively watched one.
+
+        Files written into it before the watch was added produce no event,
+        so whatever it already holds is reported as created.
+
+        Args:
+            path: New folder
+            handler: Handler of the parent's watch
+        """
+        should_watch = getattr(handler, 'should_watch', None)
+        if should_watch is not None and not should_watch(path):
+            return
+        try:
+            self._add_watch(path, handler, True)
+        except OSError as e:
+            self.logger.warning("Not watching '%s': %s", path, e)
+            return
+        try:
+            self._add_tree(path, handler, report=True)
+        except Exception as e:
+            self.logger.error("Error handling new folder '%s': %s", path, e)
+
+
+class IncrementalPollingObserver:
+    """
+    Polling event source for folders without reliable native events.
+
+    A drop-in for watchdog's Observer (schedule/start/stop/join), meant for
+    OneDrive and network folders. Instead of re-stat'ing every file on every
+    pass, each folder keeps its own mtime and a compact snapshot of
+    {name: (size, mtime_ns)}:
+
+    - a folder whose mtime has not changed is skipped (one stat per poll)
+    - a changed folder is listed with os.scandir; only new names are stat'ed
+      (DirEntry.stat() is free on Windows) and the listing is diffed against
+      the snapshot to produce created/deleted events
+    - recently created files stay "hot" for a while and are re-stat'ed each
+      poll, producing modified events while they are still being written
+    - every full_scan_interval seconds all files are compared, to catch
+      in-place rewrites that do not touch the folder mtime
+    - a partial download that disappears in the same poll as its final name
+      appears (e.g. "x.xlsx.crdownload" -> "x.xlsx") is reported as a move
+
+    The poll interval drops to min_interval after any activity and doubles
+    on each idle poll up to max_interval.
+
+    A recursive schedule polls each subfolder the same way. Subfolders are
+    found when their parent's listing changes and, on full passes, checked
+    again against the handler's should_watch(folder) if it has one, so a
+    pruned subtree costs nothing after it has been ruled out.
+    """
+
+    # Folder mtimes this close to "now" may be hiding a second change within the
+    # file system's timestamp granularity (2s on FAT/SMB), so they are not trusted
+    RACY_SECONDS = 2.0
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        min_interval: float = 0.5,
+        max_interval: float = 5.0,
+        full_scan_interval: float = 60.0,
+        hot_seconds: float = 30.0
+    ):
+        """
+        Initialize the IncrementalPollingObserver.
+
+        Args:
+            logger: Logger instance for logging
+            min_interval: Seconds between polls right after activity
+            max_interval: Longest interval between polls when idle
+            full_scan_interval: Seconds between full comparisons of every file
+            hot_seconds: How long a new or changed file is re-stat'ed each poll
+        """
+        self.logger = logger
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.full_scan_interval = full_scan_interval
+        self.hot_seconds = hot_seconds
+        self._folders: List['_PolledFolder'] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'polls': 0, 'scans': 0, 'skipped': 0, 'events': 0}
+
+    @property
+    def watch_count(self) -> int:
+        """Number of folders being polled."""
+        return len(self._folders)
+
+    def schedule(
+        self,
+        handler: FileSystemEventHandler,
+        path: str,
+        recursive: bool = False
+    ) -> None:
+        """
+        Watch a folder. Files already in it are taken as the baseline.
+
+        Args:
+            handler: Event handler receiving created/modified/deleted events
+            path: Folder to watch
+            recursive: Also watch its subfolders (those the handler's
+                should_watch() accepts, if it has one)
+
+        Raises:
+            OSError: If the folder cannot be listed
+        """
+        self._add_folder(path, handler, recursive, baseline=True)
+
+    def _add_folder(
+        self,
+        path: str,
+        handler: FileSystemEventHandler,
+        recursive: bool,
+        baseline: bool
+    ) -> '_PolledFolder':
+        """
+        Start polling a folder (and, if recursive, its watched subfolders).
+
+        Args:
+            path: Folder to poll
+            handler: Event handler for its files
+            recursive: Poll subfolders too
+            baseline: Take the files already there as the baseline; otherwise
+                its first poll reports them as created
+
+        Returns:
+            Polling state of the folder
+
+        Raises:
+            OSError: If a baseline was asked for and the folder cannot be listed
+        """
+        folder = _PolledFolder(path, handler, recursive)
+        if baseline:
+            dirs: Optional[List[str]] = [] if recursive else None
+            folder.dir_mtime_ns = self._dir_mtime(path)
+            folder.snapshot = {name: sig for name, sig in self._list(folder, full=True, dirs=dirs)}
+            folder.last_full = time.monotonic()
+        self._folders.append(folder)
+        if baseline and recursive:
+            self._sync_subfolders(folder, dirs, full=True, baseline=True)
+        return folder
+
+    def _remove_folder(self, folder: '_PolledFolder') -> None:
+        """Stop polling a folder and its subfolders."""
+        try:
+            self._folders.remove(folder)
+        except ValueError:
+            pass
+        for child in folder.subdirs.values():
+            if child is not None:
+                self._remove_folder(child)
+
+    def _sync_subfolders(
+        self,
+        folder: '_PolledFolder',
+        names: List[str],
+        full: bool,
+        baseline: bool = False
+    ) -> int:
+        """
+        Follow the subfolders of a recursively polled folder.
+
+        Args:
+            folder: Parent folder state
+            names: Subfolders in its current listing
+            full: Check known subfolders against should_watch() again
+            baseline: Take files in new subfolders as the baseline
+
+        Returns:
+            Number of subfolders that started being polled
+        """
+        should_watch = getattr(folder.handler, 'should_watch', None)
+        current = set(names)
+        for name in [n for n in folder.subdirs if n not in current]:
+            child = folder.subdirs.pop(name)
+            if child is not None:
+                self._remove_folder(child)
+
+        added = 0
+        for name in current:
+            known = name in folder.subdirs
+            if known and not full:
+                continue
+            child = folder.subdirs.get(name)
+            path = os.path.join(folder.path, name)
+            wanted = should_watch is None or should_watch(path)
+            if child is not None and not wanted:
+                self._remove_folder(child)
+                folder.subdirs[name] = None
+            elif child is None and wanted:
+                try:
+                    # A folder that was already there but only now in scope keeps its files as they are
+                    folder.subdirs[name] = self._add_folder(path, folder.handler, True, baseline=baseline or known)
+                    added += 1
+                except OSError as e:
+                    self.logger.warning("Could not list '%s': %s", path, e)
+                    folder.subdirs[name] = None
+            elif not known:
+                folder.subdirs[name] = None
+        return added
+
+    def start(self) -> None:
+        """Start polling."""
+        self._thread = threading.Thread(target=self._run, name="watchdog-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the polling thread to exit."""
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the polling thread to exit.
+
+        Args:
+            timeout: Maximum seconds to wait
+        """
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        """Poll loop with adaptive interval."""
+        interval = self.min_interval
+        while not self._stop.wait(interval):
+            events = 0
+            # Polls add and remove subfolders of recursive watches
+            for folder in list(self._folders):
+                try:
+                    events += self._poll(folder)
+                except Exception as e:
+                    self.logger.error("Error polling '%s': %s", folder.path, e)
+            self.stats['polls'] += 1
+            self.stats['events'] += events
+            interval = self.min_interval if events else min(interval * 2, self.max_interval)
+
+    @staticmethod
+    def _dir_mtime(path: str) -> Optional[int]:
+        """Return a folder's mtime_ns, or None if it cannot be stat'ed."""
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _list(self, folder: '_PolledFolder', full: bool, dirs: Optional[List[str]] = None):
+        """
+        Yield (name, (size, mtime_ns)) for the files in a folder.
+
+        Entries already in the snapshot keep their old signature unless this
+        is a full pass or the file is hot, so only new names cost a stat.
 
-        Returns:
-            Year string (4 digits) or None if not found
+        Args:
+            folder: Folder state
+            full: Stat every file
+            dirs: Collects the names of subfolders, if given
         """
-        match = re.search(r'to_(\d{4})_', filename)
-        return match.group(1) if match else None
+        snapshot = folder.snapshot
+        with os.scandir(folder.path) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_file():
+                        if dirs is not None and entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                        continue
+                    name = entry.name
+                    if not full and name in snapshot and name not in folder.hot:
+                        yield name, snapshot[name]
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield name, (st.st_size, st.st_mtime_ns)
 
-    @staticmethod
-    def extract_year(filename: str, strategy: str) -> Optional[str]:
+    def _poll(self, folder: '_PolledFolder') -> int:
         """
-        Extract year based on the specified strategy.
+        Poll one folder and deliver events for what changed.
 
         Args:
-            filename: Filename to extract year from
-            strategy: Strategy to use ("start" or "end_range")
+            folder: Folder state
 
         Returns:
-            Year string (4 digits) or None if not found
+            Number of events delivered (and subfolders added)
         """
-        if strategy == "start":
-            return YearExtractor.extract_year_start(filename)
-        elif strategy == "end_range":
-            return YearExtractor.extract_year_end_range(filename)
+        now = time.monotonic()
+        added_folders = 0
+        for name, since in list(folder.hot.items()):
+            if now - since > self.hot_seconds:
+                del folder.hot[name]
+
+        full = now - folder.last_full >= self.full_scan_interval
+        dir_mtime = self._dir_mtime(folder.path)
+        if dir_mtime is None:
+            return 0
+        racy = time.time_ns() - dir_mtime < self.RACY_SECONDS * 1e9
+        listing_changed = full or racy or dir_mtime != folder.dir_mtime_ns
+        if not listing_changed and not folder.hot:
+            self.stats['skipped'] += 1
+            return 0
+
+        self.stats['scans'] += 1
+        if full:
+            folder.last_full = now
+        folder.dir_mtime_ns = dir_mtime
+
+        if not listing_changed:
+            # Only hot files can have changed; stat them without listing
+            current = dict(folder.snapshot)
+            for name in folder.hot:
+                try:
+                    st = os.stat(os.path.join(folder.path, name))
+                except OSError:
+                    current.pop(name, None)
+                    continue
+                current[name] = (st.st_size, st.st_mtime_ns)
         else:
-            return None
+            dirs: Optional[List[str]] = [] if folder.recursive else None
+            try:
+                current = dict(self._list(folder, full, dirs))
+            except OSError as e:
+                self.logger.warning("Could not list '%s': %s", folder.path, e)
+                return 0
+            if dirs is not None:
+                # New folders count as activity, so their files are picked up soon
+                added_folders = self._sync_subfolders(folder, dirs, full)
 
+        events = []
+        previous = folder.snapshot
+        deleted = previous.keys() - current.keys()
+        # Partial downloads that vanished, by the name they were renamed to
+        renamed_from = {}
+        for name in deleted:
+            final = DownloadFilter.final_name(name)
+            if final:
+                renamed_from[final] = name
+        for name, sig in current.items():
+            old = previous.get(name)
+            if old is None:
+                src = renamed_from.get(name)
+                if src is not None:
+                    deleted.discard(src)
+                    events.append(FileMovedEvent(
+                        os.path.join(folder.path, src), os.path.join(folder.path, name)
+                    ))
+                else:
+                    events.append(FileCreatedEvent(os.path.join(folder.path, name)))
+                folder.hot[name] = now
+            elif old != sig:
+                events.append(FileModifiedEvent(os.path.join(folder.path, name)))
+                folder.hot[name] = now
+        for name in deleted:
+            events.append(FileDeletedEvent(os.path.join(folder.path, name)))
+            folder.hot.pop(name, None)
+        folder.snapshot = current
 
-class ExportWatchdogHandler(FileSystemEventHandler):
+        for event in events:
+            try:
+                folder.handler.dispatch(event)
+            except Exception as e:
+                self.logger.error("Error handling event for '%s': %s", event.src_path, e)
+        return len(events) + added_folders
+
+
+class _PolledFolder:
+    """Polling state of one folder watched by IncrementalPollingObserver."""
+
+    __slots__ = ('path', 'handler', 'recursive', 'subdirs', 'dir_mtime_ns', 'snapshot', 'hot', 'last_full')
+
+    def __init__(self, path: str, handler: FileSystemEventHandler, recursive: bool = False):
+        self.path = path
+        self.handler = handler
+        self.recursive = recursive
+        # Subfolder name -> its state, or None while it is not watched
+        self.subdirs: Dict[str, Optional['_PolledFolder']] = {}
+        self.dir_mtime_ns: Optional[int] = None
+        self.snapshot: Dict[str, Tuple[int, int]] = {}
+        self.hot: Dict[str, float] = {}
+        self.last_full = 0.0
+
+
+def create_observer(backend: str, logger: logging.Logger, poll_interval: float = 5.0):
     """
-    File system event handler that monitors and organizes export files.
+    Create the file system event source.
+
+    Args:
+        backend: "auto", "inotify", "polling" or "watchdog"
+        logger: Logger instance for logging
+        poll_interval: Longest interval between polls when idle ("polling" only)
+
+    Returns:
+        Observer-like object with schedule/start/stop/join
+    """
+    if backend == 'polling':
+        logger.info("Using incremental polling backend (up to %gs between polls when idle)", poll_interval)
+        return IncrementalPollingObserver(logger, max_interval=poll_interval)
+    if backend in ('auto', 'inotify'):
+        if InotifyObserver.is_available():
+            try:
+                observer = InotifyObserver(logger)
+                logger.info("Using native inotify backend (IN_CLOSE_WRITE / IN_MOVED_TO)")
+                return observer
+            except OSError as e:
+                logger.warning("inotify backend unavailable (%s); falling back to watchdog Observer", e)
+        elif backend == 'inotify':
+            logger.warning("inotify backend requested but not available here; using watchdog Observer")
+    logger.info("Using watchdog Observer backend")
+    return Observer()
+
+
+class TraceEvent(NamedTuple):
+    """One file system event read back from a trace."""
+
+    t: float
+    kind: str
+    path: str
+    dest: Optional[str]
+    size: Optional[int]
+    is_directory: bool
+    profile: Optional[str]
+    own: bool
+
+
+class EventRecorder:
+    """
+    Writes the raw file system events a handler receives to a trace file.
+
+    One JSON object per line (gzip-compressed when the file name ends in
+    .gz): seconds since recording started, the event type, the path and,
+    for moves, the destination, each relative to its monitored folder
+    ("downloads/Reports/x.xlsx"), plus the file's size when the event
+    arrived and whether a deletion was the service filing the file away.
+    Paths outside the monitored folders are kept as they are.
+    Traces carry no user names or home folders, so they can be replayed
+    on another machine (benchmarks/replay_trace.py).
+
+    Recording costs a stat and a buffered write per event on the observer
+    thread; the file is flushed about once a second.
     """
 
-    def __init__(self, base_exports: Path, logger: logging.Logger):
+    VERSION = 1
+    FLUSH_SECONDS = 1.0
+
+    def __init__(self, path: Path, logger: logging.Logger):
         """
-        Initialize the watchdog handler.
+        Initialize the EventRecorder and write the trace header.
 
         Args:
-            base_exports: Base directory for all exports
+            path: Trace file (replaced if it exists)
             logger: Logger instance for logging
         """
-        self.base_exports = base_exports
+        self.path = path
         self.logger = logger
-        self.file_mover = FileMover()
-        self.year_extractor = YearExtractor()
-
-        # Get user home directory dynamically
-        home = Path.home()
-        onedrive_base = home / "OneDrive - City of Hackensack"
+        self.events = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == '.gz':
+            self._file = gzip.open(path, 'wt', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._flushed = self._start
+        self._write({'trace': 'watchdog-events', 'version': self.VERSION,
+                     'started': datetime.now().isoformat(timespec='seconds')})
 
-        # === Monitored folders ===
-        self.desktop_path = onedrive_base / "Desktop"
-        self.down_onedrive = onedrive_base / "Downloads"
-        self.down_local = home / "Downloads"
-        self.monitor_paths = [
-            self.desktop_path,
-            self.down_onedrive,
-            self.down_local
-        ]
+    def _write(self, entry: Dict[str, Any]) -> None:
+        """Append one JSON line."""
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
 
-        # Ensure monitored folders exist
-        for p in self.monitor_paths:
-            p.mkdir(parents=True, exist_ok=True)
+    @staticmethod
+    def _relative(path: str, roots: List[Tuple[str, str]]) -> str:
+        """Express a path relative to the monitored folder holding it."""
+        for name, prefix in roots:
+            if path.startswith(prefix):
+                return name + '/' + path[len(prefix):].replace(os.sep, '/')
+            if path == prefix[:-1]:
+                return name
+        return path
 
-        # === Debounce duplicate events ===
-        self.recently_handled: Dict[Path, float] = {}
-        self.event_debounce_seconds = 5
+    def record(
+        self,
+        event,
+        roots: List[Tuple[str, str]],
+        profile: Optional[str] = None,
+        own: bool = False
+    ) -> None:
+        """
+        Append an event to the trace.
 
-        # === Export configurations ===
-        # Legacy rules (preserved from original)
-        self.legacy_rules: Dict[str, Dict] = {
-            'SCRPA_CAD_Export': {
-                'src': self.desktop_path,
-                'dest': self.base_exports / '_CAD' / 'SCRPA',
-                'suffix': 'SCRPA_CAD',
-                'type': 'CAD',
-                'format': 'xlsx',
-                'year_based': False
-            },
-            'SCRPA_RMS_Export': {
-                'src': self.desktop_path,
-                'dest': self.base_exports / '_RMS' / 'SCRPA',
-                'suffix': 'SCRPA_RMS',
-                'type': 'RMS',
-                'format': 'xlsx',
-                'year_based': False
-            },
-            'OTActivity': {
-                'src': self.down_onedrive,
-                'dest': self.base_exports / '_Overtime',
-                'suffix': 'OTActivity',
-                'type': 'OvertimeActivity',
-                'format': 'xlsx',
-                'year_based': False
-            },
-            'TimeOffActivity': {
-                'src': self.down_onedrive,
-                'dest': self.base_exports / '_Time_Off',
-                'suffix': 'TimeOffActivity',
-                'type': 'TimeOffActivity',
-                'format': 'xlsx',
-                'year_based': False
-            },
-            'e_ticket': {
-                'src': self.down_onedrive,
-                'dest': self.base_exports / '_Summons' / 'E_Ticket',
-                'suffix': 'e_ticket',
-                'type': 'E_Ticket',
-                'format': 'xlsx',
-                'year_based': False
-            },
-            'Backtracet_Arrests_Export': {
-                'src': self.down_onedrive,
-                'dest': self.base_exports / '_BACKTRACE_ARRESTS',
-                'suffix': 'Backtracet_Arrests_Export',
-                'type': 'Backtracet_Arrests',
-                'format': 'xlsx',
-                'year_based': False
-            },
-            'vehicle-pursuit-reports': {
-                'src': self.down_local,
-                'dest': self.base_exports / 'Benchmark' / 'vehicle_pursuit',
-                'suffix': 'vehicle-pursuit-reports',
-                'type': 'VehiclePursuit',
-                'format': 'csv',
-                'year_based': False,
-                'overwrite': True,  # Overwrite existing file
-                'remove_trailing_numbers': True  # Remove (1), (02), etc.
-            },
-            'use-of-force-reports': {
-                'src': self.down_local,
-                'dest': self.base_exports / 'Benchmark' / 'use_force',
-                'suffix': 'use-of-force-reports',
-                'type': 'UseOfForce',
-                'format': 'csv',
-                'year_based': False,
-                'overwrite': True,
-                'remove_trailing_numbers': True
-            },
-            'show-of-force-reports': {
-                'src': self.down_local,
-                'dest': self.base_exports / 'Benchmark' / 'show_force',
-                'suffix': 'show-of-force-reports',
-                'type': 'ShowOfForce',
-                'format': 'csv',
-                'year_based': False,
-                'overwrite': True,
-                'remove_trailing_numbers': True
-            },
+        Args:
+            event: watchdog event as delivered to the handler
+            roots: (folder name, folder path + separator) of the handler's
+                monitored folders
+            profile: Profile the handler serves, if any
+            own: The event was caused by the service itself (a file it
+                was handling disappeared because it moved it)
+        """
+        now = time.monotonic()
+        moved = getattr(event, 'dest_path', None)
+        entry: Dict[str, Any] = {
+            't': round(now - self._start, 6),
+            'e': event.event_type,
+            'p': self._relative(event.src_path, roots),
         }
+        if moved:
+            entry['d'] = self._relative(moved, roots)
+        if event.is_directory:
+            entry['dir'] = 1
+        elif event.event_type != 'deleted':
+            try:
+                entry['s'] = os.stat(moved or event.src_path).st_size
+            except OSError:
+                pass
+        if profile:
+            entry['u'] = profile
+        if own:
+            entry['own'] = 1
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write(entry)
+            self.events += 1
+            if now - self._flushed >= self.FLUSH_SECONDS:
+                self._file.flush()
+                self._flushed = now
 
-        # New rules with year-based organization
-        self.new_rules: Dict[str, Dict] = {
-            'LawSoft_Arrest': {
-                'keywords': ['LAWSOFT_ARREST', 'LawSoft_Arrest', 'lawsoft_arrest'],
-                'target_dir': '_Arrest',
-                'year_strategy': 'start',
-                'format': 'xlsx',
-                'year_based': True
-            },
-            'Monthly_CAD': {
-                'keywords': ['Monthly_CAD'],
-                'target_dir': '_CAD/monthly_export',
-                'year_strategy': 'start',
-                'format': 'xlsx',
-                'year_based': True
-            },
-            'Monthly_RMS': {
-                'keywords': ['Monthly_RMS'],
-                'target_dir': '_RMS/monthly_export',
-                'year_strategy': 'start',
-                'format': 'xlsx',
-                'year_based': True
-            },
-            'Rolling13_CAD': {
-                'keywords': ['Rolling13_CAD'],
-                'target_dir': '_CAD/rolling_13',
-                'year_strategy': 'end_range',
-                'format': 'xlsx',
-                'year_based': True
-            },
-            'Rolling13_RMS': {
-                'keywords': ['Rolling13_RMS'],
-                'target_dir': '_RMS/rolling_13',
-                'year_strategy': 'end_range',
-                'format': 'xlsx',
-                'year_based': True
-            },
-            'ResponseTime_CAD': {
-                'keywords': ['ResponseTime_CAD', 'Response_Time_CAD'],
-                'target_dir': '_CAD/response_time',
-                'year_strategy': 'end_range',
-                'format': 'xlsx',
-                'year_based': True
-            },
-            'ResponseTime_RMS': {
-                'keywords': ['ResponseTime_RMS', 'Response_Time_RMS'],
-                'target_dir': '_RMS/response_time',
-                'year_strategy': 'end_range',
-                'format': 'xlsx',
-                'year_based': True
-            },
-            'Response_Time_Generic': {
-                'keywords': ['Response_Time', 'ResponseTime'],
-                'target_dir': '_CAD/response_time',  # Default to CAD if not specified
-                'year_strategy': 'end_range',
-                'format': 'xlsx',
-                'year_based': True,
-                'detect_type': True  # Flag to detect CAD/RMS from filename
-            },
-        }
+    def close(self) -> None:
+        """Flush and close the trace."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                self.logger.info("Recorded %s event(s) to %s", self.events, self.path)
 
-        # Create all destination directories (without year subfolders)
-        for cfg in self.legacy_rules.values():
-            cfg['dest'].mkdir(parents=True, exist_ok=True)
 
-        self.logger.info(f"Export Watchdog initialized. Base exports: {self.base_exports}")
-        self.logger.info("Watching folders:")
-        for p in self.monitor_paths:
-            self.logger.info(f"  • {p}")
+def read_trace(path: Path) -> Iterable[TraceEvent]:
+    """
+    Read a trace written by EventRecorder.
 
-        # Process any existing matching files
-        self._process_existing_files()
+    Args:
+        path: Trace file (.gz for a compressed one)
 
-    def _process_existing_files(self) -> None:
-        """Scan monitored folders for existing files matching our rules."""
-        self.logger.info("Starting initial directory scan")
+    Yields:
+        TraceEvent per recorded event, in order
 
-        # Process legacy rules
-        for key, cfg in self.legacy_rules.items():
-            # Check all monitored folders, not just src (for files that might be in local Downloads)
-            patterns = [f"*{key}*.{cfg['format']}"]
-            # Also support .xls if format is .xlsx
-            if cfg['format'] == 'xlsx':
-                patterns.append(f"*{key}*.xls")
-            # Special case: e_ticket also supports CSV files
-            if key == 'e_ticket':
-                patterns.append(f"*{key}*.csv")
-            
-            # For Benchmark reports, check the specific source folder
-            monitor_paths = self.monitor_paths if not cfg.get('src') else [cfg['src']]
-            
-            for monitor_path in monitor_paths:
-                for pattern in patterns:
-                    for fp in monitor_path.glob(pattern):
-                        if fp.is_file():
-                            self.logger.info(f"Startup scan: found '{fp.name}' matching '{key}'")
-                            self._move_legacy_file(fp, cfg)
-
-        # Process new rules
-        for key, cfg in self.new_rules.items():
-            for keyword in cfg['keywords']:
-                pattern = f"*{keyword}*.{cfg['format']}"
-                for monitor_path in self.monitor_paths:
-                    for fp in monitor_path.glob(pattern):
-                        if fp.is_file():
-                            self.logger.info(f"Startup scan: found '{fp.name}' matching '{key}'")
-                            self._move_new_rule_file(fp, cfg)
+    Raises:
+        ValueError: If the file is not an event trace of a known version
+    """
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('trace') != 'watchdog-events':
+            raise ValueError(f"{path.name} is not a watchdog event trace")
+        if header.get('version') != EventRecorder.VERSION:
+            raise ValueError(f"{path.name}: unsupported trace version {header.get('version')}")
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            yield TraceEvent(entry['t'], entry['e'], entry['p'], entry.get('d'), entry.get('s'),
+                             bool(entry.get('dir')), entry.get('u'), bool(entry.get('own')))
 
-    def on_created(self, event) -> None:
-        """Handle file creation events."""
-        if not event.is_directory:
-            self._handle(event.src_path)
 
-    def on_modified(self, event) -> None:
-        """Handle file modification events."""
-        if not event.is_directory:
-            self._handle(event.src_path)
+class MetricsServer:
+    """
+    Serves MetricsRegistry.render() at http://<host>:<port>/metrics.
 
-    def on_moved(self, event: FileSystemMovedEvent) -> None:
-        """Handle file move events."""
-        if not event.is_directory:
-            self._handle(event.dest_path)
+    Binds to localhost by default; runs on a daemon thread.
+    """
 
-    def _handle(self, path_str: str) -> None:
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        port: int,
+        logger: logging.Logger,
+        host: str = '127.0.0.1'
+    ):
         """
-        Process a file system event.
+        Initialize the MetricsServer.
 
         Args:
-            path_str: Path to the file that triggered the event
+            registry: Metrics to expose
+            port: TCP port to listen on
+            logger: Logger instance for logging
+            host: Interface to bind
         """
-        fp = Path(path_str)
-        now = time.time()
+        self.logger = logger
+        registry_ref = registry
 
-        # Ignore duplicates within debounce window
-        if fp in self.recently_handled:
-            if (now - self.recently_handled[fp]) < self.event_debounce_seconds:
-                return
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
 
-        # Cleanup old entries
-        self.recently_handled = {
-            p: t for p, t in self.recently_handled.items()
-            if (now - t) < self.event_debounce_seconds
-        }
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
 
-        name_lower = fp.name.lower()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="watchdog-metrics-http", daemon=True
+        )
 
-        # Check legacy rules first
-        for key, cfg in self.legacy_rules.items():
-            # Support both .xls and .xlsx for legacy files
-            expected_format = cfg['format']
-            if expected_format == 'xlsx':
-                format_match = name_lower.endswith('.xlsx') or name_lower.endswith('.xls')
-            else:
-                format_match = name_lower.endswith(f".{expected_format}")
-            
-            # Special case: e_ticket also supports CSV files
-            if key == 'e_ticket':
-                format_match = format_match or name_lower.endswith('.csv')
-            
-            if key.lower() in name_lower and format_match:
-                self.recently_handled[fp] = now
-                time.sleep(1)  # Let any write finish
-                self.logger.info(f"Detected '{key}' in '{fp.name}', moving now.")
-                self._move_legacy_file(fp, cfg)
-                return
+    def start(self) -> None:
+        """Start serving."""
+        self._thread.start()
+        host, port = self._server.server_address[:2]
+        self.logger.info("Metrics available at http://%s:%s/metrics", host, port)
 
-        # Check new rules
-        for key, cfg in self.new_rules.items():
-            for keyword in cfg['keywords']:
-                if keyword.lower() in name_lower and name_lower.endswith(f".{cfg['format']}"):
-                    self.recently_handled[fp] = now
-                    time.sleep(1)  # Let any write finish
-                    self.logger.info(f"Detected '{key}' in '{fp.name}', moving now.")
-                    self._move_new_rule_file(fp, cfg)
-                    return
+    def stop(self) -> None:
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class MetricsFileWriter:
+    """
+    Periodically writes MetricsRegistry.render() to a file.
+
+    The file is replaced atomically, so a collector (e.g. node_exporter's
+    textfile collector) never reads a half-written snapshot.
+    """
 
-    def _move_legacy_file(self, file_path: Path, cfg: Dict) -> None:
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        path: Path,
+        logger: logging.Logger,
+        interval: float = 15.0
+    ):
         """
-        Move a file using legacy naming convention (timestamp prefix).
+        Initialize the MetricsFileWriter.
 
         Args:
-            file_path: Path to the file to move
-            cfg: Configuration dictionary for this rule
+            registry: Metrics to write
+            path: Output file
+            logger: Logger instance for logging
+            interval: Seconds between writes
         """
+        self.registry = registry
+        self.path = path
+        self.logger = logger
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="watchdog-metrics-file", daemon=True)
+
+    def start(self) -> None:
+        """Start writing."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+        self.logger.info("Writing metrics to %s every %gs", self.path, self.interval)
+
+    def stop(self) -> None:
+        """Write a final snapshot and stop."""
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+    def write(self) -> None:
+        """Write one snapshot."""
+        tmp = self.path.with_name(self.path.name + '.tmp')
         try:
-            if not file_path.exists():
-                self.logger.warning(f"File not found (already moved?): {file_path.name}")
-                return
+            tmp.write_text(self.registry.render(), encoding='utf-8')
+            os.replace(tmp, self.path)
+        except OSError as e:
+            self.logger.warning("Could not write metrics file: %s", e)
 
-            # Handle overwrite mode (for Benchmark reports)
-            if cfg.get('overwrite', False):
-                self._move_with_overwrite(file_path, cfg)
-                return
+    def _run(self) -> None:
+        """Write loop."""
+        while not self._stop.wait(self.interval):
+            self.write()
 
-            ts = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
-            # Preserve original file extension for e_ticket CSV files
-            if cfg.get('type') == 'E_Ticket' and file_path.suffix.lower() == '.csv':
-                new_name = f"{ts}_{cfg['suffix']}.csv"
-            else:
-                new_name = f"{ts}_{cfg['suffix']}.{cfg['format']}"
-            dest_path = cfg['dest'] / new_name
 
-            self.logger.info(f"Moving '{file_path.name}' -> '{dest_path.name}'")
-            success = self.file_mover.move_file(file_path, dest_path, self.logger)
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats structured event records as one JSON object per line.
 
-            if success:
-                self.logger.info(f"SUCCESS: {cfg['type']} moved: '{file_path.name}' -> '{new_name}'")
-            else:
-                self.logger.error(f"FAILED: Could not move {cfg['type']} file '{file_path.name}'")
+    Only the fields in FIELDS that were passed as ``extra`` are written, so
+    downstream tools can parse moves without scraping the text log.
+    """
 
-        except Exception as e:
-            self.logger.error(f"Error moving {cfg['type']} file '{file_path.name}': {e}")
+    FIELDS = ('profile', 'rule', 'src', 'dest', 'bytes', 'latency_ms', 'outcome')
 
-    def _move_with_overwrite(self, file_path: Path, cfg: Dict) -> None:
+    def format(self, record: logging.LogRecord) -> str:
         """
-        Move a file with overwrite behavior, removing trailing numbers from filename.
+        Render a record as a JSON line.
 
         Args:
-            file_path: Path to the file to move
-            cfg: Configuration dictionary for this rule
-        """
-        try:
-            if not file_path.exists():
-                self.logger.warning(f"File not found (already moved?): {file_path.name}")
-                return
+            record: Log record carrying structured fields
 
-            # Remove trailing numbers like (1), (02), (003), etc. from filename
-            original_name = file_path.stem  # filename without extension
-            if cfg.get('remove_trailing_numbers', False):
-                # Pattern: matches ( followed by optional digits, then )
-                cleaned_name = re.sub(r'\(\d+\)$', '', original_name)
-            else:
-                cleaned_name = original_name
+        Returns:
+            JSON object on a single line
+        """
+        entry: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'event': record.getMessage(),
+        }
+        for field in self.FIELDS:
+            if field in record.__dict__:
+                entry[field] = record.__dict__[field]
+        return json.dumps(entry, ensure_ascii=False)
 
-            # Construct destination filename
-            dest_filename = f"{cleaned_name}.{cfg['format']}"
-            dest_path = cfg['dest'] / dest_filename
 
-            # Ensure destination directory exists
-            cfg['dest'].mkdir(parents=True, exist_ok=True)
+class _LogListener(QueueListener):
+    """QueueListener that can always be stopped, even with its queue full."""
 
-            # Delete existing file if it exists (overwrite)
-            if dest_path.exists():
-                self.logger.info(f"Overwriting existing file: {dest_path.name}")
-                try:
-                    dest_path.unlink()
-                except Exception as e:
-                    self.logger.warning(f"Could not delete existing file {dest_path.name}: {e}")
+    def enqueue_sentinel(self) -> None:
+        """Queue the stop marker, waiting for room instead of raising queue.Full."""
+        self.queue.put(self._sentinel)
 
-            self.logger.info(f"Moving '{file_path.name}' -> '{dest_path.name}' (overwrite mode)")
-            success = self.file_mover.move_file(file_path, dest_path, self.logger)
 
-            if success:
-                self.logger.info(f"SUCCESS: {cfg['type']} moved: '{file_path.name}' -> '{dest_path.name}'")
-            else:
-                self.logger.error(f"FAILED: Could not move {cfg['type']} file '{file_path.name}'")
+class AsyncLogHandler(QueueHandler):
+    """
+    Hands log records to a background thread that does the formatting and I/O.
 
-        except Exception as e:
-            self.logger.error(f"Error moving {cfg['type']} file '{file_path.name}': {e}")
+    The calling thread only enqueues the record: messages stay unformatted
+    (%-style arguments are rendered by the listener) and a full queue drops
+    the record instead of blocking, so a slow disk or console never delays
+    an event or a move.
+    """
 
-    def _move_new_rule_file(self, file_path: Path, cfg: Dict) -> None:
+    def __init__(self, handlers: List[logging.Handler], max_queue: int = 10000):
         """
-        Move a file using new naming convention with year-based subfolders.
+        Initialize the AsyncLogHandler.
 
         Args:
-            file_path: Path to the file to move
-            cfg: Configuration dictionary for this rule
+            handlers: Handlers the listener thread writes to
+            max_queue: Records buffered before new ones are dropped
         """
-        try:
-            if not file_path.exists():
-                self.logger.warning(f"File not found (already moved?): {file_path.name}")
-                return
+        super().__init__(queue.Queue(max_queue))
+        self.listener = _LogListener(self.queue, *handlers, respect_handler_level=True)
+        self.dropped = 0
+        self._running = False
 
-            # Extract year from filename
-            year = self.year_extractor.extract_year(file_path.name, cfg['year_strategy'])
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Keep the record lazy; only tracebacks are rendered before enqueueing.
 
-            # Handle generic Response_Time files - detect CAD/RMS from filename
-            target_dir = cfg['target_dir']
-            if cfg.get('detect_type', False):
-                name_lower = file_path.name.lower()
-                if 'cad' in name_lower:
-                    target_dir = '_CAD/response_time'
-                elif 'rms' in name_lower:
-                    target_dir = '_RMS/response_time'
-                # If neither CAD nor RMS found, use default (CAD)
-                self.logger.info(f"Detected type from filename: {target_dir}")
+        Args:
+            record: Log record to enqueue
 
-            if not year:
-                self.logger.warning(
-                    f"Could not extract year from '{file_path.name}' using strategy '{cfg['year_strategy']}'. "
-                    f"Moving to base directory without year subfolder."
-                )
-                dest_dir = self.base_exports / target_dir
-            else:
-                dest_dir = self.base_exports / target_dir / year
+        Returns:
+            The record, with exc_info replaced by its rendered text
+        """
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-            # Keep original filename
-            dest_path = dest_dir / file_path.name
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Queue a record for the listener, dropping it if the queue is full.
 
-            self.logger.info(f"Moving '{file_path.name}' -> '{dest_path}'")
-            success = self.file_mover.move_file(file_path, dest_path, self.logger)
+        Args:
+            record: Log record to enqueue
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
-            if success:
-                self.logger.info(
-                    f"SUCCESS: {target_dir} file moved: '{file_path.name}' -> '{dest_path}'"
-                )
-            else:
-                self.logger.error(f"FAILED: Could not move file '{file_path.name}'")
+    def start(self) -> None:
+        """Start the listener thread."""
+        self.listener.start()
+        self._running = True
+        # QueueListener has no way to name its thread; name it for thread dumps
+        self.listener._thread.name = "watchdog-log"
 
-        except Exception as e:
-            self.logger.error(f"Error moving file '{file_path.name}': {e}")
+    def stop(self) -> None:
+        """Write out the queued records and stop the listener thread."""
+        if self._running:
+            self._running = False
+            self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
 
 
-def setup_logging(script_dir: Path) -> logging.Logger:
+def setup_logging(script_dir: Path, json_log: Optional[Path] = None) -> Tuple[logging.Logger, AsyncLogHandler]:
     """
-    Configure logging with rotating file handler.
+    Configure logging with rotating file handler, written from a background thread.
 
     Args:
         script_dir: Directory where the script is located
+        json_log: Optional JSON-lines file for structured move events
 
     Returns:
-        Configured logger instance
+        Configured logger instance and the handler running the log thread
+        (stop it on shutdown to flush queued records)
     """
     # Create logs directory
     logs_dir = script_dir / 'logs'
@@ -636,6 +6673,10 @@ def setup_logging(script_dir: Path) -> logging.Logger:
     # Remove existing handlers
     logger.handlers.clear()
 
+    # Structured events go to a child logger; it is only enabled for --json-log
+    events = logger.getChild('events')
+    events.setLevel(logging.INFO if json_log else logging.WARNING)
+
     # Rotating file handler (5MB max, keep 5 backup files)
     file_handler = RotatingFileHandler(
         str(log_file),
@@ -655,38 +6696,314 @@ def setup_logging(script_dir: Path) -> logging.Logger:
         '%(asctime)s - %(levelname)s - %(message)s',
         datefmt=timestamp_fmt
     )
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+    handlers: List[logging.Handler] = []
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+        handler.addFilter(lambda record: record.name != events.name)
+        handlers.append(handler)
+
+    # JSON-lines handler for structured events only
+    if json_log:
+        json_log.parent.mkdir(parents=True, exist_ok=True)
+        json_handler = RotatingFileHandler(
+            str(json_log),
+            maxBytes=5 * 1024 * 1024,
+            backupCount=5,
+            encoding='utf-8'
+        )
+        json_handler.setFormatter(JsonLinesFormatter())
+        json_handler.addFilter(lambda record: record.name == events.name)
+        handlers.append(json_handler)
+
+    # Add the queue handler; the listener thread does the formatting and writes
+    async_handler = AsyncLogHandler(handlers)
+    logger.addHandler(async_handler)
+    async_handler.start()
+
+    return logger, async_handler
 
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
 
-    return logger
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line options.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Export File Watchdog Service")
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help="Number of worker threads running file moves (default: 4)"
+    )
+    parser.add_argument(
+        '--queue-depth', type=int, default=256,
+        help="Maximum number of moves waiting for a worker (default: 256)"
+    )
+    parser.add_argument(
+        '--backend', choices=['auto', 'inotify', 'polling', 'watchdog'], default='watchdog',
+        help="File event source: watchdog's Observer (default), native inotify on Linux, "
+             "incremental polling (for OneDrive and network folders), or auto (inotify where available)"
+    )
+    parser.add_argument(
+        '--poll-interval', type=float, default=5.0,
+        help="Longest seconds between polls when idle, with --backend polling (default: 5)"
+    )
+    parser.add_argument(
+        '--quiet-period', type=float, default=0.5,
+        help="Seconds a file must stop changing before it is moved (default: 0.5)"
+    )
+    parser.add_argument(
+        '--retry-window', type=float, default=3600.0,
+        help="Seconds to keep retrying a locked file before giving up (default: 3600)"
+    )
+    parser.add_argument(
+        '--verify', choices=['none', 'size', 'checksum'], default='size',
+        help="Check cross-volume copies before removing the source (default: size)"
+    )
+    parser.add_argument(
+        '--journal', type=Path, default=None,
+        help="SQLite journal of moves (default: state/watchdog_journal.db next to this script)"
+    )
+    parser.add_argument(
+        '--no-journal', action='store_true',
+        help="Run without the move journal"
+    )
+    parser.add_argument(
+        '--dedupe', choices=['off', 'skip', 'link'], default='off',
+        help="Files whose content is already filed in the destination folder: "
+             "skip (remove them) or link (file a hard link to the existing copy) (default: off)"
+    )
+    parser.add_argument(
+        '--dedupe-index', type=Path, default=None,
+        help="SQLite index of filed content (default: state/watchdog_content.db next to this script)"
+    )
+    parser.add_argument(
+        '--validate', action='store_true',
+        help="Check .xlsx and .csv files for truncation before filing; damaged files are quarantined"
+    )
+    parser.add_argument(
+        '--quarantine', type=Path, default=None,
+        help="Folder for files that fail validation (default: _Quarantine under the exports folder)"
+    )
+    parser.add_argument(
+        '--no-sniff', action='store_true',
+        help="Never read file contents to classify a file or find its year"
+    )
+    parser.add_argument(
+        '--catalog', type=Path, default=None,
+        help="SQLite catalog of filed exports (default: state/export_catalog.db next to this script)"
+    )
+    parser.add_argument(
+        '--no-catalog', action='store_true',
+        help="Run without the export catalog"
+    )
+    parser.add_argument(
+        '--move-rate', type=float, default=None,
+        help="Most MB per second filed into the exports tree (default: unlimited)"
+    )
+    parser.add_argument(
+        '--move-ops', type=float, default=None,
+        help="Most moves per second into the exports tree (default: unlimited)"
+    )
+    parser.add_argument(
+        '--root-move-rate', type=float, default=None,
+        help="Most MB per second filed into one top-level exports folder (default: unlimited)"
+    )
+    parser.add_argument(
+        '--root-move-ops', type=float, default=None,
+        help="Most moves per second into one top-level exports folder (default: unlimited)"
+    )
+    parser.add_argument(
+        '--move-batch', type=int, default=1,
+        help="Moves let through together between pauses when --move-ops/--root-move-ops apply (default: 1)"
+    )
+    parser.add_argument(
+        '--no-archive', action='store_true',
+        help="Never archive aged exports, even for rules with archive_after"
+    )
+    parser.add_argument(
+        '--archive-index', type=Path, default=None,
+        help="SQLite index of archived files (default: state/export_archive.db next to this script)"
+    )
+    parser.add_argument(
+        '--archive-compression', choices=['lzma', 'deflate'], default='lzma',
+        help="Compression of archive entries (default: lzma)"
+    )
+    parser.add_argument(
+        '--archive-rate', type=float, default=4.0,
+        help="Most MB per second read by the archiver (default: 4)"
+    )
+    parser.add_argument(
+        '--archive-cpu', type=float, default=0.25,
+        help="Fraction of one CPU the archiver may spend compressing (default: 0.25)"
+    )
+    parser.add_argument(
+        '--metrics-port', type=int, default=None,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics"
+    )
+    parser.add_argument(
+        '--metrics-file', type=Path, default=None,
+        help="Write Prometheus metrics to this file every 15 seconds"
+    )
+    parser.add_argument(
+        '--rules', type=Path, default=None,
+        help="JSON or TOML rule file (default: export_rules.json next to this script)"
+    )
+    parser.add_argument(
+        '--rules-poll', type=float, default=2.0,
+        help="Seconds between checks of the rule file for changes; 0 disables reloading (default: 2)"
+    )
+    parser.add_argument(
+        '--profiles', type=Path, default=None,
+        help="JSON file of user profiles to serve from this one process (default: the current user)"
+    )
+    parser.add_argument(
+        '--json-log', type=Path, default=None,
+        help="Also write one JSON object per move (rule, src, dest, bytes, latency_ms) to this file"
+    )
+    parser.add_argument(
+        '--record-events', type=Path, default=None,
+        help="Write every file system event received to this trace (.gz to compress), "
+             "for benchmarks/replay_trace.py"
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
     """Main entry point for the watchdog service."""
+    args = parse_args()
+
     # Determine script directory
     script_dir = Path(__file__).resolve().parent
 
     # Setup logging
-    logger = setup_logging(script_dir)
+    logger, log_handler = setup_logging(script_dir, json_log=args.json_log)
+
+    # Users served: the current one, or every profile in --profiles
+    if args.profiles:
+        try:
+            profiles = load_profiles(args.profiles)
+        except (OSError, ValueError) as e:
+            logger.error("Could not load profiles from %s: %s", args.profiles, e)
+            log_handler.stop()
+            sys.exit(1)
+        logger.info("Multi-profile mode: %s profile(s) from %s", len(profiles), args.profiles)
+    else:
+        profiles = [Profile('', Path.home(), default_exports_dir())]
 
-    # Get base exports directory dynamically
-    home = Path.home()
-    base_exports = home / "OneDrive - City of Hackensack" / "05_EXPORTS"
+    # Create base exports directories if they don't exist
+    for profile in profiles:
+        profile.base_exports.mkdir(parents=True, exist_ok=True)
+
+    # Open the move journal
+    journal = None
+    if not args.no_journal:
+        journal_path = args.journal or script_dir / 'state' / 'watchdog_journal.db'
+        journal = MoveJournal(journal_path, logger)
+        logger.info("Move journal: %s", journal_path)
+
+    # Open the duplicate index
+    duplicates = None
+    if args.dedupe != 'off':
+        index_path = args.dedupe_index or script_dir / 'state' / 'watchdog_content.db'
+        duplicates = DuplicateIndex(index_path, logger)
+        logger.info("Duplicate detection (%s): %s, %s file(s) indexed", args.dedupe, index_path, len(duplicates))
+
+    # Open the export catalog
+    catalog = None
+    if not args.no_catalog:
+        catalog_path = args.catalog or DEFAULT_CATALOG_FILE
+        catalog = ExportCatalog(catalog_path, logger)
+        logger.info("Export catalog: %s, %s file(s) catalogued", catalog_path, len(catalog))
+
+    # Open the archive index
+    archiver = None
+    if not args.no_archive:
+        archive_index = args.archive_index or DEFAULT_ARCHIVE_INDEX
+        archiver = ExportArchiver(
+            archive_index, logger,
+            compression=args.archive_compression,
+            bytes_per_second=args.archive_rate * 1024 * 1024,
+            cpu_share=args.archive_cpu
+        )
+
+    # Metrics exposition
+    metrics = MetricsRegistry()
+    metrics.gauge('watchdog_log_records_dropped_total', lambda: log_handler.dropped,
+                  "Log records dropped because the log queue was full", kind='counter')
+    exporters = []
+    if args.metrics_port is not None:
+        exporters.append(MetricsServer(metrics, args.metrics_port, logger))
+    if args.metrics_file is not None:
+        exporters.append(MetricsFileWriter(metrics, args.metrics_file, logger))
+
+    # Rate limits on moves into the synced tree
+    throttle = None
+    if any(v is not None for v in (args.move_rate, args.move_ops, args.root_move_rate, args.root_move_ops)):
+        mb = 1024 * 1024
+        throttle = MoveThrottle(
+            None,
+            bytes_per_second=args.move_rate * mb if args.move_rate else None,
+            ops_per_second=args.move_ops,
+            root_bytes_per_second=args.root_move_rate * mb if args.root_move_rate else None,
+            root_ops_per_second=args.root_move_ops,
+            batch=args.move_batch,
+            metrics=metrics
+        )
+        for profile in profiles:
+            throttle.add_base(profile.base_exports, profile.name)
+
+    # Workers shared by every profile
+    services = SharedServices(
+        logger,
+        max_workers=args.workers,
+        max_queue_depth=args.queue_depth,
+        quiet_period=args.quiet_period,
+        retry_window=args.retry_window,
+        verify=args.verify,
+        metrics=metrics,
+        sniffer=None if args.no_sniff else ContentSniffer(),
+        throttle=throttle,
+        rules_poll_interval=args.rules_poll or None
+    )
+    validator = ExportValidator() if args.validate else None
 
-    # Create base exports directory if it doesn't exist
-    base_exports.mkdir(parents=True, exist_ok=True)
+    # Record events for offline replay
+    recorder = None
+    if args.record_events:
+        recorder = EventRecorder(args.record_events, logger)
+        logger.info("Recording events to %s", args.record_events)
 
-    # Initialize handler
-    handler = ExportWatchdogHandler(base_exports, logger)
+    # Initialize one handler per profile
+    handlers = []
+    for profile in profiles:
+        handlers.append(ExportWatchdogHandler(
+            profile.base_exports,
+            logger,
+            home=profile.home,
+            journal=journal,
+            rules_file=profile.rules_file or args.rules,
+            duplicates=duplicates,
+            dedupe=args.dedupe,
+            validator=validator,
+            quarantine_dir=profile.quarantine_dir or args.quarantine,
+            catalog=catalog,
+            archiver=archiver,
+            services=services,
+            profile=profile.name or None,
+            recorder=recorder
+        ))
+    for exporter in exporters:
+        exporter.start()
 
-    # Setup observer
-    observer = Observer()
-    for watch_path in handler.monitor_paths:
-        observer.schedule(handler, str(watch_path), recursive=False)
+    # Setup observer (one for every profile's folders)
+    observer = create_observer(args.backend, logger, poll_interval=args.poll_interval)
+    for handler in handlers:
+        for watch_path in handler.monitor_paths:
+            observer.schedule(handler, str(watch_path), recursive=handler.watches_subfolders(watch_path))
+    if hasattr(observer, 'watch_count'):
+        metrics.gauge('watchdog_watched_folders', lambda: observer.watch_count,
+                      "Folders the event backend is watching")
 
     observer.start()
     logger.info("Watchdog service is now running. Press Ctrl+C to stop.")
@@ -699,6 +7016,22 @@ def main() -> None:
         logger.info("Watchdog service stopped by user.")
     finally:
         observer.join()
+        if recorder is not None:
+            recorder.close()
+        for handler in handlers:
+            handler.shutdown()
+        services.shutdown()
+        for exporter in exporters:
+            exporter.stop()
+        if journal:
+            journal.close()
+        if duplicates is not None:
+            duplicates.close()
+        if archiver is not None:
+            archiver.close()
+        if catalog is not None:
+            catalog.close()
+        log_handler.stop()
 
 
 if __name__ == '__main__':